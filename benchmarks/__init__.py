@@ -0,0 +1,8 @@
+"""
+Pacote de benchmarks de carga e latência da API de operadoras.
+
+- dados_sinteticos.py: Geração de CSVs no formato do Relatorio_cadop da ANS
+- carga_api.py: Execução das consultas com clientes concorrentes e relatório
+"""
+
+# Este arquivo permite que o diretório 'benchmarks' seja reconhecido como um pacote Python
@@ -0,0 +1,386 @@
+"""
+Benchmark de carga e latência da API de busca de operadoras.
+
+Gera cadastros sintéticos de vários tamanhos, dispara as consultas típicas
+da interface com clientes concorrentes e reporta vazão e latências p50/p95/p99
+por formato de consulta. Os resultados são gravados em JSON para comparação
+entre commits.
+
+Uso:
+    python -m benchmarks.carga_api                                  # 1k, 10k e 100k linhas, cliente de teste do Flask
+    python -m benchmarks.carga_api --linhas 1000 1000000 --concorrencia 16
+    python -m benchmarks.carga_api --modo http                      # servidor HTTP local (werkzeug, com threads)
+    python -m benchmarks.carga_api --backend sqlite                 # busca pelo banco SQLite em vez da memória
+    python -m benchmarks.carga_api --url http://localhost:5000      # servidor já em execução (ex.: gunicorn)
+    python -m benchmarks.carga_api --comparar benchmarks/resultados/<arquivo>.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+import itertools
+import threading
+import subprocess
+import http.client
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Adicionar o diretório raiz ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.dados_sinteticos import obter_csv_sintetico, UFS, PREFIXOS, CIDADES
+
+DIRETORIO_BENCHMARKS = Path(__file__).resolve().parent
+DIRETORIO_DADOS = DIRETORIO_BENCHMARKS / 'dados'
+DIRETORIO_RESULTADOS = DIRETORIO_BENCHMARKS / 'resultados'
+
+# Variações de cada consulta; com poucas variações o cache de respostas domina
+VARIACOES = 64
+
+ERROS_DIGITACAO = ['unimd campinas', 'hapvda', 'bradsco saude', 'odonto curitba', 'sul amerca',
+                   'santa csa', 'amil sao paolo', 'golden cros']
+
+
+def _url(caminho, **parametros):
+    return caminho + ('?' + urlencode(parametros) if parametros else '')
+
+
+def montar_consultas(linhas):
+    """
+    Monta as URLs de cada formato de consulta medido
+
+    Args:
+        linhas (int, optional): Tamanho do cadastro sintético, para gerar
+                                Registros ANS existentes
+
+    Returns:
+        dict: Nome do formato -> lista de URLs
+    """
+    palavras = [p.lower() for p in PREFIXOS + CIDADES]
+    registros = linhas or 1000
+    return {
+        'lista_padrao': [_url('/api/operadoras')],
+        'texto_comum': [_url('/api/operadoras', q=palavras[i % len(palavras)]) for i in range(VARIACOES)],
+        'texto_raro': [_url('/api/operadoras', q=str(300000 + (i * 7919) % registros)) for i in range(VARIACOES)],
+        'uf': [_url('/api/operadoras', uf=UFS[i % len(UFS)]) for i in range(VARIACOES)],
+        'uf_modalidade_desc': [_url('/api/operadoras', uf=UFS[i % len(UFS)], modalidade='odonto',
+                                    ordenacao='registro_ans', ordem='desc') for i in range(VARIACOES)],
+        'limite_1000': [_url('/api/operadoras', uf=UFS[i % len(UFS)], limite=1000) for i in range(VARIACOES)],
+        'fuzzy': [_url('/api/operadoras', q=ERROS_DIGITACAO[i % len(ERROS_DIGITACAO)], modo='fuzzy')
+                  for i in range(len(ERROS_DIGITACAO))],
+        'opcoes_filtro': [_url('/api/opcoes-filtro')],
+    }
+
+
+class ClienteFlask:
+    """Cliente que chama a aplicação no próprio processo, sem rede"""
+
+    def __init__(self, app):
+        self._cliente = app.test_client()
+
+    def get(self, url):
+        response = self._cliente.get(url, headers={'Accept-Encoding': 'gzip'})
+        response.get_data()
+        return response.status_code
+
+
+class ClienteHTTP:
+    """Cliente HTTP com conexão persistente (keep-alive)"""
+
+    def __init__(self, url_base):
+        partes = urlsplit(url_base)
+        self._conexao = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=60)
+
+    def get(self, url):
+        self._conexao.request('GET', url, headers={'Accept-Encoding': 'gzip'})
+        response = self._conexao.getresponse()
+        response.read()
+        return response.status
+
+
+def medir_consulta(criar_cliente, urls, concorrencia, requisicoes):
+    """
+    Executa as requisições de um formato de consulta com clientes concorrentes
+
+    Args:
+        criar_cliente (callable): Cria um cliente (um por thread)
+        urls (list): URLs usadas em rodízio
+        concorrencia (int): Número de clientes simultâneos
+        requisicoes (int): Total de requisições
+
+    Returns:
+        dict: Vazão, erros e latências (ms) da consulta
+    """
+    contador = itertools.count()
+    latencias = []
+    erros = []
+
+    def trabalhar():
+        cliente = criar_cliente()
+        locais, falhas = [], 0
+        while (indice := next(contador)) < requisicoes:
+            inicio = time.perf_counter()
+            status = cliente.get(urls[indice % len(urls)])
+            locais.append(time.perf_counter() - inicio)
+            falhas += status != 200
+        latencias.extend(locais)
+        erros.append(falhas)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        for futuro in [executor.submit(trabalhar) for _ in range(concorrencia)]:
+            futuro.result()
+    duracao = time.perf_counter() - inicio
+
+    latencias_ms = np.array(latencias) * 1000
+    p50, p95, p99 = np.percentile(latencias_ms, [50, 95, 99])
+    return {
+        'requisicoes': len(latencias),
+        'erros': sum(erros),
+        'rps': round(len(latencias) / duracao, 1),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'media_ms': round(float(latencias_ms.mean()), 3),
+        'max_ms': round(float(latencias_ms.max()), 3),
+    }
+
+
+def executar_tamanho(criar_cliente, linhas, concorrencia, requisicoes, aquecer):
+    """
+    Mede todos os formatos de consulta contra um cadastro
+
+    Args:
+        criar_cliente (callable): Cria um cliente (um por thread)
+        linhas (int, optional): Tamanho do cadastro, se conhecido
+        concorrencia (int): Número de clientes simultâneos
+        requisicoes (int): Requisições por formato de consulta
+        aquecer (callable, optional): Carrega o dataset antes das medições e
+                                      retorna o tempo de carga em segundos
+
+    Returns:
+        dict: Resultado do tamanho, com as medições de cada consulta
+    """
+    resultado = {'linhas': linhas, 'carga_segundos': None, 'consultas': {}}
+    if aquecer is not None:
+        resultado['carga_segundos'] = round(aquecer(), 3)
+
+    cliente = criar_cliente()
+    for nome, urls in montar_consultas(linhas).items():
+        # Uma passada sem medir: dataset, índices e fragmentos já prontos
+        for url in urls:
+            cliente.get(url)
+        resultado['consultas'][nome] = medir_consulta(criar_cliente, urls, concorrencia, requisicoes)
+    return resultado
+
+
+def preparar_aplicacao(sem_cache, backend='memoria'):
+    """Importa a aplicação Flask com o backend pedido, opcionalmente sem o cache de respostas"""
+    from src.api import server
+    from src.api.cache import CacheResultados
+
+    server.app.config['BACKEND_BUSCA'] = backend
+    if sem_cache:
+        server.cache_resultados = CacheResultados(limite_bytes=0)
+    return server
+
+
+def apontar_dataset(server, caminho_csv):
+    """
+    Aponta a aplicação para o CSV indicado
+
+    Returns:
+        callable: Função que carrega o dataset e retorna o tempo de carga
+    """
+    from src.api.dataset import DatasetOperadoras
+    from src.api.banco_sqlite import BancoOperadoras
+
+    server.dataset_operadoras = DatasetOperadoras(caminho_csv)
+    server.banco_operadoras = BancoOperadoras(caminho_csv)
+    server.cache_resultados.limpar()
+
+    def aquecer():
+        inicio = time.perf_counter()
+        if server.usar_sqlite():
+            with server.banco_operadoras.conexao():
+                pass
+        else:
+            server.dataset_operadoras.obter()
+        return time.perf_counter() - inicio
+
+    return aquecer
+
+
+def iniciar_servidor_local(app):
+    """
+    Inicia o servidor de desenvolvimento do werkzeug em uma thread
+
+    Returns:
+        tuple: (servidor, url_base)
+    """
+    from werkzeug.serving import make_server
+
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f'http://127.0.0.1:{servidor.server_port}'
+
+
+def commit_atual():
+    """Obtém o hash do commit atual, se o diretório for um repositório git"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=DIRETORIO_BENCHMARKS).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def imprimir_resultado(resultado):
+    """Imprime a tabela de um tamanho de cadastro"""
+    linhas = resultado['linhas'] if resultado['linhas'] is not None else '?'
+    carga = resultado['carga_segundos']
+    print(f"\n=== {linhas} operadoras" + (f" (carga: {carga:.2f}s)" if carga is not None else '') + " ===")
+    print(f"{'consulta':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}")
+    for nome, medida in resultado['consultas'].items():
+        print(f"{nome:<20}{medida['rps']:>10.1f}{medida['p50_ms']:>10.2f}{medida['p95_ms']:>10.2f}"
+              f"{medida['p99_ms']:>10.2f}{medida['erros']:>8}")
+
+
+def comparar_resultados(atual, anterior):
+    """
+    Imprime a variação de vazão e latência em relação a uma execução anterior
+
+    Args:
+        atual (dict): Resultado desta execução
+        anterior (dict): Resultado carregado do JSON de referência
+    """
+    print(f"\nComparação com o commit {anterior.get('commit')} ({anterior.get('data')}):")
+    por_tamanho = {execucao['linhas']: execucao for execucao in anterior['execucoes']}
+    for execucao in atual['execucoes']:
+        referencia = por_tamanho.get(execucao['linhas'])
+        if referencia is None:
+            continue
+        print(f"\n--- {execucao['linhas']} operadoras ---")
+        print(f"{'consulta':<20}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for nome, medida in execucao['consultas'].items():
+            base = referencia['consultas'].get(nome)
+            if base is None:
+                continue
+            variacoes = [f"{(medida[campo] / base[campo] - 1) * 100:+.1f}%" if base[campo] else 'n/d'
+                         for campo in ('rps', 'p50_ms', 'p95_ms', 'p99_ms')]
+            print(f"{nome:<20}" + ''.join(f"{variacao:>10}" for variacao in variacoes))
+
+
+def executar_benchmark(linhas, concorrencia=8, requisicoes=500, modo='flask', url=None, sem_cache=False,
+                       backend='memoria'):
+    """
+    Executa o benchmark completo
+
+    Args:
+        linhas (list): Tamanhos de cadastro sintético a medir
+        concorrencia (int): Número de clientes simultâneos
+        requisicoes (int): Requisições por formato de consulta
+        modo (str): 'flask' (cliente de teste, sem rede) ou 'http' (servidor local)
+        url (str, optional): URL de um servidor já em execução; neste caso os
+                             dados sintéticos não são usados
+        sem_cache (bool): Desliga o cache de respostas (modos flask e http)
+        backend (str): Backend da busca ('memoria' ou 'sqlite', modos flask e http)
+
+    Returns:
+        dict: Resultado completo, no formato gravado em JSON
+    """
+    resultado = {
+        'commit': commit_atual(),
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'modo': 'url' if url else modo,
+        'concorrencia': concorrencia,
+        'requisicoes_por_consulta': requisicoes,
+        'cache': not sem_cache,
+        'backend': None if url else backend,
+        'execucoes': [],
+    }
+
+    if url:
+        execucao = executar_tamanho(lambda: ClienteHTTP(url), None, concorrencia, requisicoes, None)
+        imprimir_resultado(execucao)
+        resultado['execucoes'].append(execucao)
+        return resultado
+
+    server = preparar_aplicacao(sem_cache, backend)
+    dataset_original, banco_original = server.dataset_operadoras, server.banco_operadoras
+    servidor_local = None
+    if modo == 'http':
+        servidor_local, url_local = iniciar_servidor_local(server.app)
+        criar_cliente = lambda: ClienteHTTP(url_local)
+    else:
+        criar_cliente = lambda: ClienteFlask(server.app)
+
+    try:
+        for quantidade in linhas:
+            caminho_csv = obter_csv_sintetico(DIRETORIO_DADOS, quantidade)
+            aquecer = apontar_dataset(server, caminho_csv)
+            execucao = executar_tamanho(criar_cliente, quantidade, concorrencia, requisicoes, aquecer)
+            imprimir_resultado(execucao)
+            resultado['execucoes'].append(execucao)
+    finally:
+        server.dataset_operadoras, server.banco_operadoras = dataset_original, banco_original
+        if servidor_local is not None:
+            servidor_local.shutdown()
+    return resultado
+
+
+def salvar_resultado(resultado, diretorio=DIRETORIO_RESULTADOS):
+    """
+    Grava o resultado em JSON, nomeado pela data e pelo commit
+
+    Returns:
+        Path: Caminho do arquivo gravado
+    """
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    data = resultado['data'].replace(':', '').replace('-', '')
+    caminho = diretorio / f"{data}_{resultado['commit']}_{resultado['modo']}_{resultado['backend'] or 'url'}.json"
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark de carga da API de operadoras")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Tamanhos do cadastro sintético (ex.: 1000 10000 1000000)')
+    parser.add_argument('--concorrencia', type=int, default=8, help='Clientes simultâneos')
+    parser.add_argument('--requisicoes', type=int, default=500, help='Requisições por formato de consulta')
+    parser.add_argument('--modo', choices=['flask', 'http'], default='flask',
+                        help='flask: cliente de teste no processo; http: servidor local com threads')
+    parser.add_argument('--url', help='Mede um servidor já em execução em vez dos dados sintéticos')
+    parser.add_argument('--backend', choices=['memoria', 'sqlite'], default='memoria',
+                        help='Backend da busca da API')
+    parser.add_argument('--sem-cache', action='store_true', help='Desliga o cache de respostas da API')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--nao-salvar', action='store_true', help='Não grava o resultado em JSON')
+    args = parser.parse_args()
+
+    resultado = executar_benchmark(args.linhas, args.concorrencia, args.requisicoes,
+                                   args.modo, args.url, args.sem_cache, args.backend)
+
+    if not args.nao_salvar:
+        print(f"\nResultado gravado em {salvar_resultado(resultado)}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            comparar_resultados(resultado, json.load(arquivo))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Geração de cadastros sintéticos de operadoras para os benchmarks.
+
+Os arquivos seguem o layout do Relatorio_cadop.csv da ANS (separador ';',
+UTF-8) e são gerados de forma determinística a partir de uma semente, de modo
+que execuções em commits diferentes usem exatamente os mesmos dados.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+UFS = ['AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+       'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO']
+
+# Distribuição aproximada do cadastro real: muito concentrado no Sudeste
+PESOS_UFS = np.array([1, 2, 2, 1, 6, 4, 3, 3, 4, 2, 14, 2, 2, 3,
+                      2, 4, 1, 7, 12, 2, 1, 1, 7, 5, 1, 30, 1], dtype=float)
+
+MODALIDADES = ['Cooperativa Médica', 'Medicina de Grupo', 'Odontologia de Grupo',
+               'Cooperativa Odontológica', 'Autogestão', 'Seguradora Especializada em Saúde',
+               'Filantropia', 'Administradora de Benefícios']
+
+PREFIXOS = ['UNIMED', 'SAÚDE', 'ASSOCIAÇÃO', 'CAIXA DE ASSISTÊNCIA', 'AMIL', 'BRADESCO',
+            'SUL AMÉRICA', 'HAPVIDA', 'NOTRE DAME', 'ODONTO', 'PLANO', 'SÃO FRANCISCO',
+            'SANTA CASA', 'CENTRO CLÍNICO', 'INTERMÉDICA', 'GOLDEN CROSS']
+
+CIDADES = ['SÃO PAULO', 'RIO DE JANEIRO', 'BELO HORIZONTE', 'CAMPINAS', 'CURITIBA',
+           'PORTO ALEGRE', 'SALVADOR', 'RECIFE', 'FORTALEZA', 'GOIÂNIA', 'BRASÍLIA',
+           'FLORIANÓPOLIS', 'VITÓRIA', 'MANAUS', 'BELÉM', 'NATAL', 'RIBEIRÃO PRETO',
+           'SOROCABA', 'JUIZ DE FORA', 'LONDRINA', 'UBERLÂNDIA', 'SANTOS', 'NITERÓI']
+
+SUFIXOS = ['LTDA', 'S.A.', 'COOPERATIVA DE TRABALHO MÉDICO', 'OPERADORA DE PLANOS DE SAÚDE',
+           'ASSISTÊNCIA MÉDICA', 'SERVIÇOS ODONTOLÓGICOS', 'ADMINISTRADORA']
+
+CARGOS = ['DIRETOR PRESIDENTE', 'DIRETOR', 'PRESIDENTE', 'SÓCIO ADMINISTRADOR', 'GERENTE']
+
+
+def gerar_cadastro(linhas, semente=42):
+    """
+    Gera um DataFrame com o layout do cadastro de operadoras da ANS
+
+    Args:
+        linhas (int): Quantidade de operadoras
+        semente (int): Semente do gerador aleatório
+
+    Returns:
+        DataFrame: Operadoras sintéticas (Registro_ANS e CNPJ únicos)
+    """
+    rng = np.random.default_rng(semente)
+
+    def escolher(valores, pesos=None):
+        indices = rng.choice(len(valores), size=linhas, p=None if pesos is None else pesos / pesos.sum())
+        return np.asarray(valores, dtype=object)[indices]
+
+    registros = 300000 + rng.permutation(linhas)
+    cnpjs = 10**13 + rng.choice(9 * 10**13, size=linhas, replace=False)
+    prefixos = escolher(PREFIXOS)
+    cidades = escolher(CIDADES)
+    sufixos = escolher(SUFIXOS)
+    numeros = np.arange(linhas).astype(str)
+
+    razao_social = prefixos + ' ' + cidades + ' ' + numeros + ' ' + sufixos
+    nome_fantasia = np.where(rng.random(linhas) < 0.3, '', prefixos + ' ' + cidades)
+
+    return pd.DataFrame({
+        'Registro_ANS': registros,
+        'CNPJ': cnpjs,
+        'Razao_Social': razao_social,
+        'Nome_Fantasia': nome_fantasia,
+        'Modalidade': escolher(MODALIDADES),
+        'Logradouro': 'RUA ' + escolher(CIDADES),
+        'Numero': rng.integers(1, 5000, size=linhas),
+        'Complemento': '',
+        'Bairro': 'CENTRO',
+        'Cidade': cidades,
+        'UF': escolher(UFS, PESOS_UFS),
+        'CEP': rng.integers(10**7, 10**8 - 1, size=linhas),
+        'DDD': rng.integers(11, 99, size=linhas),
+        'Telefone': rng.integers(10**7, 10**8 - 1, size=linhas),
+        'Fax': '',
+        'Endereco_eletronico': 'contato' + numeros + '@operadora.com.br',
+        'Representante': 'REPRESENTANTE ' + numeros,
+        'Cargo_Representante': escolher(CARGOS),
+        'Regiao_de_Comercializacao': rng.integers(1, 7, size=linhas),
+        'Data_Registro_ANS': pd.Timestamp('1999-01-01') + pd.to_timedelta(rng.integers(0, 9000, size=linhas), unit='D'),
+    })
+
+
+def obter_csv_sintetico(diretorio, linhas, semente=42):
+    """
+    Obtém o CSV sintético com a quantidade de linhas pedida, gerando-o se necessário
+
+    Args:
+        diretorio (str ou Path): Diretório onde os CSVs gerados são guardados
+        linhas (int): Quantidade de operadoras
+        semente (int): Semente do gerador aleatório
+
+    Returns:
+        Path: Caminho do arquivo CSV
+    """
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    caminho = diretorio / f'cadop_sintetico_{linhas}_{semente}.csv'
+    if not caminho.exists():
+        print(f"Gerando {caminho} ({linhas} operadoras)...")
+        temporario = caminho.with_suffix('.tmp')
+        gerar_cadastro(linhas, semente).to_csv(temporario, sep=';', index=False, encoding='utf-8')
+        temporario.replace(caminho)
+    return caminho
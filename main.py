@@ -8,6 +8,9 @@ Uso:
     python main.py --teste 2   # Executa apenas o teste de Transformação de Dados
     python main.py --teste 3   # Executa apenas o teste de Banco de Dados
     python main.py --teste 4   # Executa apenas o teste de API
+    python main.py --teste 4 --workers 4   # API em modo de produção com 4 processos
+    python main.py --teste 4 --backend sqlite   # API consultando o banco SQLite indexado
+    python main.py --teste 3 --apagar-zips      # Apaga cada ZIP depois de extraído
 """
 
 import os
@@ -21,9 +24,26 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from src.webScraping.scraper import principal as web_scraping
 from src.transformacoesDados.extrator_pdf import principal as transformacao_dados
 from src.bancoDeDados.database import main as banco_dados
-from src.api.server import app as servidor_api
+from src.api.server import app as servidor_api, BACKENDS_BUSCA, iniciar_servidor_desenvolvimento
+from src.api.producao import iniciar_servidor_producao
 
-def executar_todos():
+def iniciar_api(workers=None):
+    """
+    Inicia o servidor da API
+    
+    Args:
+        workers (int, optional): Se informado, usa o modo de produção com esse
+                                 número de processos; senão, o servidor de desenvolvimento
+    """
+    print("Iniciando servidor API...")
+    print("Para acessar a interface, abra http://localhost:5000 no navegador")
+    print("Pressione CTRL+C para encerrar o servidor")
+    if workers:
+        iniciar_servidor_producao(workers, host='0.0.0.0', porta=5000)
+    else:
+        iniciar_servidor_desenvolvimento(host='0.0.0.0', port=5000)
+
+def executar_todos(workers=None, manter_zips=True):
     """Executa todos os testes em sequência"""
     print("\n" + "="*60)
     print("TESTES DE NIVELAMENTO - INTUITIVE CARE")
@@ -36,21 +56,27 @@ def executar_todos():
     transformacao_dados()
     
     print("\n===== TESTE 3: BANCO DE DADOS =====")
-    banco_dados()
+    banco_dados(manter_zips)
     
     print("\n===== TESTE 4: API =====")
-    print("Iniciando servidor API...")
-    print("Para acessar a interface, abra http://localhost:5000 no navegador")
-    print("Pressione CTRL+C para encerrar o servidor")
-    servidor_api.run(debug=True, host='0.0.0.0', port=5000)
+    iniciar_api(workers)
 
 def main():
     """Função principal"""
     parser = argparse.ArgumentParser(description="IntuitiveCare Testes de Nivelamento")
     parser.add_argument('--teste', type=int, choices=[1, 2, 3, 4], 
                         help='Escolha qual teste executar (1-4)')
+    parser.add_argument('--workers', type=int,
+                        help='Número de processos da API em modo de produção (Teste 4)')
+    parser.add_argument('--backend', choices=BACKENDS_BUSCA,
+                        help='Backend da busca da API: memoria (padrão) ou sqlite (Teste 4)')
+    parser.add_argument('--apagar-zips', action='store_true',
+                        help='Apaga cada ZIP logo depois de extraído, reduzindo o espaço em disco (Teste 3)')
     args = parser.parse_args()
     
+    if args.backend:
+        servidor_api.config['BACKEND_BUSCA'] = args.backend
+    
     if args.teste == 1:
         print("\n===== TESTE 1: WEB SCRAPING =====")
         web_scraping()
@@ -59,15 +85,12 @@ def main():
         transformacao_dados()
     elif args.teste == 3:
         print("\n===== TESTE 3: BANCO DE DADOS =====")
-        banco_dados()
+        banco_dados(manter_zips=not args.apagar_zips)
     elif args.teste == 4:
         print("\n===== TESTE 4: API =====")
-        print("Iniciando servidor API...")
-        print("Para acessar a interface, abra http://localhost:5000 no navegador")
-        print("Pressione CTRL+C para encerrar o servidor")
-        servidor_api.run(debug=True, host='0.0.0.0', port=5000)
+        iniciar_api(args.workers)
     else:
-        executar_todos()
+        executar_todos(args.workers, manter_zips=not args.apagar_zips)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,595 @@
+"""
+Backend de consulta em SQLite para a busca de operadoras.
+
+Na ingestão, o Relatorio_cadop.csv é gravado em um arquivo SQLite com uma
+tabela FTS5 (tokenizador trigram) para a busca textual e índices B-tree para
+UF, Modalidade, Registro ANS e as colunas de ordenação. As buscas viram SQL
+indexado, e cada processo só abre o arquivo em modo somente leitura: não há
+DataFrame nem índices em memória para construir na inicialização.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from src.api.filtros import (
+    normalizar_colunas, extrair_opcoes_unicas, coluna_de_ordenacao, COLUNAS_ORDENACAO,
+    COLUNAS_CHAVE_LOTE, MAX_SUGESTOES
+)
+from src.api.indices import dobrar_texto, chaves_inteiras, IndiceTrigramas, IndiceExato
+from src.api.dataset import versao_da_assinatura, COLUNAS_CHAVE, COLUNAS_AUTOCOMPLETAR
+from src.api.serializacao import serializar_registro
+from src.api.monitor import MonitorArquivo
+
+# Separador entre os campos no texto indexado (nunca aparece em um termo digitado)
+SEPARADOR_TEXTO = '\x1f'
+
+# Versão do formato do banco; um banco gerado em outro formato é regerado
+FORMATO_BANCO = 2
+
+# Linhas lidas do banco por bloco na exportação
+TAMANHO_BLOCO_EXPORTACAO = 1000
+
+# Chaves por consulta com IN na busca em lote
+CHAVES_POR_CONSULTA = 500
+
+# Conexões somente leitura mantidas abertas no pool, à espera da próxima consulta
+MAX_CONEXOES_OCIOSAS = 8
+
+
+def caminho_banco_padrao(caminho_csv):
+    """
+    Caminho do banco SQLite gerado a partir de um CSV (mesmo nome, extensão .sqlite3)
+
+    Args:
+        caminho_csv (str ou Path): CSV de operadoras
+
+    Returns:
+        Path: Caminho do banco
+    """
+    return Path(caminho_csv).with_suffix('.sqlite3')
+
+
+def _identificador(nome):
+    """Nome de coluna entre aspas para uso no SQL"""
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def _coluna_chave(coluna):
+    """Coluna com o identificador em inteiro (ex.: Registro_ANS -> chave_registro_ans)"""
+    return f'chave_{coluna.lower()}'
+
+
+def banco_atualizado(caminho_csv, caminho_banco=None):
+    """
+    Indica se o banco já foi gerado a partir da versão atual do CSV
+
+    Args:
+        caminho_csv (str ou Path): Relatorio_cadop.csv
+        caminho_banco (str ou Path, optional): Banco; padrão é caminho_banco_padrao
+
+    Returns:
+        bool: True se não é preciso gerar o banco de novo
+    """
+    caminho_banco = Path(caminho_banco) if caminho_banco else caminho_banco_padrao(caminho_csv)
+    if not caminho_banco.exists():
+        return False
+    try:
+        banco = ConexaoSomenteLeitura(caminho_banco)
+    except sqlite3.Error:
+        return False
+    banco.fechar()
+    info = os.stat(caminho_csv)
+    return banco.assinatura == (info.st_mtime_ns, info.st_size)
+
+
+def construir_banco(caminho_csv, caminho_banco=None):
+    """
+    Grava o CSV de operadoras em um banco SQLite indexado
+
+    O banco é montado em um arquivo temporário e renomeado no final, então
+    processos que estejam lendo a versão anterior nunca veem um banco pela metade.
+
+    Args:
+        caminho_csv (str ou Path): Relatorio_cadop.csv
+        caminho_banco (str ou Path, optional): Destino; padrão é caminho_banco_padrao
+
+    Returns:
+        Path: Caminho do banco gerado
+    """
+    caminho_csv = Path(caminho_csv)
+    caminho_banco = Path(caminho_banco) if caminho_banco else caminho_banco_padrao(caminho_csv)
+    info = os.stat(caminho_csv)
+    assinatura = (info.st_mtime_ns, info.st_size)
+
+    print(f"Gerando banco SQLite de consulta em {caminho_banco}...")
+    df = normalizar_colunas(pd.read_csv(caminho_csv, sep=';', encoding='utf-8'))
+    df = df.astype(str)
+    colunas = list(df.columns)
+
+    temporario = caminho_banco.with_name(f'{caminho_banco.name}.{os.getpid()}.tmp')
+    if temporario.exists():
+        temporario.unlink()
+
+    conexao = sqlite3.connect(temporario)
+    try:
+        definicoes = ', '.join(f'{_identificador(col)} TEXT' for col in colunas)
+        definicoes_chaves = ', '.join(f'{_coluna_chave(col)} INTEGER' for col in COLUNAS_CHAVE)
+        conexao.execute(f'CREATE TABLE operadoras (linha INTEGER PRIMARY KEY, {definicoes}, '
+                        f'uf_chave TEXT, modalidade_chave TEXT, {definicoes_chaves}, registro_json BLOB)')
+        marcadores = ', '.join('?' * (len(colunas) + len(COLUNAS_CHAVE) + 4))
+        # Identificadores em inteiro, como no índice exato do backend em memória
+        # (None onde o valor não é um número)
+        chaves = zip(*([None if chave < 0 else chave for chave in chaves_inteiras(df[col]).tolist()]
+                       for col in COLUNAS_CHAVE))
+        # Cada linha já vai gravada também como JSON, pronta para as respostas
+        registros = (
+            (linha, *valores, dobrar_texto(uf), dobrar_texto(modalidade), *chaves_linha,
+             serializar_registro(dict(zip(colunas, valores))))
+            for linha, (valores, uf, modalidade, chaves_linha) in enumerate(zip(
+                df.itertuples(index=False, name=None), df['UF'], df['Modalidade'], chaves))
+        )
+        conexao.executemany(f'INSERT INTO operadoras VALUES ({marcadores})', registros)
+
+        # Texto pesquisável: as colunas da busca, sem acentos e em minúsculas
+        conexao.execute("CREATE VIRTUAL TABLE operadoras_fts USING fts5(texto, tokenize='trigram')")
+        colunas_texto = [col for col in IndiceTrigramas.COLUNAS if col in df.columns]
+        textos = (
+            (linha, SEPARADOR_TEXTO.join(dobrar_texto(valor) for valor in valores))
+            for linha, valores in enumerate(zip(*(df[col] for col in colunas_texto)))
+        )
+        conexao.executemany('INSERT INTO operadoras_fts (rowid, texto) VALUES (?, ?)', textos)
+
+        # Chaves do autocompletar: textos normalizados em ordem, com a coluna e a linha
+        conexao.execute('CREATE TABLE prefixos (texto TEXT, coluna TEXT, linha INTEGER, '
+                        'PRIMARY KEY (texto, coluna, linha)) WITHOUT ROWID')
+        prefixos = (
+            (texto, col, linha)
+            for col in COLUNAS_AUTOCOMPLETAR
+            for linha, texto in enumerate(dobrar_texto(valor) for valor in df[col])
+            if texto
+        )
+        conexao.executemany('INSERT INTO prefixos VALUES (?, ?, ?)', prefixos)
+
+        conexao.execute('CREATE INDEX idx_operadoras_uf ON operadoras (uf_chave)')
+        conexao.execute('CREATE INDEX idx_operadoras_modalidade ON operadoras (modalidade_chave)')
+        conexao.execute('CREATE INDEX idx_operadoras_registro ON operadoras ("Registro_ANS")')
+        for col in COLUNAS_CHAVE:
+            conexao.execute(f'CREATE INDEX "idx_{_coluna_chave(col)}" ON operadoras ({_coluna_chave(col)}, linha)')
+        for col in sorted(set(COLUNAS_ORDENACAO.values())):
+            conexao.execute(f'CREATE INDEX "idx_ordem_{col}" ON operadoras ({_identificador(col)}, linha)')
+            # Filtro por UF já na ordem pedida: a página sai do índice, sem ordenar
+            conexao.execute(f'CREATE INDEX "idx_uf_ordem_{col}" ON operadoras (uf_chave, {_identificador(col)}, linha)')
+
+        conexao.execute('CREATE TABLE metadados (chave TEXT PRIMARY KEY, valor TEXT)')
+        conexao.executemany('INSERT INTO metadados VALUES (?, ?)', [
+            ('formato', str(FORMATO_BANCO)),
+            ('assinatura', json.dumps(list(assinatura))),
+            ('colunas', json.dumps(colunas, ensure_ascii=False)),
+            ('opcoes_filtro', json.dumps(extrair_opcoes_unicas(df), ensure_ascii=False)),
+        ])
+        conexao.commit()
+        conexao.execute('ANALYZE')
+    finally:
+        conexao.close()
+
+    os.replace(temporario, caminho_banco)
+    print(f"Banco SQLite gerado: {len(df)} operadoras")
+    return caminho_banco
+
+
+class ConexaoSomenteLeitura:
+    """
+    Conexão somente leitura a uma versão do banco, com os metadados dela
+    """
+
+    def __init__(self, caminho_banco, geracao=0):
+        info = os.stat(caminho_banco)
+        self.identidade = (info.st_ino, info.st_mtime_ns)
+        self.geracao = geracao
+        # Passa de uma thread a outra pelo pool, mas só uma a usa de cada vez
+        self.conexao = sqlite3.connect(f'file:{Path(caminho_banco).resolve()}?mode=ro', uri=True,
+                                       check_same_thread=False)
+        metadados = dict(self.conexao.execute('SELECT chave, valor FROM metadados'))
+        self.assinatura = tuple(json.loads(metadados['assinatura']))
+        self.versao = versao_da_assinatura(self.assinatura)
+        if metadados.get('formato') != str(FORMATO_BANCO):
+            # Banco de um formato anterior: não corresponde a nenhum CSV e é regerado
+            self.assinatura = None
+        self.colunas = json.loads(metadados['colunas'])
+        self.opcoes_filtro = json.loads(metadados['opcoes_filtro'])
+
+    def fechar(self):
+        self.conexao.close()
+
+
+class BancoOperadoras:
+    """
+    Busca de operadoras servida pelo banco SQLite
+
+    As conexões somente leitura ficam em um pool pequeno: cada consulta
+    retira uma conexão ociosa (ou abre outra) e a devolve ao terminar, então
+    o servidor de desenvolvimento, que cria uma thread por requisição, não
+    abre uma conexão nova a cada requisição. Sem monitoramento, cada obter()
+    confere o CSV e, se ele mudou, regera o banco na hora. Com
+    iniciar_monitoramento(), uma thread em segundo plano regera o banco (se
+    reconstruir=True) e avisa as conexões quando o arquivo do banco é
+    trocado: cada uma é reaberta na próxima vez que sai do pool, sem esperar.
+    """
+
+    def __init__(self, caminho_csv, caminho_banco=None, max_ociosas=MAX_CONEXOES_OCIOSAS):
+        self.caminho_csv = Path(caminho_csv)
+        self.caminho_banco = Path(caminho_banco) if caminho_banco else caminho_banco_padrao(caminho_csv)
+        self.max_ociosas = max_ociosas
+        self._ociosas = []
+        self._lock_pool = threading.Lock()
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._geracao = 0
+        self._identidade = None
+        self._versao = None
+        self._assinatura_observada = None
+
+    def _assinatura_csv(self):
+        info = os.stat(self.caminho_csv)
+        return (info.st_mtime_ns, info.st_size)
+
+    def obter(self):
+        """
+        Retira uma conexão do pool, atualizada; deve voltar com devolver()
+
+        Com o monitoramento ativo, só reabre a conexão se o monitor registrou
+        um banco novo; sem ele, confere o CSV e regera o banco se preciso.
+
+        Returns:
+            ConexaoSomenteLeitura: Conexão e metadados do banco
+        """
+        with self._lock_pool:
+            atual = self._ociosas.pop() if self._ociosas else None
+        if self.monitorando() and self.caminho_banco.exists():
+            if atual is None or atual.geracao != self._geracao:
+                atual = self._reabrir(atual)
+            return atual
+
+        assinatura = self._assinatura_csv()
+        if atual is not None and atual.assinatura == assinatura:
+            return atual
+
+        with self._lock:
+            if self.caminho_banco.exists():
+                if atual is None or atual.identidade != self._identidade_banco():
+                    atual = self._reabrir(atual)
+            if atual is None or atual.assinatura != assinatura:
+                construir_banco(self.caminho_csv, self.caminho_banco)
+                atual = self._reabrir(atual)
+        return atual
+
+    def devolver(self, banco):
+        """Devolve ao pool uma conexão retirada com obter() (fecha a que sobrar)"""
+        with self._lock_pool:
+            if len(self._ociosas) < self.max_ociosas:
+                self._ociosas.append(banco)
+                return
+        banco.fechar()
+
+    @contextmanager
+    def conexao(self):
+        """
+        Conexão do pool durante o bloco with
+
+        Yields:
+            ConexaoSomenteLeitura: Conexão e metadados do banco
+        """
+        banco = self.obter()
+        try:
+            yield banco
+        finally:
+            self.devolver(banco)
+
+    def versao_em_uso(self):
+        """
+        Versão dos dados que as requisições estão usando
+
+        Returns:
+            str: Versão do banco aberto (com monitoramento) ou do CSV em disco
+        """
+        if self.monitorando() and self._versao is not None:
+            return self._versao
+        return versao_da_assinatura(self._assinatura_csv())
+
+    def recarregar_se_mudou(self, reconstruir=True):
+        """
+        Verificação feita pelo monitor em segundo plano
+
+        Args:
+            reconstruir (bool): Se True, regera o banco quando o CSV muda (a
+                                assinatura precisa se repetir em duas
+                                verificações seguidas). Com False, apenas
+                                acompanha o arquivo do banco, regerado por
+                                outro processo.
+
+        Returns:
+            bool: True se as conexões passaram a usar um banco novo
+        """
+        if reconstruir and self.caminho_csv.exists():
+            assinatura = self._assinatura_csv()
+            if not self.caminho_banco.exists() or self._assinatura_do_banco() != assinatura:
+                if assinatura == self._assinatura_observada or not self.caminho_banco.exists():
+                    construir_banco(self.caminho_csv, self.caminho_banco)
+                    self._assinatura_observada = None
+                else:
+                    self._assinatura_observada = assinatura
+
+        if not self.caminho_banco.exists():
+            return False
+        identidade = self._identidade_banco()
+        if identidade == self._identidade:
+            return False
+        banco = ConexaoSomenteLeitura(self.caminho_banco)
+        self._identidade, self._versao = banco.identidade, banco.versao
+        banco.fechar()
+        self._geracao += 1
+        return True
+
+    def _assinatura_do_banco(self):
+        banco = ConexaoSomenteLeitura(self.caminho_banco)
+        banco.fechar()
+        return banco.assinatura
+
+    def iniciar_monitoramento(self, intervalo=5.0, reconstruir=True):
+        """
+        Passa a acompanhar o CSV e o banco em uma thread em segundo plano
+
+        Args:
+            intervalo (float): Segundos entre verificações
+            reconstruir (bool): Ver recarregar_se_mudou
+
+        Returns:
+            MonitorArquivo: Monitor iniciado (ou o que já estava ativo)
+        """
+        if not self.monitorando():
+            self.recarregar_se_mudou(reconstruir)
+            self._monitor = MonitorArquivo(lambda: self.recarregar_se_mudou(reconstruir), intervalo,
+                                           'monitor-banco').iniciar()
+        return self._monitor
+
+    def parar_monitoramento(self):
+        """Volta a conferir o CSV a cada obter()"""
+        if self._monitor is not None:
+            self._monitor.parar()
+            self._monitor = None
+
+    def monitorando(self):
+        """Indica se as atualizações estão a cargo do monitor em segundo plano"""
+        return self._monitor is not None and self._monitor.ativo()
+
+    def fechar(self):
+        """Fecha as conexões ociosas do pool (ex.: no processo principal, antes do fork)"""
+        with self._lock_pool:
+            ociosas, self._ociosas = self._ociosas, []
+        for banco in ociosas:
+            banco.fechar()
+
+    def _identidade_banco(self):
+        info = os.stat(self.caminho_banco)
+        return (info.st_ino, info.st_mtime_ns)
+
+    def _reabrir(self, anterior):
+        if anterior is not None:
+            anterior.fechar()
+        return ConexaoSomenteLeitura(self.caminho_banco, self._geracao)
+
+    @staticmethod
+    def _condicoes(banco, termo_busca, uf, modalidade):
+        """Cláusulas WHERE e parâmetros dos filtros de texto, UF e modalidade"""
+        condicoes, parametros = [], []
+        termo = dobrar_texto(termo_busca) if termo_busca else ''
+        if len(termo) >= 3:
+            # Frase com o termo inteiro: o índice trigram resolve a substring
+            condicoes.append('linha IN (SELECT rowid FROM operadoras_fts WHERE operadoras_fts MATCH ?)')
+            parametros.append('"' + termo.replace('"', '""') + '"')
+        elif termo:
+            escapado = termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            condicoes.append("linha IN (SELECT rowid FROM operadoras_fts WHERE texto LIKE ? ESCAPE '\\')")
+            parametros.append(f'%{escapado}%')
+        if uf:
+            condicoes.append('uf_chave = ?')
+            parametros.append(dobrar_texto(uf))
+        if modalidade:
+            # Poucas modalidades distintas: o "contém" é resolvido antes, e a
+            # consulta usa o índice com IN
+            chave = dobrar_texto(modalidade)
+            valores = [valor for (valor,) in banco.conexao.execute(
+                'SELECT DISTINCT modalidade_chave FROM operadoras') if chave in valor]
+            condicoes.append(f"modalidade_chave IN ({', '.join('?' * len(valores))})")
+            parametros.extend(valores)
+        return condicoes, parametros
+
+    def buscar(self, termo_busca='', uf='', modalidade='', ordenacao='razao_social', ordem='asc',
+               limite=10, cursor=None):
+        """
+        Busca operadoras com os mesmos filtros e ordenação do backend em memória
+
+        Args:
+            cursor (dict, optional): Cursor decodificado; 'k' é o valor da coluna
+                                     de ordenação e 'p' a linha da última
+                                     operadora entregue
+
+        Returns:
+            tuple: (JSON de cada registro em bytes, linhas dos registros,
+                    valores da coluna de ordenação, versão do banco)
+        """
+        with self.conexao() as banco:
+            coluna = coluna_de_ordenacao(ordenacao)
+            ascendente = ordem.lower() == 'asc'
+            condicoes, parametros = self._condicoes(banco, termo_busca, uf, modalidade)
+
+            coluna_sql = _identificador(coluna)
+            if cursor is not None:
+                comparacao = '>' if ascendente else '<'
+                if cursor.get('b') == 'sqlite' and cursor['v'] == banco.versao:
+                    condicoes.append(f'({coluna_sql} {comparacao} ? OR ({coluna_sql} = ? AND linha {comparacao} ?))')
+                    parametros.extend([cursor['k'], cursor['k'], cursor['p']])
+                else:
+                    condicoes.append(f'{coluna_sql} {comparacao} ?')
+                    parametros.append(cursor['k'])
+
+            direcao = 'ASC' if ascendente else 'DESC'
+            sql = (f'SELECT linha, {coluna_sql}, registro_json FROM operadoras'
+                   + (' WHERE ' + ' AND '.join(condicoes) if condicoes else '')
+                   + f' ORDER BY {coluna_sql} {direcao}, linha {direcao} LIMIT ?')
+            resultado = banco.conexao.execute(sql, [*parametros, max(limite, 0)]).fetchall()
+            linhas = [linha for linha, _, _ in resultado]
+            chaves = [chave for _, chave, _ in resultado]
+            fragmentos = [fragmento for _, _, fragmento in resultado]
+            return fragmentos, linhas, chaves, banco.versao
+
+    def exportar(self, termo_busca='', uf='', modalidade='', ordenacao='razao_social', ordem='asc',
+                 tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+        """
+        Todas as operadoras filtradas, na ordem pedida, lidas do banco em blocos
+
+        A consulta é feita na chamada; as linhas só são lidas à medida que os
+        blocos são consumidos. A conexão volta ao pool quando o gerador
+        termina ou é fechado.
+
+        Returns:
+            tuple: (nomes das colunas, gerador de blocos); cada bloco é uma
+                   lista de tuplas (valores das colunas..., JSON do registro)
+        """
+        banco = self.obter()
+        try:
+            coluna_sql = _identificador(coluna_de_ordenacao(ordenacao))
+            direcao = 'ASC' if ordem.lower() == 'asc' else 'DESC'
+            condicoes, parametros = self._condicoes(banco, termo_busca, uf, modalidade)
+            colunas_sql = ', '.join(_identificador(col) for col in banco.colunas)
+            sql = (f'SELECT {colunas_sql}, registro_json FROM operadoras'
+                   + (' WHERE ' + ' AND '.join(condicoes) if condicoes else '')
+                   + f' ORDER BY {coluna_sql} {direcao}, linha {direcao}')
+            resultado = banco.conexao.execute(sql, parametros)
+        except Exception:
+            self.devolver(banco)
+            raise
+
+        def blocos():
+            try:
+                while True:
+                    linhas = resultado.fetchmany(tamanho_bloco)
+                    if not linhas:
+                        break
+                    yield linhas
+            finally:
+                resultado.close()
+                self.devolver(banco)
+
+        return banco.colunas, blocos()
+
+    def localizar(self, chaves, tipo='auto'):
+        """
+        Resolve várias chaves exatas (Registro ANS ou CNPJ), como localizar_operadoras
+
+        Args:
+            chaves (list): Chaves a procurar (texto com ou sem pontuação, ou inteiros)
+            tipo (str): 'registro_ans', 'cnpj' ou 'auto' (tenta Registro ANS e depois CNPJ)
+
+        Returns:
+            list: Registro (dict) de cada chave, ou None quando não encontrada
+        """
+        with self.conexao() as banco:
+            numeros = [IndiceExato.normalizar_chave(chave) for chave in chaves]
+            linhas = {}
+            for col in COLUNAS_CHAVE_LOTE[tipo]:
+                # Inteiros acima do limite do SQLite não podem corresponder a nenhuma linha
+                pendentes = list({numero for numero in numeros
+                                  if numero is not None and numero < 2 ** 63 and numero not in linhas})
+                coluna_sql = _coluna_chave(col)
+                for inicio in range(0, len(pendentes), CHAVES_POR_CONSULTA):
+                    parte = pendentes[inicio:inicio + CHAVES_POR_CONSULTA]
+                    # Em caso de chave repetida, vale a primeira linha
+                    linhas.update(banco.conexao.execute(
+                        f"SELECT {coluna_sql}, MIN(linha) FROM operadoras WHERE {coluna_sql} IN ({', '.join('?' * len(parte))})"
+                        f' GROUP BY {coluna_sql}', parte))
+
+            encontradas = list(set(linhas.values()))
+            registros = {}
+            for inicio in range(0, len(encontradas), CHAVES_POR_CONSULTA):
+                parte = encontradas[inicio:inicio + CHAVES_POR_CONSULTA]
+                registros.update((linha, json.loads(fragmento)) for linha, fragmento in banco.conexao.execute(
+                    f"SELECT linha, registro_json FROM operadoras WHERE linha IN ({', '.join('?' * len(parte))})", parte))
+            return [registros[linhas[numero]] if numero in linhas else None for numero in numeros]
+
+    def sugerir(self, prefixo, limite=8):
+        """
+        Sugestões de autocompletar, no mesmo formato e ordem de sugerir_operadoras
+
+        Args:
+            prefixo (str): Início da Razão Social, Nome Fantasia ou Registro ANS
+            limite (int): Número máximo de sugestões (até MAX_SUGESTOES)
+
+        Returns:
+            list: Dicionários com o texto sugerido, o campo de origem e a
+                  identificação da operadora
+        """
+        prefixo = dobrar_texto(prefixo).strip()
+        limite = min(limite, MAX_SUGESTOES)
+        if not prefixo or limite <= 0:
+            return []
+
+        with self.conexao() as banco:
+            # Cada linha aparece no máximo uma vez por coluna, então as primeiras
+            # limite * colunas chaves bastam para achar limite linhas distintas
+            encontrados = banco.conexao.execute(
+                'SELECT coluna, linha FROM prefixos WHERE texto >= ? AND texto < ? '
+                'ORDER BY texto, coluna, linha LIMIT ?',
+                [prefixo, prefixo + '\U0010ffff', limite * len(COLUNAS_AUTOCOMPLETAR)])
+            sugestoes, vistas = [], set()
+            for coluna, linha in encontrados:
+                if linha not in vistas:
+                    vistas.add(linha)
+                    sugestoes.append((coluna, linha))
+                    if len(sugestoes) == limite:
+                        break
+            if not sugestoes:
+                return []
+
+            colunas = ('Registro_ANS', 'Razao_Social', *COLUNAS_AUTOCOMPLETAR)
+            valores = {
+                linha: dict(zip(colunas, resto))
+                for linha, *resto in banco.conexao.execute(
+                    f"SELECT linha, {', '.join(_identificador(col) for col in colunas)} FROM operadoras "
+                    f"WHERE linha IN ({', '.join('?' * len(vistas))})", list(vistas))
+            }
+            return [
+                {
+                    'sugestao': valores[linha][coluna],
+                    'campo': coluna,
+                    'Registro_ANS': valores[linha]['Registro_ANS'],
+                    'Razao_Social': valores[linha]['Razao_Social'],
+                }
+                for coluna, linha in sugestoes
+            ]
+
+    def contar_facetas(self, termo_busca='', uf='', modalidade=''):
+        """
+        Quantidade de resultados por UF e por Modalidade (cada faceta sem o próprio filtro)
+
+        Returns:
+            dict: {'UF': {valor: quantidade}, 'Modalidade': {valor: quantidade}}
+        """
+        with self.conexao() as banco:
+            facetas = {}
+            for coluna, filtros in (('UF', (termo_busca, '', modalidade)), ('Modalidade', (termo_busca, uf, ''))):
+                condicoes, parametros = self._condicoes(banco, *filtros)
+                sql = (f'SELECT {_identificador(coluna)}, COUNT(*) FROM operadoras'
+                       + (' WHERE ' + ' AND '.join(condicoes) if condicoes else '')
+                       + f' GROUP BY {_identificador(coluna)}')
+                facetas[coluna] = {
+                    valor: total for valor, total in sorted(banco.conexao.execute(sql, parametros))
+                    if valor and valor.strip()
+                }
+            return facetas
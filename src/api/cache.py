@@ -0,0 +1,211 @@
+"""
+Cache em memória das respostas da busca de operadoras.
+"""
+
+import threading
+from collections import OrderedDict
+
+from src.api.indices import dobrar_texto
+from src.api.filtros import coluna_de_ordenacao
+
+
+def chave_da_busca(termo_busca, limite, uf, modalidade, ordenacao, ordem, cursor='', modo='', facetas=False):
+    """
+    Normaliza os parâmetros de uma busca para uso como chave de cache
+
+    Parâmetros equivalentes (caixa, acentos, ordenação desconhecida) geram a
+    mesma chave. Espaços nas pontas devem ser removidos antes, pela rota, já
+    que a busca os considera.
+
+    Returns:
+        tuple: Chave da busca
+    """
+    return (
+        dobrar_texto(termo_busca),
+        dobrar_texto(uf),
+        dobrar_texto(modalidade),
+        coluna_de_ordenacao(ordenacao),
+        'asc' if ordem.lower() == 'asc' else 'desc',
+        limite,
+        cursor,
+        modo,
+        facetas,
+    )
+
+
+class CacheResultados:
+    """
+    Cache LRU com orçamento de memória e invalidação por versão do dataset
+
+    Cada entrada guarda um valor e o tamanho dele em bytes. Quando o total
+    passa do orçamento, as entradas usadas há mais tempo são descartadas.
+    Todas as entradas são descartadas quando uma consulta chega com outra
+    versão do dataset. Valores calculados com uma versão que não é mais a
+    atual (ex.: requisição iniciada antes da troca) não são guardados.
+    """
+
+    def __init__(self, limite_bytes=32 * 1024 * 1024):
+        """
+        Args:
+            limite_bytes (int): Memória máxima ocupada pelos valores em cache
+        """
+        self.limite_bytes = limite_bytes
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self._versao = None
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _verificar_versao(self, versao):
+        """Esvazia o cache se a versão do dataset mudou (chamar com o lock)"""
+        if versao != self._versao:
+            self._itens.clear()
+            self.bytes_usados = 0
+            self._versao = versao
+
+    def obter(self, versao, chave):
+        """
+        Busca um valor no cache
+
+        Args:
+            versao (str): Versão atual do dataset
+            chave (tuple): Chave gerada por chave_da_busca
+
+        Returns:
+            object: Valor guardado, ou None se não estiver em cache
+        """
+        with self._lock:
+            self._verificar_versao(versao)
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[0]
+
+    def guardar(self, versao, chave, valor, tamanho):
+        """
+        Guarda um valor no cache, descartando os menos usados se preciso
+
+        Args:
+            versao (str): Versão do dataset usada para calcular o valor
+            chave (tuple): Chave gerada por chave_da_busca
+            valor (object): Valor a guardar
+            tamanho (int): Tamanho aproximado do valor em bytes
+        """
+        if tamanho > self.limite_bytes:
+            return
+
+        with self._lock:
+            # Só obter() com a versão em uso troca a versão do cache; um valor
+            # de outra versão é descartado sem apagar as entradas atuais
+            if self._versao is None:
+                self._versao = versao
+            elif versao != self._versao:
+                return
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.bytes_usados -= anterior[1]
+
+            self._itens[chave] = (valor, tamanho)
+            self.bytes_usados += tamanho
+            while self.bytes_usados > self.limite_bytes:
+                _, (_, tamanho_removido) = self._itens.popitem(last=False)
+                self.bytes_usados -= tamanho_removido
+                self.remocoes += 1
+
+    def limpar(self):
+        """Remove todas as entradas e zera os contadores"""
+        with self._lock:
+            self._itens.clear()
+            self.bytes_usados = 0
+            self.acertos = 0
+            self.falhas = 0
+            self.remocoes = 0
+            self._versao = None
+
+    def estatisticas(self):
+        """
+        Retorna os contadores do cache
+
+        Returns:
+            dict: Acertos, falhas, remoções, entradas e uso de memória
+        """
+        with self._lock:
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'entradas': len(self._itens),
+                'bytes_usados': self.bytes_usados,
+                'limite_bytes': self.limite_bytes,
+            }
+
+
+class _BuscaEmAndamento:
+    """Resultado (ou erro) de uma busca, aguardado pelas requisições repetidas"""
+
+    __slots__ = ('pronta', 'resultado', 'erro')
+
+    def __init__(self):
+        self.pronta = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class BuscasEmAndamento:
+    """
+    Agrupa buscas idênticas feitas ao mesmo tempo ("single flight")
+
+    A primeira requisição de uma chave executa a busca; as que chegam com a
+    mesma chave enquanto ela está em andamento esperam e recebem o mesmo
+    resultado. Assim o trabalho fica limitado ao número de buscas distintas,
+    e não ao de requisições. O agrupamento vale dentro de cada processo.
+    """
+
+    def __init__(self):
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+
+    def executar(self, chave, funcao):
+        """
+        Executa a busca, ou espera a execução idêntica já em andamento
+
+        Args:
+            chave (tuple): Identifica a busca (versão do dataset e chave_da_busca)
+            funcao (callable): Busca a executar, sem argumentos
+
+        Returns:
+            tuple: (resultado, compartilhado), onde compartilhado indica que o
+                   resultado veio de outra requisição
+        """
+        with self._lock:
+            busca = self._em_andamento.get(chave)
+            lider = busca is None
+            if lider:
+                busca = self._em_andamento[chave] = _BuscaEmAndamento()
+
+        if not lider:
+            busca.pronta.wait()
+            if busca.erro is not None:
+                raise busca.erro
+            return busca.resultado, True
+
+        try:
+            busca.resultado = funcao()
+        except Exception as e:
+            busca.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+            busca.pronta.set()
+        return busca.resultado, False
+
+    def quantidade(self):
+        """Número de buscas distintas em andamento"""
+        with self._lock:
+            return len(self._em_andamento)
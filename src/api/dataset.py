@@ -0,0 +1,273 @@
+"""
+Carregamento do cadastro de operadoras mantido em memória.
+
+O CSV é lido e normalizado uma única vez por processo e só é recarregado
+quando o arquivo em disco muda (data de modificação ou tamanho), de
+preferência por um monitor em segundo plano.
+"""
+
+import os
+import threading
+import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from src.api.filtros import normalizar_colunas, extrair_opcoes_unicas, COLUNAS_ORDENACAO
+from src.api.indices import (
+    IndiceTrigramas,
+    IndiceSimilaridade,
+    OrdenacoesPrecomputadas,
+    IndiceCategorico,
+    IndiceExato,
+    IndicePrefixos,
+    chaves_inteiras,
+    contagem_cruzada
+)
+from src.api.serializacao import FragmentosJSON
+from src.api.monitor import MonitorArquivo
+
+# Colunas filtradas por valor, indexadas com códigos categóricos e bitmaps
+COLUNAS_CATEGORICAS = ('UF', 'Modalidade')
+
+# Identificadores guardados também como inteiros
+COLUNAS_CHAVE = ('Registro_ANS', 'CNPJ')
+
+# Colunas sugeridas pelo autocompletar (busca por prefixo)
+COLUNAS_AUTOCOMPLETAR = ('Razao_Social', 'Nome_Fantasia', 'Registro_ANS')
+
+
+def compactar_colunas(df, proporcao_maxima=0.5):
+    """
+    Converte colunas de texto repetitivas em categóricas para economizar memória
+
+    Cada valor distinto passa a ser guardado uma única vez, e as linhas
+    guardam apenas um código inteiro.
+
+    Args:
+        df (DataFrame): DataFrame normalizado
+        proporcao_maxima (float): Razão máxima entre valores distintos e linhas
+                                  para a coluna ser convertida
+
+    Returns:
+        DataFrame: Novo DataFrame com as colunas compactadas
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col in COLUNAS_CATEGORICAS or df[col].nunique() <= len(df) * proporcao_maxima:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def versao_da_assinatura(assinatura):
+    """
+    Converte a assinatura do arquivo em um identificador de versão
+
+    Args:
+        assinatura (tuple): (mtime_ns, tamanho) do arquivo
+
+    Returns:
+        str: Versão em texto (usada em ETags e chaves de cache)
+    """
+    return f"{assinatura[0]:x}-{assinatura[1]:x}"
+
+
+class SnapshotOperadoras:
+    """
+    Versão carregada do cadastro de operadoras
+
+    Um snapshot nunca é alterado depois de criado: quando o arquivo muda,
+    um novo snapshot é construído e substitui o anterior.
+
+    Attributes:
+        df (DataFrame): Dados normalizados das operadoras
+        assinatura (tuple): (mtime_ns, tamanho) do arquivo de origem
+        versao (str): Identificador textual da versão dos dados
+        modificado_em (datetime): Data de modificação do arquivo de origem (UTC)
+        opcoes_filtro (dict): UFs e modalidades disponíveis para os filtros
+        categorias (dict): IndiceCategorico de cada coluna em COLUNAS_CATEGORICAS
+        contagens_categorias (ndarray): Operadoras por par (UF, Modalidade)
+        chaves (dict): Vetor int64 de cada coluna em COLUNAS_CHAVE
+        indices_exatos (dict): IndiceExato de cada coluna em COLUNAS_CHAVE
+        indice_texto (IndiceTrigramas): Índice da busca textual
+        indice_similaridade (IndiceSimilaridade): Índice da busca aproximada por nome
+        indice_prefixos (IndicePrefixos): Chaves ordenadas do autocompletar
+        ordenacoes (OrdenacoesPrecomputadas): Ordens de cada coluna ordenável
+        fragmentos (FragmentosJSON): JSON de cada linha, pronto para as respostas
+    """
+
+    def __init__(self, df, assinatura):
+        self.df = compactar_colunas(df)
+        self.assinatura = assinatura
+        self.versao = versao_da_assinatura(assinatura)
+        self.modificado_em = datetime.datetime.fromtimestamp(assinatura[0] / 1e9, tz=datetime.timezone.utc)
+        self.opcoes_filtro = extrair_opcoes_unicas(self.df)
+        self.categorias = {col: IndiceCategorico(self.df[col]) for col in COLUNAS_CATEGORICAS}
+        self.contagens_categorias = contagem_cruzada(self.categorias['UF'], self.categorias['Modalidade'])
+        self.chaves = {col: chaves_inteiras(self.df[col]) for col in COLUNAS_CHAVE}
+        self.indices_exatos = {col: IndiceExato(self.chaves[col]) for col in COLUNAS_CHAVE}
+        self.indice_texto = IndiceTrigramas(self.df)
+        self.indice_similaridade = IndiceSimilaridade([
+            self.indice_texto.textos_coluna('Razao_Social'),
+            self.indice_texto.textos_coluna('Nome_Fantasia'),
+        ])
+        self.indice_prefixos = IndicePrefixos({
+            col: self.indice_texto.textos_coluna(col) for col in COLUNAS_AUTOCOMPLETAR
+        })
+        self.ordenacoes = OrdenacoesPrecomputadas(self.df, COLUNAS_ORDENACAO.values())
+        self.fragmentos = FragmentosJSON(self.df)
+
+
+class DatasetOperadoras:
+    """
+    Mantém o cadastro de operadoras carregado em memória para todo o processo
+
+    Sem monitoramento, cada obter() confere o arquivo e recarrega na hora se
+    ele mudou. Com iniciar_monitoramento(), uma thread em segundo plano faz a
+    recarga e troca o snapshot de uma vez (uma atribuição de referência): as
+    requisições nunca esperam por uma recarga, e as que estão em andamento
+    terminam no snapshot antigo.
+
+    Com recarga_externa=True o snapshot também nunca é recarregado no caminho
+    da requisição: quem troca a versão é outro processo (ex.: o processo
+    principal do gunicorn, que recria os workers a partir dela).
+    """
+
+    def __init__(self, caminho_csv):
+        self.caminho_csv = Path(caminho_csv)
+        self.recarga_externa = False
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._assinatura_observada = None
+
+    def assinatura_arquivo(self):
+        """
+        Obtém a assinatura atual do arquivo CSV
+
+        Returns:
+            tuple: (mtime_ns, tamanho) do arquivo
+        """
+        info = os.stat(self.caminho_csv)
+        return (info.st_mtime_ns, info.st_size)
+
+    def versao_arquivo(self):
+        """
+        Obtém a versão do arquivo em disco sem carregá-lo
+
+        Returns:
+            str: Versão que o snapshot terá ao ser carregado deste arquivo
+        """
+        return versao_da_assinatura(self.assinatura_arquivo())
+
+    def versao_em_uso(self):
+        """
+        Versão dos dados que as requisições estão usando
+
+        Com o monitoramento ativo é a do snapshot carregado (o arquivo em
+        disco pode estar mais novo enquanto a recarga não termina).
+
+        Returns:
+            str: Versão dos dados
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and self.monitorando():
+            return snapshot.versao
+        return self.versao_arquivo()
+
+    def _carregar(self, assinatura):
+        """Lê, normaliza e indexa o CSV, montando um snapshot novo"""
+        df = pd.read_csv(self.caminho_csv, sep=';', encoding='utf-8')
+        return SnapshotOperadoras(normalizar_colunas(df), assinatura)
+
+    def obter(self):
+        """
+        Retorna o snapshot atual
+
+        Com o monitoramento ativo, retorna o snapshot carregado sem consultar
+        o arquivo; sem ele, recarrega o CSV se o arquivo mudou. Só a primeira
+        carga do processo é feita no caminho da requisição.
+
+        Returns:
+            SnapshotOperadoras: Dados carregados em memória
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and self.monitorando():
+            return snapshot
+
+        assinatura = self.assinatura_arquivo()
+        if snapshot is not None and snapshot.assinatura == assinatura:
+            return snapshot
+
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos o lock
+            if self._snapshot is not None and (self.monitorando() or self._snapshot.assinatura == assinatura):
+                return self._snapshot
+
+            self._snapshot = self._carregar(assinatura)
+            return self._snapshot
+
+    def recarregar_se_mudou(self):
+        """
+        Recarrega o CSV em segundo plano se ele mudou (chamado pelo monitor)
+
+        A mudança só é aplicada quando a assinatura se repete em duas
+        verificações seguidas, para não ler um arquivo que ainda está sendo
+        gravado. O snapshot novo é montado por completo antes da troca.
+
+        Returns:
+            bool: True se um novo snapshot passou a ser usado
+        """
+        if not self.caminho_csv.exists():
+            return False
+        atual = self._snapshot
+        if atual is None:
+            # Nada carregado ainda: a primeira requisição que usar os dados carrega
+            return False
+        assinatura = self.assinatura_arquivo()
+        if atual.assinatura == assinatura:
+            self._assinatura_observada = None
+            return False
+        if assinatura != self._assinatura_observada:
+            self._assinatura_observada = assinatura
+            return False
+
+        novo = self._carregar(assinatura)
+        with self._lock:
+            self._snapshot = novo
+        self._assinatura_observada = None
+        print(f"Dataset recarregado em segundo plano: {len(novo.df)} operadoras (versão {novo.versao})")
+        return True
+
+    def iniciar_monitoramento(self, intervalo=5.0):
+        """
+        Passa a recarregar o CSV em uma thread em segundo plano
+
+        Args:
+            intervalo (float): Segundos entre verificações do arquivo
+
+        Returns:
+            MonitorArquivo: Monitor iniciado (ou o que já estava ativo)
+        """
+        if not self.monitorando():
+            self._monitor = MonitorArquivo(self.recarregar_se_mudou, intervalo, 'monitor-dataset').iniciar()
+        return self._monitor
+
+    def parar_monitoramento(self):
+        """Volta a conferir o arquivo a cada obter()"""
+        if self._monitor is not None:
+            self._monitor.parar()
+            self._monitor = None
+
+    def monitorando(self):
+        """Indica se a recarga está a cargo do monitor em segundo plano (ou de outro processo)"""
+        return self.recarga_externa or (self._monitor is not None and self._monitor.ativo())
+
+    def atual(self):
+        """
+        Retorna o snapshot já carregado, sem consultar o arquivo
+
+        Returns:
+            SnapshotOperadoras: Snapshot atual, ou None se nada foi carregado
+        """
+        return self._snapshot
@@ -0,0 +1,167 @@
+"""
+Arquivos estáticos da interface servidos a partir da memória.
+
+Na inicialização cada arquivo do diretório static é lido, recebe um hash
+do conteúdo (usado como ETag e como versão na URL) e, se for texto, uma
+cópia comprimida com gzip. As páginas HTML passam a referenciar os demais
+arquivos com '?v=<hash>', o que permite cache longo no navegador: quando o
+arquivo muda, a URL muda junto.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+
+from flask import Response, request
+
+# Extensões comprimidas com gzip
+EXTENSOES_TEXTO = {'.html', '.js', '.css', '.json', '.svg', '.txt', '.map'}
+
+# Abaixo deste tamanho o gzip não compensa
+TAMANHO_MINIMO_GZIP = 512
+
+CACHE_VERSIONADO = 'public, max-age=31536000, immutable'
+
+
+def aceita_gzip():
+    """Indica se o cliente da requisição atual aceita respostas gzip"""
+    return request.accept_encodings['gzip'] > 0
+
+
+def comprimir_gzip(conteudo, nivel=6):
+    """
+    Comprime um conteúdo com gzip
+
+    Args:
+        conteudo (bytes): Conteúdo original
+        nivel (int): Nível de compressão (1 a 9)
+
+    Returns:
+        bytes: Conteúdo comprimido
+    """
+    return gzip.compress(conteudo, compresslevel=nivel, mtime=0)
+
+
+class ArquivoEstatico:
+    """Conteúdo de um arquivo estático já preparado para envio"""
+
+    def __init__(self, conteudo, mimetype, mtime, comprimir=True):
+        self.conteudo = conteudo
+        self.mimetype = mimetype
+        self.mtime = mtime
+        self.hash = hashlib.sha256(conteudo).hexdigest()[:16]
+        self.conteudo_gzip = None
+        if comprimir and len(conteudo) >= TAMANHO_MINIMO_GZIP:
+            comprimido = comprimir_gzip(conteudo, nivel=9)
+            if len(comprimido) < len(conteudo):
+                self.conteudo_gzip = comprimido
+
+
+class ArquivosEstaticos:
+    """
+    Catálogo em memória dos arquivos estáticos da interface
+    """
+
+    def __init__(self, diretorio, verificar_alteracoes=False):
+        """
+        Args:
+            diretorio (str ou Path): Diretório dos arquivos estáticos
+            verificar_alteracoes (bool): Se True, recarrega o catálogo quando algum
+                                         arquivo muda (útil em desenvolvimento)
+        """
+        self.diretorio = Path(diretorio).resolve()
+        self.verificar_alteracoes = verificar_alteracoes
+        self.arquivos = {}
+        self.carregar()
+
+    def carregar(self):
+        """Lê, versiona e comprime todos os arquivos do diretório"""
+        arquivos = {}
+        if self.diretorio.is_dir():
+            for caminho in sorted(self.diretorio.rglob('*')):
+                if caminho.is_file():
+                    relativo = caminho.relative_to(self.diretorio).as_posix()
+                    arquivos[relativo] = (caminho.read_bytes(), caminho.stat().st_mtime_ns)
+
+        # Os demais arquivos primeiro: as páginas HTML precisam dos hashes deles
+        preparados = {}
+        for relativo, (conteudo, mtime) in arquivos.items():
+            if not relativo.endswith('.html'):
+                preparados[relativo] = self._preparar(relativo, conteudo, mtime)
+        for relativo, (conteudo, mtime) in arquivos.items():
+            if relativo.endswith('.html'):
+                conteudo = self._versionar_referencias(conteudo, preparados)
+                preparados[relativo] = self._preparar(relativo, conteudo, mtime)
+        self.arquivos = preparados
+
+    @staticmethod
+    def _preparar(relativo, conteudo, mtime):
+        mimetype = mimetypes.guess_type(relativo)[0] or 'application/octet-stream'
+        # Imagens e fontes já vêm comprimidas: nem tentar o gzip
+        return ArquivoEstatico(conteudo, mimetype, mtime,
+                               comprimir=os.path.splitext(relativo)[1] in EXTENSOES_TEXTO)
+
+    @staticmethod
+    def _versionar_referencias(conteudo, arquivos):
+        """Acrescenta '?v=<hash>' às referências '/caminho' para arquivos conhecidos"""
+        texto = conteudo.decode('utf-8')
+        for relativo, arquivo in arquivos.items():
+            for aspas in ('"', "'"):
+                texto = texto.replace(f'{aspas}/{relativo}{aspas}', f'{aspas}/{relativo}?v={arquivo.hash}{aspas}')
+        return texto.encode('utf-8')
+
+    def _alterado(self):
+        """Verifica se algum arquivo do catálogo mudou em disco"""
+        for relativo, arquivo in self.arquivos.items():
+            try:
+                if (self.diretorio / relativo).stat().st_mtime_ns != arquivo.mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def obter(self, relativo):
+        """
+        Obtém um arquivo do catálogo
+
+        Args:
+            relativo (str): Caminho relativo ao diretório static (ex.: 'js/app.js')
+
+        Returns:
+            ArquivoEstatico: Arquivo preparado, ou None se não estiver no catálogo
+        """
+        if self.verificar_alteracoes and self._alterado():
+            self.carregar()
+        return self.arquivos.get(relativo)
+
+    def responder(self, arquivo):
+        """
+        Monta a resposta para um arquivo do catálogo
+
+        Usa a versão gzip quando o cliente aceita, responde 304 quando o
+        ETag confere e aplica cache longo se a URL trouxer a versão atual.
+
+        Args:
+            arquivo (ArquivoEstatico): Arquivo a enviar
+
+        Returns:
+            Response: Resposta HTTP
+        """
+        usar_gzip = arquivo.conteudo_gzip is not None and aceita_gzip()
+        response = Response(arquivo.conteudo_gzip if usar_gzip else arquivo.conteudo,
+                            mimetype=arquivo.mimetype)
+        if usar_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(f'{arquivo.hash}-gzip')
+        else:
+            response.set_etag(arquivo.hash)
+        if arquivo.conteudo_gzip is not None:
+            response.vary.add('Accept-Encoding')
+
+        if request.args.get('v') == arquivo.hash:
+            response.headers['Cache-Control'] = CACHE_VERSIONADO
+        else:
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
@@ -0,0 +1,88 @@
+"""
+Exportação em streaming das operadoras filtradas (NDJSON e CSV).
+
+Os geradores convertem as linhas em blocos, de modo que a memória usada não
+cresce com o tamanho do resultado e o primeiro bloco pode ser enviado assim
+que fica pronto.
+"""
+
+import io
+import csv
+
+# Quantidade de linhas convertidas por bloco enviado ao cliente
+TAMANHO_BLOCO = 1000
+
+FORMATOS_EXPORTACAO = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def gerar_ndjson(fragmentos, posicoes, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera as linhas selecionadas em NDJSON (um objeto JSON por linha)
+
+    Cada linha reaproveita o JSON já serializado do snapshot, o mesmo das
+    respostas de busca, em vez de convertê-la de novo.
+
+    Args:
+        fragmentos (FragmentosJSON): JSON das linhas do snapshot
+        posicoes (ndarray): Posições (iloc) das linhas a exportar, na ordem desejada
+        tamanho_bloco (int): Linhas por bloco gerado
+
+    Yields:
+        bytes: Bloco de linhas NDJSON
+    """
+    for inicio in range(0, len(posicoes), tamanho_bloco):
+        yield b''.join(fragmento + b'\n' for fragmento in fragmentos.obter(posicoes[inicio:inicio + tamanho_bloco]))
+
+
+def gerar_csv(df, posicoes, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera as linhas selecionadas em CSV separado por ';' (mesmo formato do arquivo da ANS)
+
+    Args:
+        df (DataFrame): Dados das operadoras
+        posicoes (ndarray): Posições (iloc) das linhas a exportar, na ordem desejada
+        tamanho_bloco (int): Linhas por bloco gerado
+
+    Yields:
+        bytes: Bloco de linhas CSV (o primeiro inclui o cabeçalho)
+    """
+    yield (';'.join(df.columns) + '\n').encode('utf-8')
+    for inicio in range(0, len(posicoes), tamanho_bloco):
+        buffer = io.StringIO()
+        df.iloc[posicoes[inicio:inicio + tamanho_bloco]].to_csv(buffer, sep=';', index=False, header=False)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def gerar_ndjson_banco(blocos):
+    """
+    Gera NDJSON a partir da exportação do banco SQLite (BancoOperadoras.exportar)
+
+    Args:
+        blocos (iterable): Listas de linhas (valores das colunas..., JSON do registro)
+
+    Yields:
+        bytes: Bloco de linhas NDJSON
+    """
+    for linhas in blocos:
+        yield b''.join(linha[-1] + b'\n' for linha in linhas)
+
+
+def gerar_csv_banco(colunas, blocos):
+    """
+    Gera CSV separado por ';' a partir da exportação do banco SQLite
+
+    Args:
+        colunas (list): Nomes das colunas
+        blocos (iterable): Listas de linhas (valores das colunas..., JSON do registro)
+
+    Yields:
+        bytes: Bloco de linhas CSV (o primeiro inclui o cabeçalho)
+    """
+    yield (';'.join(colunas) + '\n').encode('utf-8')
+    for linhas in blocos:
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=';', lineterminator='\n').writerows(linha[:-1] for linha in linhas)
+        yield buffer.getvalue().encode('utf-8')
@@ -4,8 +4,48 @@ Funçoes para filtragem avançada de operadoras
 
 import pandas as pd
 import numpy as np
+from src.api.paginacao import posicao_do_cursor
+from src.api.metricas import metricas
+from src.api.indices import contagem_cruzada
 
-def  aplicar_filtros(df, termo_busca='',uf='',modalidade='',ordenacao='razao_social', ordem ='asc'):
+#mapear parametro de ordenaçao para o nome da coluna
+COLUNAS_ORDENACAO = {
+    'razao_social': 'Razao_Social',
+    'nome_fantasia': 'Nome_Fantasia',
+    'registro_ans': 'Registro_ANS',
+    'uf': 'UF'
+}
+
+def coluna_de_ordenacao(ordenacao):
+    """
+    Obtém a coluna correspondente ao parâmetro de ordenação
+
+    Args:
+        ordenacao (str): Parâmetro recebido (ex.: 'razao_social')
+
+    Returns:
+        str: Nome da coluna (Razao_Social quando o parâmetro é desconhecido)
+    """
+    return COLUNAS_ORDENACAO.get(ordenacao.lower(), 'Razao_Social')
+
+def normalizar_colunas(df):
+    """
+    Normaliza as colunas do DataFrame para texto
+
+    Args:
+        df (DataFrame): DataFrame com dados das operadoras
+
+    Returns:
+        DataFrame: O próprio DataFrame, com colunas numéricas convertidas
+                   para string e valores ausentes substituídos por ''
+    """
+    for col in df.columns:
+        if df[col].dtype == np.float64 or df[col].dtype == np.int64:
+            df[col]=df[col].astype(str)
+        df[col] = df[col].fillna('')
+    return df
+
+def aplicar_filtros(df, termo_busca='',uf='',modalidade='',ordenacao='razao_social', ordem ='asc'):
     """
     Aplicaçao de filtros avançados
 
@@ -21,10 +61,7 @@ def  aplicar_filtros(df, termo_busca='',uf='',modalidade='',ordenacao='razao_soc
         DataFrame: DataFrame filtrado e ordenado
     """
     #normalizar colinas para string
-    for col in df.columns:
-        if df[col].dtype == np.float64 or df[col].dtype == np.int64:
-            df[col]=df[col].astype(str)
-        df[col] = df[col].fillna('')
+    df = normalizar_colunas(df)
 
     #aplicar filtro de texto se houver ter,p de busca
     if termo_busca:
@@ -44,13 +81,7 @@ def  aplicar_filtros(df, termo_busca='',uf='',modalidade='',ordenacao='razao_soc
         df = df[df['Modalidade'].str.contains(modalidade, case=False, na=False)]
 
     #mapear coluna de ordenaçao (normalizar nomes de colunas)
-    mapeamento_colunas = {
-        'razao_social': 'Razao_Social',
-        'nome_fantasia': 'Nome_Fantasia',
-        'registro_ans': 'Registro_ANS',
-        'uf': 'UF'
-    }
-    coluna_ordenacao = mapeamento_colunas.get(ordenacao.lower(), 'Razao_Social')
+    coluna_ordenacao = coluna_de_ordenacao(ordenacao)
     
     #aplicar ordenaçao
     asceding= ordem.lower() =='asc'
@@ -58,6 +89,216 @@ def  aplicar_filtros(df, termo_busca='',uf='',modalidade='',ordenacao='razao_soc
 
     return df
 
+def mascara_categorias(snapshot, uf='', modalidade=''):
+    """
+    Calcula as linhas aceitas pelos filtros de UF e modalidade
+
+    Args:
+        snapshot (SnapshotOperadoras): Dataset carregado com seus índices
+        uf (str): UF para filtrar
+        modalidade (str): Modalidade para filtrar
+
+    Returns:
+        ndarray: Vetor booleano por linha, ou None se não houver filtro
+    """
+    #filtros de UF e modalidade: AND dos bitmaps pré-calculados
+    bitmap = None
+    if uf:
+        bitmap = snapshot.categorias['UF'].bitmap_igual(uf)
+    if modalidade:
+        bitmap_modalidade = snapshot.categorias['Modalidade'].bitmap_contendo(modalidade)
+        bitmap = bitmap_modalidade if bitmap is None else bitmap & bitmap_modalidade
+    return None if bitmap is None else snapshot.categorias['UF'].para_mascara(bitmap)
+
+def filtrar_texto(snapshot, termo_busca):
+    """
+    Linhas que contêm o termo de busca, pelo índice de trigramas
+
+    Returns:
+        ndarray: Posições das linhas em ordem crescente, ou None se não houver termo
+    """
+    if not termo_busca:
+        return None
+    with metricas.cronometrar('operadoras_etapa_segundos', etapa='filtro_texto'):
+        return snapshot.indice_texto.buscar(termo_busca)
+
+def selecionar_operadoras(snapshot, termo_busca='', uf='', modalidade='', ordenacao='razao_social',
+                          ordem='asc', limite=10, cursor=None, linhas_texto=None):
+    """
+    Seleciona as primeiras operadoras filtradas usando os índices do dataset em memória
+
+    Equivale a aplicar_filtros(...).head(limite), mas sem ordenar o resultado
+    inteiro: a ordem vem das permutações pré-calculadas do snapshot.
+
+    Args:
+        snapshot (SnapshotOperadoras): Dataset carregado com seus índices
+        termo_busca (str): Termo a ser buscado nos dados
+        uf (str): UF para filtrar
+        modalidade (str): Modalidade para filtrar
+        ordenacao (str): Campo para ordenar
+        ordem (str): Direção da ordenação ('asc' ou 'desc')
+        limite (int): Quantidade máxima de resultados
+        cursor (dict, optional): Cursor decodificado da página anterior
+        linhas_texto (ndarray, optional): Resultado já calculado de
+                                          filtrar_texto para este termo
+
+    Returns:
+        ndarray: Posições (iloc) das linhas selecionadas, na ordem pedida
+    """
+    linhas = linhas_texto
+    if linhas is None:
+        linhas = filtrar_texto(snapshot, termo_busca)
+
+    with metricas.cronometrar('operadoras_etapa_segundos', etapa='filtro_categorias'):
+        mascara = mascara_categorias(snapshot, uf, modalidade)
+
+    coluna_ordenacao = coluna_de_ordenacao(ordenacao)
+    ascendente = ordem.lower() == 'asc'
+    apos = None
+    if cursor is not None:
+        apos = posicao_do_cursor(snapshot, cursor, coluna_ordenacao, ascendente)
+    with metricas.cronometrar('operadoras_etapa_segundos', etapa='ordenacao'):
+        return snapshot.ordenacoes.primeiros(coluna_ordenacao, ascendente, limite, linhas, mascara, apos)
+
+def selecionar_operadoras_similares(snapshot, termo_busca, uf='', modalidade='', limite=10, candidatas=False):
+    """
+    Busca aproximada por nome (Razão Social e Nome Fantasia), tolerante a erros de digitação
+
+    Os resultados vêm ordenados pela similaridade com o termo, não pela
+    ordenação escolhida na interface.
+
+    Args:
+        snapshot (SnapshotOperadoras): Dataset carregado com seus índices
+        termo_busca (str): Nome aproximado da operadora
+        uf (str): UF para filtrar
+        modalidade (str): Modalidade para filtrar
+        limite (int): Quantidade máxima de resultados
+        candidatas (bool): Se True, devolve também todas as linhas parecidas
+                           com o termo, sem os filtros (ver
+                           IndiceSimilaridade.buscar_com_candidatas)
+
+    Returns:
+        tuple: (posições das linhas, similaridades de 0 a 1); com candidatas=True,
+               também (linhas candidatas, True se estão completas)
+    """
+    mascara = mascara_categorias(snapshot, uf, modalidade)
+    with metricas.cronometrar('operadoras_etapa_segundos', etapa='filtro_aproximado'):
+        if candidatas:
+            return snapshot.indice_similaridade.buscar_com_candidatas(termo_busca, limite, mascara=mascara)
+        return snapshot.indice_similaridade.buscar(termo_busca, limite, mascara=mascara)
+
+def _contagens_por_valor(indice, contagens):
+    """Associa cada contagem ao valor da categoria, omitindo zeros e valores vazios"""
+    return {
+        categoria: int(total)
+        for categoria, total in zip(indice.categorias, contagens.tolist())
+        if total and categoria.strip()
+    }
+
+def contar_facetas(snapshot, linhas=None, uf='', modalidade=''):
+    """
+    Quantidade de resultados por UF e por Modalidade para a busca atual
+
+    Cada faceta é contada com todos os filtros menos o dela própria: com
+    uf=SP, a faceta UF mostra quantos resultados cada UF teria (a busca de
+    texto e a modalidade continuam valendo). Uma única passada pelos códigos
+    categóricos das linhas encontradas monta a tabela UF x Modalidade; sem
+    busca de texto, a tabela pré-calculada do snapshot é usada. As duas
+    facetas saem de somas nessa tabela.
+
+    Args:
+        snapshot (SnapshotOperadoras): Dataset carregado com seus índices
+        linhas (ndarray, optional): Linhas do filtro de texto (None = todas)
+        uf (str): UF filtrada
+        modalidade (str): Modalidade filtrada
+
+    Returns:
+        dict: {'UF': {valor: quantidade}, 'Modalidade': {valor: quantidade}}
+    """
+    indice_uf = snapshot.categorias['UF']
+    indice_modalidade = snapshot.categorias['Modalidade']
+    with metricas.cronometrar('operadoras_etapa_segundos', etapa='facetas'):
+        if linhas is None:
+            tabela = snapshot.contagens_categorias
+        else:
+            tabela = contagem_cruzada(indice_uf, indice_modalidade, linhas)
+
+        if uf:
+            tabela_uf = tabela[indice_uf.codigos_iguais(uf)]
+        else:
+            tabela_uf = tabela
+        if modalidade:
+            tabela_modalidade = tabela[:, indice_modalidade.codigos_contendo(modalidade)]
+        else:
+            tabela_modalidade = tabela
+
+        return {
+            'UF': _contagens_por_valor(indice_uf, tabela_modalidade.sum(axis=1)),
+            'Modalidade': _contagens_por_valor(indice_modalidade, tabela_uf.sum(axis=0)),
+        }
+
+#tipos de chave aceitos na busca em lote
+COLUNAS_CHAVE_LOTE = {
+    'registro_ans': ('Registro_ANS',),
+    'cnpj': ('CNPJ',),
+    'auto': ('Registro_ANS', 'CNPJ')
+}
+
+def localizar_operadoras(snapshot, chaves, tipo='auto'):
+    """
+    Resolve várias chaves exatas (Registro ANS ou CNPJ) nas linhas do dataset
+
+    Args:
+        snapshot (SnapshotOperadoras): Dataset carregado com seus índices
+        chaves (list): Chaves a procurar (texto com ou sem pontuação, ou inteiros)
+        tipo (str): 'registro_ans', 'cnpj' ou 'auto' (tenta Registro ANS e depois CNPJ)
+
+    Returns:
+        list: Posição da linha de cada chave, ou None quando não encontrada
+    """
+    indices = [snapshot.indices_exatos[col] for col in COLUNAS_CHAVE_LOTE[tipo]]
+    linhas = []
+    for chave in chaves:
+        linha = None
+        for indice in indices:
+            linha = indice.buscar(chave)
+            if linha is not None:
+                break
+        linhas.append(linha)
+    return linhas
+
+# Limite de sugestões por requisição do autocompletar
+MAX_SUGESTOES = 20
+
+def sugerir_operadoras(snapshot, prefixo, limite=8):
+    """
+    Sugestões de autocompletar para o que foi digitado na busca
+
+    Args:
+        snapshot (SnapshotOperadoras): Dataset carregado com seus índices
+        prefixo (str): Início da Razão Social, Nome Fantasia ou Registro ANS
+        limite (int): Número máximo de sugestões (até MAX_SUGESTOES)
+
+    Returns:
+        list: Dicionários com o texto sugerido, o campo de origem e a
+              identificação da operadora
+    """
+    encontrados = snapshot.indice_prefixos.buscar(prefixo, min(limite, MAX_SUGESTOES))
+    if not encontrados:
+        return []
+
+    # Acessar cada coluna uma única vez; o resto é indexação direta por linha
+    valores = {col: snapshot.df[col].array for col in {'Registro_ANS', 'Razao_Social', *(c for c, _ in encontrados)}}
+    return [
+        {
+            'sugestao': valores[coluna][linha],
+            'campo': coluna,
+            'Registro_ANS': valores['Registro_ANS'][linha],
+            'Razao_Social': valores['Razao_Social'][linha],
+        }
+        for coluna, linha in encontrados
+    ]
+
 def extrair_opcoes_unicas(df):
     """
     Extrair opcoes unicas e modalidades
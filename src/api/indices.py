@@ -0,0 +1,626 @@
+"""
+Índices em memória para acelerar a busca de operadoras.
+"""
+
+import re
+import bisect
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from src.api.metricas import metricas
+
+
+def dobrar_texto(texto):
+    """
+    Normaliza um texto para comparação: sem acentos e sem diferença de caixa
+
+    Args:
+        texto (str): Texto original
+
+    Returns:
+        str: Texto em minúsculas e sem acentos (ex.: 'São Paulo' -> 'sao paulo')
+    """
+    texto = str(texto)
+    if texto.isascii():
+        return texto.lower()
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+
+
+def extrair_trigramas(texto):
+    """
+    Extrai o conjunto de trigramas (substrings de 3 caracteres) de um texto
+
+    Args:
+        texto (str): Texto já normalizado com dobrar_texto
+
+    Returns:
+        set: Trigramas presentes no texto
+    """
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas para busca por substring
+
+    Para cada trigrama guarda a lista ordenada de linhas que o contêm em
+    alguma das colunas indexadas. Uma busca intersecta as listas dos
+    trigramas do termo e só verifica as linhas candidatas, então o custo
+    acompanha o número de resultados e não o tamanho da tabela.
+    """
+
+    COLUNAS = ('Razao_Social', 'Nome_Fantasia', 'Registro_ANS', 'CNPJ')
+
+    def __init__(self, df, colunas=COLUNAS):
+        """
+        Args:
+            df (DataFrame): DataFrame normalizado (colunas em texto)
+            colunas (tuple): Colunas a indexar
+        """
+        self.total_linhas = len(df)
+        self.colunas = tuple(colunas)
+        self.textos = [[dobrar_texto(valor) for valor in df[col]] for col in colunas]
+
+        postings = {}
+        curtas = []
+        for linha in range(self.total_linhas):
+            trigramas = set()
+            for textos_coluna in self.textos:
+                texto = textos_coluna[linha]
+                if 0 < len(texto) < 3:
+                    curtas.append(linha)
+                trigramas.update(extrair_trigramas(texto))
+            for trigrama in trigramas:
+                postings.setdefault(trigrama, []).append(linha)
+
+        self.postings = {tg: np.asarray(linhas, dtype=np.int32) for tg, linhas in postings.items()}
+        # Linhas com algum campo menor que um trigrama (não aparecem nas postings)
+        self.linhas_curtas = np.unique(np.asarray(curtas, dtype=np.int32))
+
+    def textos_coluna(self, coluna):
+        """
+        Textos normalizados (dobrar_texto) de uma coluna indexada
+
+        Args:
+            coluna (str): Nome da coluna
+
+        Returns:
+            list: Um texto por linha
+        """
+        return self.textos[self.colunas.index(coluna)]
+
+    def _candidatos(self, termo):
+        """Linhas que podem conter o termo, a partir das listas de trigramas"""
+        if len(termo) >= 3:
+            listas = []
+            for trigrama in extrair_trigramas(termo):
+                lista = self.postings.get(trigrama)
+                if lista is None:
+                    return np.empty(0, dtype=np.int32)
+                listas.append(lista)
+
+            listas.sort(key=len)
+            candidatos = listas[0]
+            for lista in listas[1:]:
+                candidatos = np.intersect1d(candidatos, lista, assume_unique=True)
+                if len(candidatos) == 0:
+                    break
+            return candidatos
+
+        # Termos curtos: união das listas dos trigramas que contêm o termo
+        listas = [lista for trigrama, lista in self.postings.items() if termo in trigrama]
+        listas.append(self.linhas_curtas)
+        return np.unique(np.concatenate(listas))
+
+    def buscar(self, termo):
+        """
+        Busca as linhas que contêm o termo em alguma das colunas indexadas
+
+        Args:
+            termo (str): Termo de busca (caixa e acentos são ignorados)
+
+        Returns:
+            ndarray: Posições das linhas encontradas, em ordem crescente
+        """
+        termo = dobrar_texto(termo)
+        if not termo:
+            return np.arange(self.total_linhas)
+
+        encontradas = [
+            linha for linha in self._candidatos(termo).tolist()
+            if any(termo in textos_coluna[linha] for textos_coluna in self.textos)
+        ]
+        return np.asarray(encontradas, dtype=np.int64)
+
+
+def extrair_trigramas_palavras(texto):
+    """
+    Extrai os trigramas de cada palavra, com espaços nas bordas (como o pg_trgm)
+
+    As bordas fazem o início e o fim das palavras pesarem na similaridade e
+    permitem comparar palavras curtas.
+
+    Args:
+        texto (str): Texto já normalizado com dobrar_texto
+
+    Returns:
+        set: Trigramas das palavras do texto
+    """
+    trigramas = set()
+    for palavra in re.findall(r'\w+', texto):
+        trigramas.update(extrair_trigramas(f'  {palavra} '))
+    return trigramas
+
+
+class IndiceSimilaridade:
+    """
+    Índice para busca aproximada (tolerante a erros de digitação) por nomes
+
+    Cada texto indexado (um por linha e coluna) é tratado como um conjunto
+    de trigramas de palavras. A similaridade é a fração dos trigramas da
+    consulta encontrados no texto (assim 'unimd campinas' fica próximo de um
+    nome longo como 'Unimed Campinas Cooperativa...'); empates são
+    desfeitos pelo índice de Jaccard. Para não degenerar em uma varredura da
+    tabela, a contagem de trigramas em comum usa as listas invertidas mais
+    seletivas primeiro e para ao atingir o volume máximo de postings ou o
+    orçamento de tempo; só os melhores candidatos têm a similaridade exata
+    calculada.
+    """
+
+    # Volume máximo de entradas de postings somadas por consulta
+    MAX_POSTINGS = 200000
+
+    # Quantidade máxima de candidatos com similaridade calculada
+    MAX_CANDIDATOS = 500
+
+    def __init__(self, textos_por_coluna):
+        """
+        Args:
+            textos_por_coluna (list): Uma lista de textos normalizados por coluna,
+                                      todas com uma posição por linha
+        """
+        self.textos_por_coluna = textos_por_coluna
+        self.total_colunas = len(textos_por_coluna)
+        self.total_linhas = len(textos_por_coluna[0]) if textos_por_coluna else 0
+
+        # Documento = linha * total_colunas + coluna
+        postings = {}
+        for coluna, textos in enumerate(textos_por_coluna):
+            for linha, texto in enumerate(textos):
+                documento = linha * self.total_colunas + coluna
+                for trigrama in extrair_trigramas_palavras(texto):
+                    postings.setdefault(trigrama, []).append(documento)
+        self.postings = {tg: np.asarray(docs, dtype=np.int32) for tg, docs in postings.items()}
+
+    def buscar(self, termo, limite=10, limiar=0.5, mascara=None, orcamento_ms=50):
+        """
+        Busca as linhas mais parecidas com o termo
+
+        Args:
+            termo (str): Texto da consulta
+            limite (int): Quantidade máxima de linhas retornadas
+            limiar (float): Similaridade mínima (0 a 1) para uma linha ser retornada
+            mascara (ndarray, optional): Vetor booleano com as linhas aceitas pelos filtros
+            orcamento_ms (float): Tempo máximo aproximado da busca, em milissegundos
+
+        Returns:
+            tuple: (posições das linhas, similaridades), da mais para a menos parecida
+        """
+        posicoes, similaridades, _, _ = self.buscar_com_candidatas(termo, limite, limiar, mascara, orcamento_ms)
+        return posicoes, similaridades
+
+    def buscar_com_candidatas(self, termo, limite=10, limiar=0.5, mascara=None, orcamento_ms=50):
+        """
+        Como buscar, mas devolve também todas as linhas parecidas com o termo
+
+        As candidatas saem da mesma contagem de trigramas em comum da busca,
+        antes da máscara e do corte em MAX_CANDIDATOS: como cada texto é um
+        conjunto de trigramas, a contagem já é a similaridade exata quando
+        todas as listas invertidas foram somadas. Se o volume máximo ou o
+        orçamento de tempo interromperam a soma, as contagens são limites
+        inferiores e o conjunto pode estar incompleto.
+
+        Returns:
+            tuple: (posições das linhas, similaridades, linhas candidatas
+                    sem a máscara, True se as candidatas estão completas)
+        """
+        vazio = (np.empty(0, dtype=np.int64), np.empty(0))
+        inicio = time.perf_counter()
+        prazo = inicio + orcamento_ms / 1000
+
+        consulta = extrair_trigramas_palavras(dobrar_texto(termo))
+        listas = sorted((self.postings[tg] for tg in consulta if tg in self.postings), key=len)
+        if not listas:
+            return (*vazio, np.empty(0, dtype=np.int64), True)
+
+        # Contagem de trigramas em comum, das listas mais seletivas para as mais comuns
+        usadas = []
+        volume = 0
+        for lista in listas:
+            if usadas and (volume + len(lista) > self.MAX_POSTINGS or time.perf_counter() > prazo):
+                break
+            usadas.append(lista)
+            volume += len(lista)
+        documentos, contagens = np.unique(np.concatenate(usadas), return_counts=True)
+        candidatas = np.unique(documentos[contagens / len(consulta) >= limiar] // self.total_colunas)
+        completas = len(usadas) == len(listas)
+        if limite <= 0:
+            return (*vazio, candidatas, completas)
+
+        if mascara is not None:
+            aceitos = mascara[documentos // self.total_colunas]
+            documentos, contagens = documentos[aceitos], contagens[aceitos]
+        if len(documentos) > self.MAX_CANDIDATOS:
+            melhores = np.argpartition(-contagens, self.MAX_CANDIDATOS - 1)[:self.MAX_CANDIDATOS]
+            documentos, contagens = documentos[melhores], contagens[melhores]
+        documentos = documentos[np.argsort(-contagens, kind='stable')]
+
+        # Similaridade exata apenas para os candidatos; cada linha fica com a
+        # melhor pontuação entre suas colunas
+        melhores_linhas = {}
+        for documento in documentos.tolist():
+            linha, coluna = divmod(documento, self.total_colunas)
+            trigramas = extrair_trigramas_palavras(self.textos_por_coluna[coluna][linha])
+            comuns = len(consulta & trigramas)
+            pontuacao = (comuns / len(consulta), comuns / (len(consulta) + len(trigramas) - comuns))
+            if pontuacao[0] >= limiar and pontuacao > melhores_linhas.get(linha, (0, 0)):
+                melhores_linhas[linha] = pontuacao
+            if time.perf_counter() > prazo:
+                break
+
+        ordenadas = sorted(melhores_linhas.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))[:limite]
+        if not ordenadas:
+            return (*vazio, candidatas, completas)
+        return (np.asarray([linha for linha, _ in ordenadas], dtype=np.int64),
+                np.asarray([pontuacao[0] for _, pontuacao in ordenadas]), candidatas, completas)
+
+
+class IndiceCategorico:
+    """
+    Códigos categóricos e bitmaps por valor de uma coluna de baixa cardinalidade
+
+    Cada valor distinto recebe um bitmap (um bit por linha, compactado com
+    np.packbits). Filtrar por um valor é só buscar o bitmap pronto, e
+    combinar filtros é um AND bit a bit.
+    """
+
+    def __init__(self, serie):
+        """
+        Args:
+            serie (Series): Coluna a indexar (ex.: UF ou Modalidade)
+        """
+        categorias = pd.Categorical(serie)
+        self.total_linhas = len(serie)
+        self.codigos = categorias.codes
+        self.categorias = [str(valor) for valor in categorias.categories]
+        self.bitmaps = [np.packbits(self.codigos == codigo) for codigo in range(len(self.categorias))]
+        self.chaves_dobradas = [dobrar_texto(valor) for valor in self.categorias]
+        self._vazio = np.zeros((self.total_linhas + 7) // 8, dtype=np.uint8)
+
+    def codigos_iguais(self, valor):
+        """
+        Códigos das categorias iguais ao valor (ignorando caixa e acentos)
+
+        Args:
+            valor (str): Valor procurado
+
+        Returns:
+            list: Códigos categóricos
+        """
+        chave = dobrar_texto(valor)
+        return [codigo for codigo, chave_categoria in enumerate(self.chaves_dobradas) if chave_categoria == chave]
+
+    def codigos_contendo(self, termo):
+        """
+        Códigos das categorias que contêm o termo (ignorando caixa e acentos)
+
+        Args:
+            termo (str): Trecho procurado
+
+        Returns:
+            list: Códigos categóricos
+        """
+        termo = dobrar_texto(termo)
+        return [codigo for codigo, chave_categoria in enumerate(self.chaves_dobradas) if termo in chave_categoria]
+
+    def _bitmap_dos_codigos(self, codigos):
+        bitmap = self._vazio
+        for codigo in codigos:
+            bitmap = bitmap | self.bitmaps[codigo]
+        return bitmap
+
+    def bitmap_igual(self, valor):
+        """
+        Bitmap das linhas cujo valor é igual ao informado (ignorando caixa e acentos)
+
+        Args:
+            valor (str): Valor procurado
+
+        Returns:
+            ndarray: Bitmap compactado (uint8)
+        """
+        return self._bitmap_dos_codigos(self.codigos_iguais(valor))
+
+    def bitmap_contendo(self, termo):
+        """
+        Bitmap das linhas cujo valor contém o termo (ignorando caixa e acentos)
+
+        Args:
+            termo (str): Trecho procurado
+
+        Returns:
+            ndarray: Bitmap compactado (uint8)
+        """
+        return self._bitmap_dos_codigos(self.codigos_contendo(termo))
+
+    def para_mascara(self, bitmap):
+        """
+        Converte um bitmap compactado em vetor booleano com uma posição por linha
+
+        Args:
+            bitmap (ndarray): Bitmap compactado (uint8)
+
+        Returns:
+            ndarray: Vetor booleano
+        """
+        return np.unpackbits(bitmap, count=self.total_linhas).view(bool)
+
+
+def chaves_inteiras(serie):
+    """
+    Converte uma coluna de identificadores (Registro ANS, CNPJ) em inteiros
+
+    Args:
+        serie (Series): Coluna com os identificadores em texto
+
+    Returns:
+        ndarray: Vetor int64; -1 onde o valor não é um número
+    """
+    numeros = pd.to_numeric(serie, errors='coerce')
+    somente_digitos = serie.astype(str).str.replace(r'\D', '', regex=True)
+    numeros = numeros.fillna(pd.to_numeric(somente_digitos, errors='coerce'))
+    return numeros.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def contagem_cruzada(indice_linhas, indice_colunas, linhas=None):
+    """
+    Conta as linhas por par de categorias de duas colunas categóricas
+
+    Args:
+        indice_linhas (IndiceCategorico): Coluna das linhas da tabela (ex.: UF)
+        indice_colunas (IndiceCategorico): Coluna das colunas da tabela (ex.: Modalidade)
+        linhas (ndarray, optional): Linhas a contar (None = todas)
+
+    Returns:
+        ndarray: Matriz de contagens [categoria da 1ª coluna, categoria da 2ª coluna]
+    """
+    codigos_a, codigos_b = indice_linhas.codigos, indice_colunas.codigos
+    if linhas is not None:
+        codigos_a, codigos_b = codigos_a[linhas], codigos_b[linhas]
+    validos = (codigos_a >= 0) & (codigos_b >= 0)
+    total_b = len(indice_colunas.categorias)
+    pares = codigos_a[validos].astype(np.int64) * total_b + codigos_b[validos]
+    tamanho = len(indice_linhas.categorias) * total_b
+    return np.bincount(pares, minlength=tamanho).reshape(len(indice_linhas.categorias), total_b)
+
+
+class IndiceExato:
+    """
+    Índice de igualdade (hash) de uma coluna de identificadores inteiros
+
+    Resolve um Registro ANS ou CNPJ na linha correspondente em O(1).
+    """
+
+    def __init__(self, chaves):
+        """
+        Args:
+            chaves (ndarray): Vetor int64 gerado por chaves_inteiras (-1 = ausente)
+        """
+        self.linhas = {}
+        for linha, chave in enumerate(chaves.tolist()):
+            if chave >= 0:
+                # Em caso de chave repetida, vale a primeira linha
+                self.linhas.setdefault(chave, linha)
+
+    @staticmethod
+    def normalizar_chave(chave):
+        """
+        Converte uma chave recebida (texto com ou sem pontuação, ou número inteiro) em inteiro
+
+        Números com parte fracionária e valores de outros tipos (listas,
+        objetos, booleanos) não correspondem a nenhuma chave.
+
+        Args:
+            chave (str, int ou float): Chave informada pelo cliente
+
+        Returns:
+            int: Chave numérica, ou None se a chave não for válida
+        """
+        if isinstance(chave, bool):
+            return None
+        if isinstance(chave, int):
+            return chave
+        if isinstance(chave, float):
+            return int(chave) if chave.is_integer() else None
+        if not isinstance(chave, str):
+            return None
+        digitos = re.sub(r'\D', '', chave)
+        return int(digitos) if digitos else None
+
+    def buscar(self, chave):
+        """
+        Busca a linha de uma chave
+
+        Args:
+            chave (str ou int): Chave informada pelo cliente
+
+        Returns:
+            int: Posição da linha, ou None se a chave não existir
+        """
+        chave = self.normalizar_chave(chave)
+        if chave is None:
+            return None
+        return self.linhas.get(chave)
+
+
+class IndicePrefixos:
+    """
+    Chaves normalizadas em ordem alfabética para busca por prefixo
+
+    Para cada coluna guarda os textos (já normalizados com dobrar_texto)
+    ordenados e a linha de cada um. Um prefixo é localizado com busca binária
+    (bisect) e as sugestões são lidas em sequência a partir dali, então o
+    custo não depende do tamanho da tabela.
+    """
+
+    def __init__(self, textos_por_coluna):
+        """
+        Args:
+            textos_por_coluna (dict): Coluna -> textos normalizados, um por linha
+                                      (ex.: IndiceTrigramas.textos_coluna)
+        """
+        self.chaves = {}
+        self.linhas = {}
+        for coluna, textos in textos_por_coluna.items():
+            ordem = sorted((linha for linha, texto in enumerate(textos) if texto), key=textos.__getitem__)
+            self.chaves[coluna] = [textos[linha] for linha in ordem]
+            self.linhas[coluna] = np.asarray(ordem, dtype=np.int32)
+
+    def buscar(self, prefixo, limite=8):
+        """
+        Busca as linhas cujo texto em alguma coluna começa com o prefixo
+
+        Args:
+            prefixo (str): Início digitado (caixa e acentos são ignorados)
+            limite (int): Número máximo de sugestões
+
+        Returns:
+            list: Tuplas (coluna, linha), em ordem alfabética do texto
+                  encontrado, sem repetir linhas
+        """
+        prefixo = dobrar_texto(prefixo).strip()
+        if not prefixo or limite <= 0:
+            return []
+
+        encontrados = []
+        for coluna, chaves in self.chaves.items():
+            inicio = bisect.bisect_left(chaves, prefixo)
+            fim = min(inicio + limite, len(chaves))
+            for posicao in range(inicio, fim):
+                if not chaves[posicao].startswith(prefixo):
+                    break
+                encontrados.append((chaves[posicao], coluna, int(self.linhas[coluna][posicao])))
+
+        encontrados.sort()
+        sugestoes, vistas = [], set()
+        for _, coluna, linha in encontrados:
+            if linha not in vistas:
+                vistas.add(linha)
+                sugestoes.append((coluna, linha))
+                if len(sugestoes) == limite:
+                    break
+        return sugestoes
+
+
+class OrdenacoesPrecomputadas:
+    """
+    Ordens de classificação calculadas uma única vez por versão do dataset
+
+    Para cada coluna ordenável guarda a permutação que ordena a tabela e o
+    inverso dela (a posição de cada linha na ordem). Assim uma busca obtém
+    os primeiros resultados sem ordenar o conjunto filtrado inteiro.
+    """
+
+    # Quantidade de linhas examinadas por vez ao percorrer uma permutação
+    TAMANHO_BLOCO = 4096
+
+    def __init__(self, df, colunas):
+        """
+        Args:
+            df (DataFrame): DataFrame normalizado (colunas em texto)
+            colunas (iterable): Colunas que podem ser usadas na ordenação
+        """
+        self.permutacoes = {}
+        self.posicoes = {}
+        self.valores_ordenados = {}
+        for col in colunas:
+            valores = df[col].to_numpy(dtype=object)
+            permutacao = np.argsort(valores, kind='stable')
+            posicoes = np.empty_like(permutacao)
+            posicoes[permutacao] = np.arange(len(permutacao))
+            self.permutacoes[col] = permutacao
+            self.posicoes[col] = posicoes
+            self.valores_ordenados[col] = valores[permutacao]
+
+    def primeiros(self, coluna, ascendente, limite, linhas=None, mascara=None, apos=None):
+        """
+        Seleciona as primeiras linhas na ordem pedida
+
+        Args:
+            coluna (str): Coluna de ordenação
+            ascendente (bool): Direção da ordenação
+            limite (int): Quantidade máxima de linhas retornadas
+            linhas (ndarray, optional): Linhas candidatas; None considera a tabela toda
+            mascara (ndarray, optional): Vetor booleano com as linhas aceitas pelos filtros
+            apos (int, optional): Posição na ordem ascendente da última linha já
+                                  entregue (paginação); só linhas depois dela,
+                                  na direção pedida, são consideradas
+
+        Returns:
+            ndarray: Posições das linhas selecionadas, já ordenadas
+        """
+        if limite <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        if linhas is None:
+            return self._percorrer_permutacao(coluna, ascendente, limite, mascara, apos)
+
+        metricas.incrementar('operadoras_linhas_examinadas_total', len(linhas))
+        if mascara is not None:
+            linhas = linhas[mascara[linhas]]
+
+        # Seleção parcial dos k primeiros pela posição na ordem, seguida da
+        # ordenação apenas desses k
+        chaves = self.posicoes[coluna][linhas]
+        if apos is not None:
+            restantes = chaves > apos if ascendente else chaves < apos
+            linhas, chaves = linhas[restantes], chaves[restantes]
+        if not ascendente:
+            chaves = -chaves
+        if len(linhas) > limite:
+            selecionadas = np.argpartition(chaves, limite - 1)[:limite]
+            linhas, chaves = linhas[selecionadas], chaves[selecionadas]
+        return linhas[np.argsort(chaves, kind='stable')]
+
+    def _percorrer_permutacao(self, coluna, ascendente, limite, mascara, apos):
+        """Percorre a permutação em blocos até reunir `limite` linhas aceitas"""
+        permutacao = self.permutacoes[coluna]
+        if ascendente:
+            permutacao = permutacao[max(apos + 1, 0):] if apos is not None else permutacao
+        else:
+            permutacao = permutacao[:max(apos, 0)] if apos is not None else permutacao
+            permutacao = permutacao[::-1]
+        if mascara is None:
+            metricas.incrementar('operadoras_linhas_examinadas_total', min(limite, len(permutacao)))
+            return permutacao[:limite]
+
+        partes = []
+        encontradas = 0
+        examinadas = 0
+        for inicio in range(0, len(permutacao), self.TAMANHO_BLOCO):
+            bloco = permutacao[inicio:inicio + self.TAMANHO_BLOCO]
+            examinadas += len(bloco)
+            bloco = bloco[mascara[bloco]]
+            partes.append(bloco)
+            encontradas += len(bloco)
+            if encontradas >= limite:
+                break
+        metricas.incrementar('operadoras_linhas_examinadas_total', examinadas)
+
+        if not partes:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(partes)[:limite]
@@ -0,0 +1,316 @@
+"""
+Métricas de latência e contadores da API, expostas no formato texto do Prometheus.
+
+As medições são feitas com time.perf_counter e agregadas em histogramas de
+faixas fixas, então o custo por medição é constante (uma busca binária e
+algumas somas) e pode ficar ligado em produção.
+
+Com vários processos (workers do gunicorn), cada worker grava o próprio
+estado em um diretório compartilhado e a coleta soma os arquivos de todos,
+então qualquer worker que atenda /api/metrics responde com o total.
+"""
+
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Limites superiores (em segundos) das faixas dos histogramas de latência
+FAIXAS_PADRAO = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histograma:
+    """Contagem de observações por faixa, soma e total"""
+
+    def __init__(self, faixas=FAIXAS_PADRAO):
+        self.faixas = faixas
+        self.contagens = [0] * (len(faixas) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.faixas, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+def _formatar_rotulos(rotulos, extra=None):
+    """Formata os rótulos no padrão {nome="valor",...}"""
+    pares = list(rotulos)
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ''
+    texto = ','.join(
+        '{}="{}"'.format(nome, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for nome, valor in pares
+    )
+    return '{' + texto + '}'
+
+
+def _formatar_numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _processo_ativo(pid):
+    """Indica se ainda existe um processo com este pid"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class RegistroMetricas:
+    """
+    Registro de contadores, histogramas e medidores do processo
+
+    Com compartilhar(), a exportação soma os contadores e histogramas de
+    todos os processos que gravam no mesmo diretório (inclusive workers já
+    encerrados, para que os totais nunca diminuam) e mostra os medidores de
+    cada worker ativo com o rótulo pid.
+    """
+
+    # Segundos entre gravações do estado de cada worker no diretório compartilhado
+    INTERVALO_GRAVACAO = 1.0
+
+    def __init__(self):
+        self._contadores = {}
+        self._histogramas = {}
+        self._medidores = {}
+        self._descricoes = {}
+        self._lock = threading.Lock()
+        self._diretorio = None
+        self._parar_gravacao = None
+
+    def descrever(self, nome, descricao):
+        """Define o texto de ajuda (# HELP) de uma métrica"""
+        self._descricoes[nome] = descricao
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        """
+        Soma um valor a um contador
+
+        Args:
+            nome (str): Nome da métrica (ex.: 'operadoras_requisicoes_total')
+            valor (int): Quantidade a somar
+            **rotulos: Rótulos da série (ex.: rota='/api/operadoras')
+        """
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            series = self._contadores.setdefault(nome, {})
+            series[chave] = series.get(chave, 0) + valor
+
+    def observar(self, nome, valor, **rotulos):
+        """
+        Registra uma observação (em segundos) em um histograma
+
+        Args:
+            nome (str): Nome da métrica
+            valor (float): Valor observado
+            **rotulos: Rótulos da série
+        """
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            series = self._histogramas.setdefault(nome, {})
+            histograma = series.get(chave)
+            if histograma is None:
+                histograma = series[chave] = Histograma()
+            histograma.observar(valor)
+
+    def registrar_medidor(self, nome, funcao, descricao=''):
+        """
+        Registra um medidor cujo valor é lido no momento da exportação
+
+        Args:
+            nome (str): Nome da métrica
+            funcao (callable): Função sem argumentos que retorna o valor atual
+            descricao (str): Texto de ajuda
+        """
+        self._medidores[nome] = funcao
+        if descricao:
+            self.descrever(nome, descricao)
+
+    @contextmanager
+    def cronometrar(self, nome, **rotulos):
+        """
+        Mede o tempo do bloco e registra no histograma
+
+        Exemplo:
+            with metricas.cronometrar('operadoras_etapa_segundos', etapa='ordenacao'):
+                ...
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def limpar(self):
+        """Zera contadores e histogramas (os medidores continuam registrados)"""
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def compartilhar(self, diretorio):
+        """
+        Passa a exportar as métricas somadas dos processos que gravam em diretorio
+
+        Chamado no processo principal antes do fork; apaga os arquivos de
+        execuções anteriores.
+
+        Args:
+            diretorio (str ou Path): Diretório compartilhado pelos workers
+        """
+        diretorio = Path(diretorio)
+        diretorio.mkdir(parents=True, exist_ok=True)
+        for arquivo in glob.glob(str(diretorio / 'metricas-*.json')):
+            os.unlink(arquivo)
+        self._diretorio = diretorio
+
+    def iniciar_gravacao(self, intervalo=INTERVALO_GRAVACAO):
+        """
+        No worker (depois do fork): zera o que foi herdado do processo
+        principal e grava o estado no diretório compartilhado a cada intervalo
+        """
+        if self._diretorio is None:
+            return
+        self.limpar()
+        self._parar_gravacao = threading.Event()
+
+        def gravar_periodicamente(parar):
+            while not parar.wait(intervalo):
+                try:
+                    self.gravar_estado()
+                except Exception as e:
+                    print(f"Erro ao gravar as métricas do processo: {str(e)}")
+
+        threading.Thread(target=gravar_periodicamente, args=(self._parar_gravacao,),
+                         name='gravacao-metricas', daemon=True).start()
+
+    def parar_gravacao(self):
+        """Interrompe a gravação periódica e grava o estado final (ex.: ao encerrar o worker)"""
+        if self._parar_gravacao is not None:
+            self._parar_gravacao.set()
+            self._parar_gravacao = None
+        self.gravar_estado()
+
+    def gravar_estado(self):
+        """Grava o estado deste processo no diretório compartilhado (se houver)"""
+        if self._diretorio is None:
+            return
+        caminho = self._diretorio / f'metricas-{os.getpid()}.json'
+        temporario = caminho.with_suffix('.tmp')
+        temporario.write_text(json.dumps(self._estado()), encoding='utf-8')
+        os.replace(temporario, caminho)
+
+    def _estado(self):
+        """Cópia serializável dos contadores, histogramas e medidores deste processo"""
+        with self._lock:
+            contadores = [[nome, list(chave), valor]
+                          for nome, series in self._contadores.items() for chave, valor in series.items()]
+            histogramas = [[nome, list(chave), list(h.contagens), h.soma, h.total, list(h.faixas)]
+                           for nome, series in self._histogramas.items() for chave, h in series.items()]
+        medidores = []
+        for nome, funcao in list(self._medidores.items()):
+            try:
+                medidores.append([nome, funcao()])
+            except Exception:
+                continue
+        return {'contadores': contadores, 'histogramas': histogramas, 'medidores': medidores}
+
+    def _estados(self):
+        """Estados a exportar: o deste processo ou, compartilhando, os de todos os processos"""
+        if self._diretorio is None:
+            return [(None, self._estado())]
+        self.gravar_estado()
+        estados = []
+        for arquivo in sorted(glob.glob(str(self._diretorio / 'metricas-*.json'))):
+            try:
+                pid = int(Path(arquivo).stem.split('-')[1])
+                with open(arquivo, encoding='utf-8') as f:
+                    estados.append((pid, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return estados
+
+    def valor_contador(self, nome, **rotulos):
+        """Retorna o valor atual de um contador (0 se não existir)"""
+        with self._lock:
+            return self._contadores.get(nome, {}).get(tuple(sorted(rotulos.items())), 0)
+
+    def formato_prometheus(self):
+        """
+        Exporta todas as métricas no formato texto do Prometheus (versão 0.0.4)
+
+        Returns:
+            str: Métricas prontas para o endpoint de coleta
+        """
+        contadores, histogramas, medidores = {}, {}, {}
+        for pid, estado in self._estados():
+            for nome, chave, valor in estado['contadores']:
+                series = contadores.setdefault(nome, {})
+                chave = tuple(tuple(par) for par in chave)
+                series[chave] = series.get(chave, 0) + valor
+            for nome, chave, contagens, soma, total, faixas in estado['histogramas']:
+                series = histogramas.setdefault(nome, {})
+                chave = tuple(tuple(par) for par in chave)
+                if chave in series:
+                    anteriores, soma_anterior, total_anterior, _ = series[chave]
+                    contagens = [a + b for a, b in zip(anteriores, contagens)]
+                    soma, total = soma + soma_anterior, total + total_anterior
+                series[chave] = (contagens, soma, total, tuple(faixas))
+            # Medidores descrevem o momento atual: só os dos processos ativos
+            if pid is None or _processo_ativo(pid):
+                for nome, valor in estado['medidores']:
+                    chave = (('pid', pid),) if pid is not None else ()
+                    medidores.setdefault(nome, {})[chave] = valor
+
+        linhas = []
+
+        def cabecalho(nome, tipo):
+            if nome in self._descricoes:
+                linhas.append(f'# HELP {nome} {self._descricoes[nome]}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+
+        for nome in sorted(contadores):
+            cabecalho(nome, 'counter')
+            for chave, valor in sorted(contadores[nome].items()):
+                linhas.append(f'{nome}{_formatar_rotulos(chave)} {_formatar_numero(valor)}')
+
+        for nome in sorted(histogramas):
+            cabecalho(nome, 'histogram')
+            for chave, (contagens, soma, total, faixas) in sorted(histogramas[nome].items()):
+                acumulado = 0
+                for limite, contagem in zip(faixas, contagens):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{_formatar_rotulos(chave, ("le", limite))} {acumulado}')
+                linhas.append(f'{nome}_bucket{_formatar_rotulos(chave, ("le", "+Inf"))} {total}')
+                linhas.append(f'{nome}_sum{_formatar_rotulos(chave)} {_formatar_numero(soma)}')
+                linhas.append(f'{nome}_count{_formatar_rotulos(chave)} {total}')
+
+        for nome in sorted(medidores):
+            cabecalho(nome, 'gauge')
+            for chave, valor in sorted(medidores[nome].items()):
+                linhas.append(f'{nome}{_formatar_rotulos(chave)} {_formatar_numero(valor)}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+# Registro único do processo
+metricas = RegistroMetricas()
+
+metricas.descrever('operadoras_requisicoes_total', 'Requisicoes atendidas, por rota e status HTTP')
+metricas.descrever('operadoras_requisicao_segundos', 'Latencia total das requisicoes, por rota')
+metricas.descrever('operadoras_etapa_segundos', 'Latencia de cada etapa da busca de operadoras')
+metricas.descrever('operadoras_linhas_examinadas_total', 'Linhas candidatas examinadas pelos filtros')
+metricas.descrever('operadoras_linhas_retornadas_total', 'Linhas devolvidas nas respostas de busca')
+metricas.descrever('operadoras_cache_total', 'Consultas ao cache de respostas, por resultado')
+metricas.descrever('operadoras_buscas_compartilhadas_total', 'Buscas respondidas com o resultado de uma busca identica em andamento')
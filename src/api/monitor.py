@@ -0,0 +1,52 @@
+"""
+Monitoramento em segundo plano dos arquivos de dados da API.
+
+Uma thread verifica periodicamente se o arquivo mudou e, se mudou, prepara
+a nova versão dos dados fora do caminho das requisições. As requisições
+continuam sendo atendidas pela versão anterior até a troca.
+"""
+
+import threading
+
+
+class MonitorArquivo:
+    """
+    Thread que chama uma função de verificação a cada intervalo
+
+    Erros na verificação (ex.: arquivo sendo gravado ou CSV inválido) são
+    registrados e a versão em uso continua valendo até a próxima tentativa.
+    """
+
+    def __init__(self, verificar, intervalo=5.0, nome='monitor-dados'):
+        """
+        Args:
+            verificar (callable): Função chamada a cada ciclo
+            intervalo (float): Segundos entre verificações
+            nome (str): Nome da thread
+        """
+        self.verificar = verificar
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name=nome, daemon=True)
+
+    def iniciar(self):
+        """Inicia a thread de monitoramento"""
+        self._thread.start()
+        return self
+
+    def parar(self, aguardar=True):
+        """Interrompe o monitoramento"""
+        self._parar.set()
+        if aguardar and self._thread.is_alive():
+            self._thread.join()
+
+    def ativo(self):
+        """Indica se a thread está em execução"""
+        return self._thread.is_alive() and not self._parar.is_set()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as e:
+                print(f"Erro ao verificar atualização dos dados: {str(e)}")
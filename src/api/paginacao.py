@@ -0,0 +1,117 @@
+"""
+Cursores opacos para paginação da busca de operadoras.
+
+Um cursor guarda a ordenação usada e a última linha entregue (posição dela
+na ordem pré-calculada e o valor da chave de ordenação). A página seguinte
+continua a varredura a partir desse ponto, sem recalcular nem serializar
+as páginas anteriores.
+"""
+
+import base64
+import binascii
+import json
+
+import numpy as np
+
+
+def codificar_cursor(snapshot, ordenacao, ordem, coluna, linha):
+    """
+    Gera o cursor que aponta para depois da linha informada
+
+    Args:
+        snapshot (SnapshotOperadoras): Dataset usado na busca
+        ordenacao (str): Parâmetro de ordenação da requisição
+        ordem (str): Direção da ordenação ('asc' ou 'desc')
+        coluna (str): Coluna efetivamente usada na ordenação
+        linha (int): Posição (iloc) da última linha entregue
+
+    Returns:
+        str: Cursor codificado em base64 (seguro para URLs)
+    """
+    dados = {
+        'v': snapshot.versao,
+        'o': ordenacao,
+        'd': ordem,
+        'p': int(snapshot.ordenacoes.posicoes[coluna][linha]),
+        'k': str(snapshot.df[coluna].iloc[linha]),
+    }
+    return _codificar(dados)
+
+
+def codificar_cursor_banco(versao, ordenacao, ordem, chave, linha):
+    """
+    Gera o cursor do backend SQLite, que continua a busca pelo valor da chave
+
+    Args:
+        versao (str): Versão do banco usado na busca
+        ordenacao (str): Parâmetro de ordenação da requisição
+        ordem (str): Direção da ordenação ('asc' ou 'desc')
+        chave (str): Valor da coluna de ordenação na última linha entregue
+        linha (int): Linha (rowid) da última operadora entregue
+
+    Returns:
+        str: Cursor codificado em base64 (seguro para URLs)
+    """
+    return _codificar({'v': versao, 'o': ordenacao, 'd': ordem, 'p': int(linha), 'k': str(chave), 'b': 'sqlite'})
+
+
+def _codificar(dados):
+    texto = json.dumps(dados, separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """
+    Decodifica um cursor recebido na requisição
+
+    Args:
+        cursor (str): Cursor gerado por codificar_cursor
+
+    Returns:
+        dict: Dados do cursor
+
+    Raises:
+        ValueError: Se o cursor estiver malformado
+    """
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(cursor + preenchimento).decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError('Cursor inválido') from e
+
+    if not isinstance(dados, dict) or not {'v', 'o', 'd', 'p', 'k'} <= dados.keys():
+        raise ValueError('Cursor inválido')
+    # bool é subclasse de int: true/false não são uma linha válida
+    if not isinstance(dados['p'], int) or isinstance(dados['p'], bool) or dados['p'] < 0:
+        raise ValueError('Cursor inválido')
+    if not all(isinstance(dados[campo], str) for campo in ('v', 'o', 'd', 'k')):
+        raise ValueError('Cursor inválido')
+    return dados
+
+
+def posicao_do_cursor(snapshot, cursor, coluna, ascendente):
+    """
+    Obtém a posição, na ordem pré-calculada, a partir da qual a busca continua
+
+    Se o dataset foi recarregado depois que o cursor foi gerado (ou se o
+    cursor veio do backend SQLite), a posição é reencontrada pelo valor da
+    chave de ordenação (busca binária).
+
+    Args:
+        snapshot (SnapshotOperadoras): Dataset atual
+        cursor (dict): Cursor decodificado
+        coluna (str): Coluna de ordenação
+        ascendente (bool): Direção da ordenação
+
+    Returns:
+        int: Posição da última linha entregue na ordem ascendente da coluna
+    """
+    if cursor['v'] == snapshot.versao and 'b' not in cursor:
+        return cursor['p']
+
+    valores = snapshot.ordenacoes.valores_ordenados[coluna]
+    if ascendente:
+        # Continua depois de todas as linhas com chave <= a última entregue
+        return int(np.searchsorted(valores, cursor['k'], side='right')) - 1
+    # Em ordem decrescente, continua antes de todas as linhas com chave >= a última
+    return int(np.searchsorted(valores, cursor['k'], side='left'))
@@ -0,0 +1,191 @@
+"""
+Modo de produção do servidor da API, com múltiplos processos (gunicorn).
+
+O dataset de operadoras é carregado e indexado uma única vez no processo
+principal, antes da criação dos workers. Como os workers são criados por
+fork, eles compartilham essa memória (copy-on-write) em vez de cada um
+ler e indexar o CSV de novo.
+
+Atualizações do CSV são acompanhadas pelo processo principal. No backend
+em memória, ele carrega e indexa a nova versão e então recria os workers
+de forma graciosa (SIGHUP para si mesmo): os novos nascem por fork já com
+a nova versão compartilhada, em vez de cada worker montar a sua cópia. No
+backend SQLite, o processo principal regera o banco e os workers apenas
+reabrem as conexões quando o arquivo do banco é trocado.
+
+As métricas de cada worker são gravadas em um diretório temporário comum,
+e /api/metrics soma as de todos, qualquer que seja o worker que responda.
+
+Sinais aceitos pelo processo principal (gunicorn):
+    HUP   reinicia os workers de forma graciosa (requisições em andamento terminam)
+    TTIN  adiciona um worker
+    TTOU  remove um worker
+    TERM  encerra de forma graciosa
+"""
+
+import gc
+import os
+import signal
+import shutil
+import tempfile
+import multiprocessing
+
+from src.api.server import app, dataset_operadoras, banco_operadoras, usar_sqlite, iniciar_monitoramento
+from src.api.metricas import metricas
+from src.api.monitor import MonitorArquivo
+
+# Segundos entre verificações do CSV (e do banco)
+INTERVALO_MONITORAMENTO = 5.0
+
+
+def opcoes_padrao(workers=None, host='0.0.0.0', porta=5000):
+    """
+    Monta a configuração do gunicorn para servir a API
+
+    Args:
+        workers (int, optional): Número de processos; padrão é o número de CPUs
+        host (str): Endereço de escuta
+        porta (int): Porta de escuta
+
+    Returns:
+        dict: Opções do gunicorn
+    """
+    return {
+        'bind': f'{host}:{porta}',
+        'workers': workers or multiprocessing.cpu_count(),
+        'worker_class': 'gthread',
+        'threads': 4,
+        'preload_app': True,       # carrega a aplicação (e o dataset) antes do fork
+        'keepalive': 5,            # segundos mantendo conexões ociosas abertas
+        'graceful_timeout': 30,    # tempo para concluir requisições ao reiniciar
+        'timeout': 60,
+        'accesslog': '-',
+        'when_ready': monitorar_no_principal,
+        'post_fork': monitorar_no_worker,
+        'worker_exit': encerrar_worker,
+    }
+
+
+def monitorar_no_principal(servidor):
+    """Hook do gunicorn: o processo principal acompanha o CSV e aplica as novas versões"""
+    if usar_sqlite():
+        iniciar_monitoramento(INTERVALO_MONITORAMENTO, reconstruir=True)
+    else:
+        MonitorArquivo(recarregar_no_principal, INTERVALO_MONITORAMENTO, 'monitor-principal').iniciar()
+
+
+def monitorar_no_worker(servidor, worker):
+    """Hook do gunicorn: prepara cada worker recém-criado (threads não sobrevivem ao fork)"""
+    if usar_sqlite():
+        iniciar_monitoramento(INTERVALO_MONITORAMENTO, reconstruir=False)
+    else:
+        # A versão em uso é a herdada do processo principal, que recria os
+        # workers quando o CSV muda
+        dataset_operadoras.recarga_externa = True
+    metricas.iniciar_gravacao()
+
+
+def recarregar_no_principal():
+    """
+    Verificação do monitor do processo principal no backend em memória
+
+    Quando uma nova versão do CSV é carregada, ela é preparada para o fork e
+    o gunicorn é avisado (SIGHUP) para recriar os workers a partir dela. Os
+    workers antigos terminam as requisições em andamento na versão anterior.
+
+    Returns:
+        bool: True se os workers foram recriados com uma nova versão
+    """
+    if not dataset_operadoras.recarregar_se_mudou():
+        return False
+    preparar_para_fork(dataset_operadoras.atual())
+    os.kill(os.getpid(), signal.SIGHUP)
+    return True
+
+
+def encerrar_worker(servidor, worker):
+    """Hook do gunicorn: grava as métricas finais do worker, que continuam somadas na coleta"""
+    metricas.parar_gravacao()
+
+
+def carregar_dataset_compartilhado():
+    """
+    Carrega e indexa o dataset no processo principal, antes do fork
+
+    Returns:
+        bool: True se o dataset foi carregado
+    """
+    if not os.path.exists(dataset_operadoras.caminho_csv):
+        print(f"Aviso: {dataset_operadoras.caminho_csv} não encontrado; os workers iniciarão sem dados")
+        return False
+
+    if usar_sqlite():
+        # Só garante que o banco está atualizado; cada worker abre as próprias
+        # conexões somente leitura (conexões SQLite não podem atravessar o fork)
+        with banco_operadoras.conexao():
+            pass
+        banco_operadoras.fechar()
+        print(f"Banco SQLite pronto: {banco_operadoras.caminho_banco}")
+        return True
+
+    snapshot = dataset_operadoras.obter()
+    preparar_para_fork(snapshot)
+    print(f"Dataset carregado: {len(snapshot.df)} operadoras (versão {snapshot.versao})")
+    return True
+
+
+def preparar_para_fork(snapshot):
+    """Deixa o snapshot pronto para ser compartilhado pelos workers criados a seguir"""
+    snapshot.fragmentos.preparar()
+    # Move os objetos já criados para fora do coletor de lixo, para que ele
+    # não escreva nessas páginas nos workers e quebre o compartilhamento
+    gc.freeze()
+
+
+def iniciar_servidor_producao(workers=None, host='0.0.0.0', porta=5000):
+    """
+    Inicia a API com N workers pré-criados, compartilhando o dataset carregado
+
+    Args:
+        workers (int, optional): Número de processos; padrão é o número de CPUs
+        host (str): Endereço de escuta
+        porta (int): Porta de escuta
+
+    Returns:
+        bool: False se o modo de produção não estiver disponível
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("Erro: o modo de produção requer o gunicorn (pip install gunicorn), disponível apenas em Linux/macOS")
+        return False
+
+    class AplicacaoProducao(BaseApplication):
+        """Aplicação gunicorn configurada por código, sem arquivo externo"""
+
+        def __init__(self, aplicacao, opcoes):
+            self.aplicacao = aplicacao
+            self.opcoes = opcoes
+            super().__init__()
+
+        def load_config(self):
+            for chave, valor in self.opcoes.items():
+                self.cfg.set(chave, valor)
+
+        def load(self):
+            return self.aplicacao
+
+    opcoes = opcoes_padrao(workers, host, porta)
+    print(f"Iniciando servidor de produção em http://{host}:{porta} com {opcoes['workers']} workers")
+    carregar_dataset_compartilhado()
+    diretorio_metricas = tempfile.mkdtemp(prefix='operadoras-metricas-')
+    metricas.compartilhar(diretorio_metricas)
+    processo_principal = os.getpid()
+    try:
+        AplicacaoProducao(app, opcoes).run()
+    finally:
+        # Os workers são criados dentro do run() e também saem por aqui
+        # (SIGHUP, TTOU); só o processo principal remove o diretório
+        if os.getpid() == processo_principal:
+            shutil.rmtree(diretorio_metricas, ignore_errors=True)
+    return True
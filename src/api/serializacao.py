@@ -0,0 +1,97 @@
+"""
+Fragmentos JSON pré-serializados das operadoras.
+
+Cada linha do dataset é convertida para JSON uma única vez por versão, e as
+respostas de busca são montadas apenas concatenando os bytes já prontos das
+linhas selecionadas.
+"""
+
+import json
+
+# Linhas convertidas de cada vez ao preencher os fragmentos que faltam
+TAMANHO_BLOCO = 5000
+
+
+def serializar_registro(registro):
+    """
+    Serializa um registro como JSON compacto, preservando caracteres não-ASCII
+
+    Args:
+        registro (dict): Linha do DataFrame (coluna -> valor)
+
+    Returns:
+        bytes: Objeto JSON em UTF-8, com chaves ordenadas como no jsonify
+    """
+    return json.dumps(registro, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+class FragmentosJSON:
+    """
+    JSON de cada linha de um snapshot, gerado sob demanda e guardado
+
+    Uma linha é convertida na primeira vez em que aparece em uma resposta (ou
+    em preparar()) e reaproveitada pelas seguintes. Como o snapshot nunca muda,
+    duas threads que convertam a mesma linha produzem os mesmos bytes.
+
+    Attributes:
+        df (DataFrame): Dados das operadoras do snapshot
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._fragmentos = [None] * len(df)
+
+    def quantidade_pronta(self):
+        """
+        Returns:
+            int: Quantidade de linhas que já têm fragmento gerado
+        """
+        return sum(fragmento is not None for fragmento in self._fragmentos)
+
+    def _preencher(self, posicoes):
+        """Converte as linhas indicadas que ainda não têm fragmento"""
+        faltantes = [posicao for posicao in posicoes if self._fragmentos[posicao] is None]
+        for inicio in range(0, len(faltantes), TAMANHO_BLOCO):
+            bloco = faltantes[inicio:inicio + TAMANHO_BLOCO]
+            registros = self.df.iloc[bloco].to_dict('records')
+            for posicao, registro in zip(bloco, registros):
+                self._fragmentos[posicao] = serializar_registro(registro)
+
+    def preparar(self):
+        """Converte todas as linhas de uma vez (usado antes do fork dos workers)"""
+        self._preencher(range(len(self._fragmentos)))
+
+    def obter(self, posicoes):
+        """
+        Obtém o JSON das linhas indicadas
+
+        Args:
+            posicoes (ndarray ou list): Posições (iloc) das linhas
+
+        Returns:
+            list: Fragmentos (bytes) na mesma ordem das posições
+        """
+        posicoes = posicoes.tolist() if hasattr(posicoes, 'tolist') else list(posicoes)
+        self._preencher(posicoes)
+        return [self._fragmentos[posicao] for posicao in posicoes]
+
+    def montar_lista(self, posicoes, campo_extra=None, valores_extra=None):
+        """
+        Monta o corpo de uma resposta JSON com a lista das linhas indicadas
+
+        Args:
+            posicoes (ndarray ou list): Posições (iloc) das linhas, na ordem da resposta
+            campo_extra (str, optional): Campo acrescentado a cada objeto
+            valores_extra (list, optional): Valor do campo extra para cada linha
+
+        Returns:
+            bytes: Array JSON, terminado em nova linha como no jsonify
+        """
+        fragmentos = self.obter(posicoes)
+        if campo_extra is not None:
+            prefixo = b',' + json.dumps(campo_extra, ensure_ascii=False).encode('utf-8') + b':'
+            fragmentos = [
+                fragmento[:-1] + prefixo + json.dumps(valor).encode('utf-8') + b'}'
+                for fragmento, valor in zip(fragmentos, valores_extra)
+            ]
+        return b'[' + b','.join(fragmentos) + b']\n'
@@ -2,69 +2,478 @@
 Servidor Flask para API de busca de operadoras.
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, g
 from flask_cors import CORS
-import pandas as pd
 import os
+import json
+import time
 from pathlib import Path
-from src.api.filtros import aplicar_filtros, extrair_opcoes_unicas
+from src.api.filtros import (
+    selecionar_operadoras,
+    selecionar_operadoras_similares,
+    filtrar_texto,
+    contar_facetas,
+    localizar_operadoras,
+    sugerir_operadoras,
+    coluna_de_ordenacao,
+    COLUNAS_CHAVE_LOTE,
+    MAX_SUGESTOES
+)
+from src.api.dataset import DatasetOperadoras
+from src.api.banco_sqlite import BancoOperadoras
+from src.api.paginacao import codificar_cursor, codificar_cursor_banco, decodificar_cursor
+from src.api.cache import CacheResultados, BuscasEmAndamento, chave_da_busca
+from src.api.exportacao import FORMATOS_EXPORTACAO, gerar_ndjson, gerar_csv, gerar_ndjson_banco, gerar_csv_banco
+from src.api.estaticos import ArquivosEstaticos, aceita_gzip, comprimir_gzip
+from src.api.metricas import metricas
 
 app = Flask(__name__)
 app.config['JSON_AS_ASCII'] = False  # Isso garante que caracteres não-ASCII sejam preservados
-CORS(app)  # Permitir solicitações cross-origin
+CORS(app, expose_headers=['X-Proximo-Cursor'])  # Permitir solicitações cross-origin
 
 # Caminho para o arquivo CSV das operadoras
 CSV_PATH = Path('data/dados_ans/operadoras/Relatorio_cadop.csv')
 
-def buscar_operadoras(termo_busca='', limite=10, uf='', modalidade='', ordenacao='razao_social', ordem='asc'):
+# Backend da busca: 'memoria' (DataFrame e índices em memória) ou 'sqlite'
+# (banco indexado gerado a partir do CSV, aberto somente para leitura)
+BACKENDS_BUSCA = ('memoria', 'sqlite')
+app.config['BACKEND_BUSCA'] = os.environ.get('OPERADORAS_BACKEND', 'memoria')
+
+# Dataset mantido em memória, compartilhado por todas as requisições
+dataset_operadoras = DatasetOperadoras(CSV_PATH)
+
+# Banco SQLite usado quando BACKEND_BUSCA é 'sqlite'
+banco_operadoras = BancoOperadoras(CSV_PATH)
+
+# Cache das respostas de /api/operadoras (LRU limitado por memória)
+cache_resultados = CacheResultados(limite_bytes=32 * 1024 * 1024)
+
+# Buscas idênticas simultâneas são calculadas uma vez só (por processo)
+buscas_em_andamento = BuscasEmAndamento()
+
+# Diretório dos arquivos da interface, lidos e comprimidos uma vez na inicialização
+# (em modo debug, relidos quando algum deles muda)
+STATIC_DIR = Path(__file__).resolve().parent.parent.parent / 'static'
+arquivos_estaticos = ArquivosEstaticos(STATIC_DIR, verificar_alteracoes=app.debug)
+
+# Respostas JSON maiores que isto são comprimidas com gzip
+TAMANHO_MINIMO_GZIP_JSON = 1024
+
+# Quantidade máxima de chaves aceitas por requisição em /api/operadoras/lote
+MAX_CHAVES_LOTE = 10000
+
+# Medidores lidos no momento da coleta das métricas
+metricas.registrar_medidor('operadoras_dataset_linhas',
+                           lambda: len(dataset_operadoras.atual().df) if dataset_operadoras.atual() else 0,
+                           'Operadoras no dataset carregado em memoria')
+metricas.registrar_medidor('operadoras_cache_bytes', lambda: cache_resultados.bytes_usados,
+                           'Memoria ocupada pelo cache de respostas')
+metricas.registrar_medidor('operadoras_cache_entradas', lambda: cache_resultados.estatisticas()['entradas'],
+                           'Entradas no cache de respostas')
+metricas.registrar_medidor('operadoras_buscas_em_andamento', buscas_em_andamento.quantidade,
+                           'Buscas distintas sendo calculadas no momento')
+
+def usar_sqlite():
+    """Indica se a busca está configurada para o backend SQLite"""
+    return app.config.get('BACKEND_BUSCA') == 'sqlite'
+
+def versao_em_uso():
+    """Versão dos dados servida pelo backend configurado (usada nas chaves do cache)"""
+    if usar_sqlite():
+        return banco_operadoras.versao_em_uso()
+    return dataset_operadoras.versao_em_uso()
+
+def iniciar_monitoramento(intervalo=5.0, reconstruir=True):
     """
-    Busca e filtra operadoras com base em diversos criterios
+    Passa a recarregar os dados em segundo plano, sem bloquear as requisições
+
+    Enquanto a nova versão é lida e indexada, as requisições continuam usando
+    a anterior; a troca acontece de uma vez quando ela fica pronta.
+
+    Args:
+        intervalo (float): Segundos entre verificações do CSV
+        reconstruir (bool): No backend SQLite, se este processo regera o banco
+                            (False quando outro processo já faz isso)
+    """
+    if usar_sqlite():
+        banco_operadoras.iniciar_monitoramento(intervalo, reconstruir)
+    else:
+        dataset_operadoras.iniciar_monitoramento(intervalo)
+
+def iniciar_servidor_desenvolvimento(**opcoes):
+    """
+    Inicia o servidor de desenvolvimento do Flask (modo debug)
+
+    Os arquivos estáticos alterados em disco passam a ser relidos, sem
+    reiniciar o servidor.
+
+    Args:
+        **opcoes: Repassadas ao app.run (ex.: host, port)
+    """
+    arquivos_estaticos.verificar_alteracoes = True
+    iniciar_monitoramento()
+    app.run(debug=True, **opcoes)
+
+def buscar_pagina_sqlite(termo_busca, limite, uf, modalidade, ordenacao, ordem, cursor=None, facetas=False):
+    """
+    Mesma busca de buscar_pagina, traduzida em SQL sobre o banco indexado
+
+    Returns:
+        dict: No mesmo formato de buscar_pagina
+    """
+    if cursor is not None:
+        ordenacao, ordem = cursor['o'], cursor['d']
+    
+    with metricas.cronometrar('operadoras_etapa_segundos', etapa='consulta_sql'):
+        fragmentos, linhas, chaves, versao = banco_operadoras.buscar(termo_busca, uf, modalidade, ordenacao,
+                                                                     ordem, limite + 1, cursor)
+    
+    tem_proxima = len(fragmentos) > limite
+    fragmentos = fragmentos[:max(limite, 0)]
+    proximo_cursor = None
+    if tem_proxima and fragmentos:
+        proximo_cursor = codificar_cursor_banco(versao, ordenacao, ordem, chaves[len(fragmentos) - 1],
+                                                linhas[len(fragmentos) - 1])
+    
+    # O JSON de cada linha foi gravado no banco na ingestão; aqui só é concatenado
+    corpo = b'[' + b','.join(fragmentos) + b']\n'
+    if facetas:
+        with metricas.cronometrar('operadoras_etapa_segundos', etapa='facetas'):
+            corpo = envelope_com_facetas(corpo, banco_operadoras.contar_facetas(termo_busca, uf, modalidade))
+    metricas.incrementar('operadoras_linhas_retornadas_total', len(fragmentos))
+    return {'corpo': corpo, 'quantidade': len(fragmentos), 'proximo_cursor': proximo_cursor, 'versao': versao}
+
+def envelope_com_facetas(corpo, contagens, aproximadas=False):
+    """
+    Envolve o array JSON de resultados em um objeto com as facetas
+
+    Com aproximadas=True, o objeto leva "facetas_aproximadas": true (contagens
+    que podem estar abaixo do real, como na busca aproximada interrompida)
+    """
+    facetas = json.dumps(contagens, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    aviso = b',"facetas_aproximadas":true' if aproximadas else b''
+    return b'{"resultados":' + corpo.rstrip(b'\n') + b',"facetas":' + facetas + aviso + b'}\n'
+
+def buscar_pagina(termo_busca='', limite=10, uf='', modalidade='', ordenacao='razao_social', ordem='asc',
+                  cursor=None, modo='', facetas=False):
+    """
+    Busca uma página de operadoras, retornando também o cursor da página seguinte
+
+    Args:
+        cursor (dict, optional): Cursor decodificado da página anterior. Quando
+                                 informado, a ordenação gravada nele prevalece.
+        modo (str): 'fuzzy' para busca aproximada por nome, ordenada por
+                    similaridade (cada resultado traz o campo 'Similaridade');
+                    nesse modo não há paginação por cursor
+        facetas (bool): Se True, o corpo passa a ser {"resultados": [...],
+                        "facetas": {"UF": {...}, "Modalidade": {...}}} com a
+                        quantidade de resultados por UF e por modalidade (no
+                        modo fuzzy, com "facetas_aproximadas": true quando a
+                        busca foi interrompida antes de somar tudo)
+
+    Returns:
+        dict: {'corpo': bytes com o JSON da resposta, 'quantidade': int,
+               'proximo_cursor': str ou None, 'versao': str},
+              ou um dicionário de erro
     """
     # Verificar se o arquivo existe
-    if not os.path.exists(CSV_PATH):
+    if not os.path.exists(dataset_operadoras.caminho_csv):
         return {'erro': 'Arquivo de operadoras não encontrado'}
     
     try:
-        # Carregar o CSV
-        df = pd.read_csv(CSV_PATH, sep=';', encoding='utf-8')
+        if usar_sqlite() and modo != 'fuzzy':
+            return buscar_pagina_sqlite(termo_busca, limite, uf, modalidade, ordenacao, ordem, cursor, facetas)
+        
+        # Obter o CSV já carregado em memória (relido apenas se o arquivo mudou)
+        with metricas.cronometrar('operadoras_etapa_segundos', etapa='carga'):
+            snapshot = dataset_operadoras.obter()
+        
+        if modo == 'fuzzy' and termo_busca:
+            # Uma só passada: a página e todas as linhas parecidas com o termo
+            posicoes, similaridades, candidatas, completas = selecionar_operadoras_similares(
+                snapshot, termo_busca, uf, modalidade, limite, candidatas=True)
+            with metricas.cronometrar('operadoras_etapa_segundos', etapa='serializacao'):
+                corpo = snapshot.fragmentos.montar_lista(
+                    posicoes, 'Similaridade', [round(s, 3) for s in similaridades.tolist()])
+            if facetas:
+                # As facetas contam todas as linhas parecidas com o termo, não só
+                # as da página; como na busca exata, cada uma ignora o próprio
+                # filtro. Se a busca foi interrompida pelo volume ou pelo tempo,
+                # as contagens são marcadas como aproximadas
+                corpo = envelope_com_facetas(corpo, contar_facetas(snapshot, candidatas, uf, modalidade),
+                                             aproximadas=not completas)
+            metricas.incrementar('operadoras_linhas_retornadas_total', len(posicoes))
+            return {'corpo': corpo, 'quantidade': len(posicoes), 'proximo_cursor': None,
+                    'versao': snapshot.versao}
         
-        # Aplicar filtros avançados
-        df_filtrado = aplicar_filtros(df, termo_busca, uf, modalidade, ordenacao, ordem)
+        if cursor is not None:
+            ordenacao, ordem = cursor['o'], cursor['d']
         
-        # Limitar quantidade de resultados
-        resultados = df_filtrado.head(limite)
+        # Aplicar filtros avançados e selecionar apenas os primeiros resultados;
+        # uma linha a mais indica se existe página seguinte
+        linhas_texto = filtrar_texto(snapshot, termo_busca)
+        posicoes = selecionar_operadoras(snapshot, termo_busca, uf, modalidade, ordenacao, ordem,
+                                         limite + 1, cursor, linhas_texto)
         
-        return resultados.to_dict('records')
+        tem_proxima = len(posicoes) > limite
+        posicoes = posicoes[:max(limite, 0)]
+        
+        proximo_cursor = None
+        if tem_proxima and len(posicoes) > 0:
+            proximo_cursor = codificar_cursor(snapshot, ordenacao, ordem,
+                                              coluna_de_ordenacao(ordenacao), posicoes[-1])
+        
+        # O JSON de cada linha é gerado uma vez por versão; aqui só é concatenado
+        with metricas.cronometrar('operadoras_etapa_segundos', etapa='serializacao'):
+            corpo = snapshot.fragmentos.montar_lista(posicoes)
+        if facetas:
+            corpo = envelope_com_facetas(corpo, contar_facetas(snapshot, linhas_texto, uf, modalidade))
+        metricas.incrementar('operadoras_linhas_retornadas_total', len(posicoes))
+        return {
+            'corpo': corpo,
+            'quantidade': len(posicoes),
+            'proximo_cursor': proximo_cursor,
+            'versao': snapshot.versao,
+        }
     except Exception as e:
         return {'error': str(e)}
 
+def buscar_operadoras(termo_busca='', limite=10, uf='', modalidade='', ordenacao='razao_social', ordem='asc'):
+    """
+    Busca e filtra operadoras com base em diversos criterios
+    """
+    pagina = buscar_pagina(termo_busca, limite, uf, modalidade, ordenacao, ordem)
+    if 'corpo' not in pagina:
+        return pagina
+    return json.loads(pagina['corpo'])
+
 # Adicionar rota para obter opções de filtro
 @app.route('/api/opcoes-filtro', methods=['GET'])
 def api_opcoes_filtro():
-    """API endpoint para obter opções de filtro"""
-    if not os.path.exists(CSV_PATH):
+    """
+    API endpoint para obter opções de filtro
+    
+    As opções são calculadas uma vez por versão do dataset. A resposta leva
+    ETag e Last-Modified dessa versão, e requisições condicionais recebem
+    304 sem que nada seja recalculado.
+    """
+    if not os.path.exists(dataset_operadoras.caminho_csv):
         return jsonify({'erro': 'Arquivo de operadoras não encontrado'})
     
     try:
-        df = pd.read_csv(CSV_PATH, sep=';', encoding='utf-8')
-        opcoes = extrair_opcoes_unicas(df)
-        return jsonify(opcoes)
+        if usar_sqlite():
+            with banco_operadoras.conexao() as banco:
+                response = jsonify(banco.opcoes_filtro)
+                response.set_etag(banco.versao)
+            response.last_modified = os.path.getmtime(banco_operadoras.caminho_banco)
+        else:
+            snapshot = dataset_operadoras.obter()
+            response = jsonify(snapshot.opcoes_filtro)
+            response.set_etag(snapshot.versao)
+            response.last_modified = snapshot.modificado_em
+        response.cache_control.no_cache = True  # sempre revalidar, o 304 é barato
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)})
 
+def resposta_busca(corpo, proximo_cursor, origem_cache, corpo_gzip=None):
+    """
+    Monta a resposta de /api/operadoras a partir do JSON já serializado
+
+    Quando há uma versão comprimida pronta (guardada no cache junto com a
+    original) e o cliente aceita gzip, ela é enviada sem comprimir de novo.
+    """
+    if corpo_gzip is not None and aceita_gzip():
+        response = Response(corpo_gzip, content_type='application/json; charset=utf-8')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(corpo, content_type='application/json; charset=utf-8')
+    if corpo_gzip is not None:
+        response.vary.add('Accept-Encoding')
+    response.headers['X-Cache'] = origem_cache
+    if proximo_cursor:
+        response.headers['X-Proximo-Cursor'] = proximo_cursor
+    return response
+
 # Rota de API para buscar operadoras
 @app.route('/api/operadoras', methods=['GET'])
 def api_buscar_operadoras():
-    termo_busca = request.args.get('q', '')
+    # Espaços nas pontas são removidos aqui, para que a busca e a chave do cache
+    # usem exatamente os mesmos valores
+    termo_busca = request.args.get('q', '').strip()
     limite = int(request.args.get('limite', 10))
+    uf = request.args.get('uf', '').strip()
+    modalidade = request.args.get('modalidade', '').strip()
+    ordenacao = request.args.get('ordenacao', 'razao_social')
+    ordem = request.args.get('ordem', 'asc')
+    cursor_recebido = request.args.get('cursor', '')
+    modo = request.args.get('modo', '').lower()
+    facetas = request.args.get('facetas', '').lower() in ('1', 'true', 'sim')
+
+    cursor = None
+    if cursor_recebido:
+        try:
+            cursor = decodificar_cursor(cursor_recebido)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+    # Buscas repetidas são respondidas direto do cache, sem filtrar nem serializar
+    chave = chave_da_busca(termo_busca, limite, uf, modalidade, ordenacao, ordem, cursor_recebido, modo, facetas)
+    versao = None
+    if os.path.exists(dataset_operadoras.caminho_csv):
+        versao = versao_em_uso()
+        em_cache = cache_resultados.obter(versao, chave)
+        if em_cache is not None:
+            metricas.incrementar('operadoras_cache_total', resultado='acerto')
+            corpo, proximo_cursor, corpo_gzip = em_cache
+            return resposta_busca(corpo, proximo_cursor, 'HIT', corpo_gzip)
+        metricas.incrementar('operadoras_cache_total', resultado='falha')
+
+    def calcular():
+        pagina = buscar_pagina(termo_busca, limite, uf, modalidade, ordenacao, ordem, cursor, modo, facetas)
+        if 'corpo' in pagina:
+            # Respostas grandes são comprimidas uma vez aqui e guardadas nas duas
+            # versões: os acertos no cache não pagam a compressão de novo
+            pagina['corpo_gzip'] = None
+            if len(pagina['corpo']) >= TAMANHO_MINIMO_GZIP_JSON:
+                pagina['corpo_gzip'] = comprimir_gzip(pagina['corpo'], nivel=5)
+            cache_resultados.guardar(pagina['versao'], chave,
+                                     (pagina['corpo'], pagina['proximo_cursor'], pagina['corpo_gzip']),
+                                     len(pagina['corpo']) + len(pagina['corpo_gzip'] or b'')
+                                     + len(pagina['proximo_cursor'] or ''))
+        return pagina
+
+    # Requisições idênticas que chegam durante o cálculo esperam por ele em vez de repeti-lo
+    pagina, compartilhada = buscas_em_andamento.executar((versao, chave), calcular)
+    if compartilhada:
+        metricas.incrementar('operadoras_buscas_compartilhadas_total')
+    if 'corpo' not in pagina:
+        return jsonify(pagina)
+    return resposta_busca(pagina['corpo'], pagina['proximo_cursor'], 'SHARED' if compartilhada else 'MISS',
+                          pagina['corpo_gzip'])
+
+# Rota para exportar todas as operadoras filtradas
+@app.route('/api/operadoras/exportar', methods=['GET'])
+def api_exportar_operadoras():
+    """
+    Exporta o resultado filtrado completo em NDJSON ou CSV
+    
+    Aceita os mesmos filtros de /api/operadoras (sem limite) e envia as
+    linhas em blocos, à medida que são convertidas.
+    """
+    termo_busca = request.args.get('q', '')
     uf = request.args.get('uf', '')
     modalidade = request.args.get('modalidade', '')
     ordenacao = request.args.get('ordenacao', 'razao_social')
     ordem = request.args.get('ordem', 'asc')
+    formato = request.args.get('formato', 'ndjson').lower()
+
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({'erro': f"Formato inválido. Use: {', '.join(FORMATOS_EXPORTACAO)}"}), 400
+
+    if not os.path.exists(dataset_operadoras.caminho_csv):
+        return jsonify({'erro': 'Arquivo de operadoras não encontrado'})
 
-    resultados = buscar_operadoras(termo_busca, limite, uf, modalidade, ordenacao, ordem)
-    response = jsonify(resultados)
-    response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    try:
+        if usar_sqlite():
+            colunas, blocos = banco_operadoras.exportar(termo_busca, uf, modalidade, ordenacao, ordem)
+            corpo = gerar_ndjson_banco(blocos) if formato == 'ndjson' else gerar_csv_banco(colunas, blocos)
+        else:
+            snapshot = dataset_operadoras.obter()
+            posicoes = selecionar_operadoras(snapshot, termo_busca, uf, modalidade, ordenacao, ordem,
+                                             len(snapshot.df))
+            if formato == 'ndjson':
+                corpo = gerar_ndjson(snapshot.fragmentos, posicoes)
+            else:
+                corpo = gerar_csv(snapshot.df, posicoes)
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
+    response = Response(corpo, content_type=FORMATOS_EXPORTACAO[formato])
+    response.headers['Content-Disposition'] = f'attachment; filename=operadoras.{formato}'
+    return response
+
+# Rota para resolver muitas chaves em uma única requisição
+@app.route('/api/operadoras/lote', methods=['POST'])
+def api_buscar_operadoras_lote():
+    """
+    Busca exata de várias operadoras por Registro ANS ou CNPJ
+    
+    Corpo (JSON): {"chaves": ["123456", "12.345.678/0001-90", ...],
+                   "tipo": "auto" | "registro_ans" | "cnpj"}
+    
+    Cada chave é resolvida em um índice hash montado na carga do dataset,
+    e a resposta informa, para cada uma, se foi encontrada.
+    """
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict) or not isinstance(dados.get('chaves'), list):
+        return jsonify({'erro': 'Envie um JSON com a lista "chaves"'}), 400
+
+    chaves = dados['chaves']
+    tipo = str(dados.get('tipo', 'auto')).lower()
+    if tipo not in COLUNAS_CHAVE_LOTE:
+        return jsonify({'erro': f"Tipo inválido. Use: {', '.join(COLUNAS_CHAVE_LOTE)}"}), 400
+    if len(chaves) > MAX_CHAVES_LOTE:
+        return jsonify({'erro': f'Máximo de {MAX_CHAVES_LOTE} chaves por requisição'}), 400
+
+    if not os.path.exists(dataset_operadoras.caminho_csv):
+        return jsonify({'erro': 'Arquivo de operadoras não encontrado'})
+
+    try:
+        if usar_sqlite():
+            operadoras = banco_operadoras.localizar(chaves, tipo)
+        else:
+            snapshot = dataset_operadoras.obter()
+            linhas = localizar_operadoras(snapshot, chaves, tipo)
+            registros = iter(snapshot.df.iloc[[linha for linha in linhas if linha is not None]].to_dict('records'))
+            operadoras = [next(registros) if linha is not None else None for linha in linhas]
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
+    resultados = [
+        {'chave': chave, 'encontrado': operadora is not None, 'operadora': operadora}
+        for chave, operadora in zip(chaves, operadoras)
+    ]
+    encontrados = sum(operadora is not None for operadora in operadoras)
+    return jsonify({
+        'resultados': resultados,
+        'encontrados': encontrados,
+        'nao_encontrados': len(chaves) - encontrados
+    })
+
+# Rota de sugestões enquanto o usuário digita
+@app.route('/api/operadoras/autocompletar', methods=['GET'])
+def api_autocompletar_operadoras():
+    """
+    Sugere operadoras cujo nome ou Registro ANS começa com o texto digitado
+    
+    Parâmetros: q (início do texto) e limite (padrão 8, no máximo
+    MAX_SUGESTOES). A busca usa chaves ordenadas e busca binária, para
+    aguentar uma requisição por tecla.
+    """
+    prefixo = request.args.get('q', '')
+    try:
+        limite = int(request.args.get('limite', 8))
+    except ValueError:
+        limite = 0
+    if limite < 1:
+        return jsonify({'erro': 'O parâmetro limite deve ser um número inteiro positivo'}), 400
+    limite = min(limite, MAX_SUGESTOES)
+
+    if not os.path.exists(dataset_operadoras.caminho_csv):
+        return jsonify({'erro': 'Arquivo de operadoras não encontrado'})
+
+    try:
+        if usar_sqlite():
+            response = jsonify(banco_operadoras.sugerir(prefixo, limite))
+        else:
+            response = jsonify(sugerir_operadoras(dataset_operadoras.obter(), prefixo, limite))
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
+    # Apagar e redigitar letras repete prefixos: o navegador pode reaproveitar
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
     return response
 
 # Rota principal para verificar se o servidor está funcionando
@@ -73,23 +482,64 @@ def api_status():
     """Rota para verificar status da API"""
     return jsonify({
         "status": "Servidor funcionando", 
-        "endpoints": ["/api/operadoras"]
+        "endpoints": ["/api/operadoras", "/api/operadoras/exportar", "/api/operadoras/lote",
+                      "/api/operadoras/autocompletar", "/api/metrics"],
+        "cache": cache_resultados.estatisticas()
     })
 
+# Rota com as métricas do processo no formato do Prometheus
+@app.route('/api/metrics', methods=['GET'])
+def api_metricas():
+    """Exporta contadores e histogramas de latência no formato texto do Prometheus"""
+    return Response(metricas.formato_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.before_request
+def iniciar_cronometro():
+    """Marca o início da requisição para a métrica de latência total"""
+    g.inicio_requisicao = time.perf_counter()
+
+@app.after_request
+def registrar_metricas_requisicao(response):
+    """Registra a latência total e o status de cada requisição, por rota"""
+    inicio = g.pop('inicio_requisicao', None)
+    if inicio is not None:
+        rota = request.url_rule.rule if request.url_rule is not None else 'desconhecida'
+        metricas.observar('operadoras_requisicao_segundos', time.perf_counter() - inicio, rota=rota)
+        metricas.incrementar('operadoras_requisicoes_total', rota=rota, status=response.status_code)
+    return response
+
+@app.after_request
+def comprimir_json(response):
+    """Comprime com gzip as respostas JSON grandes quando o cliente aceita"""
+    if (response.mimetype == 'application/json'
+            and response.status_code == 200
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and 'Content-Encoding' not in response.headers
+            and 'ETag' not in response.headers
+            and aceita_gzip()):
+        corpo = response.get_data()
+        if len(corpo) >= TAMANHO_MINIMO_GZIP_JSON:
+            response.set_data(comprimir_gzip(corpo, nivel=5))
+            response.headers['Content-Encoding'] = 'gzip'
+            response.vary.add('Accept-Encoding')
+    return response
+
 # Rota para servir o HTML da interface
 @app.route('/')
 def serve_index():
     """Rota para servir a página principal"""
-    # Obtém o caminho absoluto para o diretório static
-    static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../static'))
-    return send_from_directory(static_dir, 'index.html')
+    return serve_static('index.html')
 
 @app.route('/<path:path>')
 def serve_static(path):
     """Rota para servir arquivos estáticos"""
-    # Obtém o caminho absoluto para o diretório static
-    static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../static'))
-    return send_from_directory(static_dir, path)
+    arquivo = arquivos_estaticos.obter(path)
+    if arquivo is not None:
+        return arquivos_estaticos.responder(arquivo)
+    # Arquivos criados depois da inicialização são lidos do disco
+    return send_from_directory(STATIC_DIR, path)
+
 def main():
     """
     Função principal para o teste de API
@@ -101,7 +551,7 @@ def main():
     print("Iniciando servidor em http://localhost:5000")
     print("Para encerrar o servidor, pressione CTRL+C")
     
-    app.run(debug=True)
+    iniciar_servidor_desenvolvimento()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
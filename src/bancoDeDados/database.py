@@ -5,13 +5,23 @@ Funções para baixar, processar e analisar dados da ANS e gerar scripts SQL.
 import os
 from pathlib import Path
 import datetime
+import queue
+import threading
 import zipfile
 import pandas as pd
 
 # Importar funções do módulo de web scraping
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.webScraping.scraper import baixar_arquivo, criar_zip, baixar_multiplos_arquivos
+from src.webScraping.downloads import GerenciadorDownloads
+from src.webScraping.descoberta import descobrir_arquivos
+from src.api.banco_sqlite import construir_banco, banco_atualizado
+
+# Downloads simultâneos permitidos no servidor de dados abertos da ANS
+LIMITES_POR_HOST = {'dadosabertos.ans.gov.br': 4}
+
+# Diretório com uma pasta por ano com os arquivos trimestrais das demonstrações contábeis
+URL_DEMONSTRACOES = "https://dadosabertos.ans.gov.br/FTP/PDA/demonstracoes_contabeis"
 
 def extrair_arquivos_zip(arquivos_zip, diretorio_destino):
     """
@@ -44,6 +54,43 @@ def extrair_arquivos_zip(arquivos_zip, diretorio_destino):
     
     return arquivos_extraidos
 
+def extrair_arquivo_zip(arquivo_zip, diretorio_destino):
+    """
+    Extrai um arquivo ZIP membro a membro, entregando cada arquivo extraído
+    
+    Membros já extraídos de uma versão igual ou mais nova do ZIP (mesmo
+    tamanho e gravados depois dele) não são extraídos de novo.
+    
+    Args:
+        arquivo_zip (str ou Path): Arquivo ZIP a ser extraído
+        diretorio_destino (str ou Path): Diretório onde os arquivos serão extraídos
+        
+    Yields:
+        Path: Caminho de cada arquivo extraído, assim que fica pronto
+    """
+    if isinstance(diretorio_destino, str):
+        diretorio_destino = Path(diretorio_destino)
+    diretorio_destino.mkdir(parents=True, exist_ok=True)
+    modificado_zip = os.stat(arquivo_zip).st_mtime_ns
+    
+    with zipfile.ZipFile(arquivo_zip, 'r') as zip_ref:
+        for membro in zip_ref.infolist():
+            if membro.is_dir():
+                continue
+            destino = diretorio_destino / membro.filename
+            if destino.exists():
+                info = destino.stat()
+                if info.st_size == membro.file_size and info.st_mtime_ns >= modificado_zip:
+                    yield destino
+                    continue
+            try:
+                extraido = Path(zip_ref.extract(membro, diretorio_destino))
+            except Exception:
+                # Não deixar um membro pela metade (ou com CRC inválido) no destino
+                destino.unlink(missing_ok=True)
+                raise
+            yield extraido
+
 def analisar_estrutura_arquivos(diretorio_dados):
     """
     Analisa a estrutura dos arquivos baixados para ajudar a criar os scripts SQL
@@ -70,25 +117,121 @@ def analisar_estrutura_arquivos(diretorio_dados):
     estrutura = {}
     
     for arquivo in arquivos_csv:
-        try:
-            df = pd.read_csv(arquivo, sep=';', encoding='latin1', nrows=5)
-            
-            print(f"\nArquivo: {arquivo}")
-            print(f"Dimensões: {df.shape[0]} linhas x {df.shape[1]} colunas")
-            print("Colunas:")
-            for col in df.columns:
-                print(f"  - {col}")
-            
-            estrutura[str(arquivo)] = {
-                'colunas': list(df.columns),
-                'linhas': df.shape[0],
-                'encoding': 'latin1'
-            }
-        except Exception as e:
-            print(f"Erro ao analisar {arquivo}: {e}")
+        informacoes = analisar_arquivo_csv(arquivo)
+        if informacoes:
+            estrutura[str(arquivo)] = informacoes
     
     return estrutura
 
+def analisar_arquivo_csv(arquivo):
+    """
+    Analisa a estrutura (colunas) de um arquivo CSV
+    
+    Args:
+        arquivo (str ou Path): Arquivo CSV a ser analisado
+        
+    Returns:
+        dict ou None: Colunas, linhas lidas e encoding, ou None se não foi possível ler
+    """
+    try:
+        df = pd.read_csv(arquivo, sep=';', encoding='latin1', nrows=5)
+        
+        print(f"\nArquivo: {arquivo}")
+        print(f"Dimensões: {df.shape[0]} linhas x {df.shape[1]} colunas")
+        print("Colunas:")
+        for col in df.columns:
+            print(f"  - {col}")
+        
+        return {
+            'colunas': list(df.columns),
+            'linhas': df.shape[0],
+            'encoding': 'latin1'
+        }
+    except Exception as e:
+        print(f"Erro ao analisar {arquivo}: {e}")
+        return None
+
+def processar_em_fluxo(downloads, tarefas, diretorio_extraidos, manter_zips=True):
+    """
+    Baixa, extrai e analisa os arquivos em etapas sobrepostas
+    
+    Cada ZIP é extraído assim que o seu download termina, enquanto os demais
+    continuam sendo baixados, e cada CSV extraído (ou baixado diretamente) é
+    analisado assim que fica pronto, sem esperar o fim de todos os downloads.
+    Um ZIP corrompido é registrado em 'erros' e apagado (para ser baixado de
+    novo na próxima execução), sem interromper os demais arquivos.
+    
+    Args:
+        downloads (GerenciadorDownloads): Gerenciador usado nos downloads
+        tarefas (list): Pares (url, destino) dos arquivos a baixar
+        diretorio_extraidos (str ou Path): Diretório onde os ZIPs são extraídos
+        manter_zips (bool): Se False, cada ZIP é apagado logo depois de extraído,
+                            reduzindo o espaço em disco ocupado (mas a próxima
+                            execução precisará baixá-lo de novo)
+        
+    Returns:
+        dict: 'arquivos' (resultado de cada tarefa, na ordem das tarefas; False
+              se o download ou a extração falhou), 'extraidos' (arquivos
+              extraídos), 'estrutura' (análise dos CSVs) e 'erros' (pares
+              (arquivo, mensagem) dos arquivos que não puderam ser extraídos)
+    """
+    fila = queue.Queue()
+    resultados = [False] * len(tarefas)
+    
+    def extrair(arquivo):
+        if zipfile.is_zipfile(arquivo):
+            print(f"Extraindo {arquivo}...")
+            for extraido in extrair_arquivo_zip(arquivo, diretorio_extraidos):
+                fila.put(('extraido', extraido))
+            if not manter_zips:
+                Path(arquivo).unlink()
+        elif Path(arquivo).suffix.lower() == '.zip':
+            raise zipfile.BadZipFile('o arquivo baixado não é um ZIP válido')
+        else:
+            fila.put(('baixado', Path(arquivo)))
+    
+    def baixar_e_extrair():
+        try:
+            for indice, arquivo in downloads.baixar_em_fluxo(tarefas):
+                resultados[indice] = arquivo
+                if not arquivo:
+                    continue
+                try:
+                    extrair(arquivo)
+                except Exception as e:
+                    # Só este arquivo é descartado; os demais seguem normalmente
+                    resultados[indice] = False
+                    Path(arquivo).unlink(missing_ok=True)
+                    fila.put(('erro', (Path(arquivo), str(e))))
+        finally:
+            fila.put(None)
+    
+    # Downloads e extração correm em segundo plano; a análise, nesta thread
+    etapa_extracao = threading.Thread(target=baixar_e_extrair, name='extracao', daemon=True)
+    etapa_extracao.start()
+    
+    arquivos_extraidos = []
+    estrutura = {}
+    erros = []
+    while True:
+        item = fila.get()
+        if item is None:
+            break
+        tipo, valor = item
+        if tipo == 'erro':
+            print(f"Erro ao extrair {valor[0]}: {valor[1]}")
+            erros.append(valor)
+            continue
+        if tipo == 'extraido':
+            arquivos_extraidos.append(valor)
+        if valor.suffix.lower() == '.csv':
+            informacoes = analisar_arquivo_csv(valor)
+            if informacoes:
+                estrutura[str(valor)] = informacoes
+    etapa_extracao.join()
+    
+    return {'arquivos': resultados, 'extraidos': arquivos_extraidos, 'estrutura': estrutura, 'erros': erros}
+
 def obter_script_sql(nome_script):
     """
     Lê o conteúdo de um arquivo SQL
@@ -189,7 +332,7 @@ def preparar_scripts_sql(diretorio_sql):
     
     return scripts
 
-def main():
+def main(manter_zips=True):
     """
     Função principal para o teste de Banco de Dados
     
@@ -198,6 +341,11 @@ def main():
     3. Cria queries para estruturar tabelas
     4. Elabora queries para importar o conteúdo dos arquivos
     5. Desenvolve queries analíticas
+    
+    Args:
+        manter_zips (bool): Se False, cada ZIP é apagado logo depois de extraído,
+                            reduzindo o pico de espaço em disco (a próxima
+                            execução precisará baixá-lo de novo)
     """
     # Obter o ano e mês atual
     data_atual = datetime.datetime.now()
@@ -225,40 +373,44 @@ def main():
     print(f"Data atual: {data_atual.strftime('%Y-%m-%d')}")
     print(f"Anos para análise: {', '.join(map(str, anos))}")
     
-    # Download do arquivo de operadoras
+    # Arquivo de operadoras e arquivos trimestrais (ZIP) de cada ano, baixados em paralelo.
+    # Arquivos que não mudaram no servidor desde a última execução não são baixados de novo
     url_operadoras = "https://dadosabertos.ans.gov.br/FTP/PDA/operadoras_de_plano_de_saude_ativas/Relatorio_cadop.csv"
-    arquivo_operadoras = baixar_arquivo(url_operadoras, diretorio_operadoras / "Relatorio_cadop.csv")
-    
-    # Para as demonstrações contábeis, vamos baixar os arquivos trimestrais de cada ano
-    arquivos_demonstracoes = []
-    for ano in anos:
-        # Diretório específico para cada ano
-        diretorio_ano = diretorio_demonstracoes / str(ano)
-        diretorio_ano.mkdir(exist_ok=True)
-        
-        # URLs de arquivos trimestrais (arquivos ZIP)
-        urls_arquivos = [
-            f"https://dadosabertos.ans.gov.br/FTP/PDA/demonstracoes_contabeis/{ano}/1T{ano}.zip",
-            f"https://dadosabertos.ans.gov.br/FTP/PDA/demonstracoes_contabeis/{ano}/2T{ano}.zip",
-            f"https://dadosabertos.ans.gov.br/FTP/PDA/demonstracoes_contabeis/{ano}/3T{ano}.zip",
-            f"https://dadosabertos.ans.gov.br/FTP/PDA/demonstracoes_contabeis/{ano}/4T{ano}.zip"
-        ]
+    tarefas = [(url_operadoras, diretorio_operadoras / "Relatorio_cadop.csv")]
+    with GerenciadorDownloads(limites_por_host=LIMITES_POR_HOST,
+                              manifesto=diretorio_base / "manifesto_downloads.json") as downloads:
+        for ano in anos:
+            # Diretório específico para cada ano
+            diretorio_ano = diretorio_demonstracoes / str(ano)
+            diretorio_ano.mkdir(exist_ok=True)
+            
+            # Só os arquivos já publicados (trimestres futuros não existem no servidor)
+            arquivos_ano = descobrir_arquivos(
+                f"{URL_DEMONSTRACOES}/{ano}/", padrao=r'\.zip$',
+                candidatos=[f"{trimestre}T{ano}.zip" for trimestre in range(1, 5)],
+                downloads=downloads)
+            print(f"{ano}: {len(arquivos_ano)} arquivos publicados "
+                  f"({sum(arquivo['tamanho'] or 0 for arquivo in arquivos_ano) / 1024**2:.1f} MB)")
+            tarefas.extend((arquivo['url'], diretorio_ano / arquivo['nome']) for arquivo in arquivos_ano)
         
-        # Tentar baixar cada arquivo trimestral
-        for url in urls_arquivos:
-            nome_arquivo = url.split('/')[-1]
-            arquivo_baixado = baixar_arquivo(url, diretorio_ano / nome_arquivo)
-            if arquivo_baixado:
-                arquivos_demonstracoes.append(arquivo_baixado)
-    
-    # Extrair arquivos ZIP
-    arquivos_extraidos = []
-    if arquivos_demonstracoes:
-        diretorio_extraidos = diretorio_demonstracoes / "extraidos"
-        arquivos_extraidos = extrair_arquivos_zip(arquivos_demonstracoes, diretorio_extraidos)
-    
-    # Analisar estrutura dos arquivos
-    estrutura = analisar_estrutura_arquivos(diretorio_base)
+        # Cada ZIP é extraído enquanto os próximos são baixados, e os CSVs são
+        # analisados à medida que ficam prontos
+        fluxo = processar_em_fluxo(downloads, tarefas, diretorio_demonstracoes / "extraidos",
+                                   manter_zips=manter_zips)
+    
+    resultados = fluxo['arquivos']
+    arquivos_extraidos = fluxo['extraidos']
+    estrutura = fluxo['estrutura']
+    arquivo_operadoras = resultados[0]
+    arquivos_demonstracoes = [arquivo for arquivo in resultados[1:] if arquivo]
+    
+    # Gerar o banco SQLite consultado pela API quando configurada com OPERADORAS_BACKEND=sqlite
+    if arquivo_operadoras:
+        try:
+            if not banco_atualizado(arquivo_operadoras):
+                construir_banco(arquivo_operadoras)
+        except Exception as e:
+            print(f"Aviso: não foi possível gerar o banco SQLite de consulta: {str(e)}")
     
     # Preparar scripts SQL
     scripts = preparar_scripts_sql(diretorio_sql)
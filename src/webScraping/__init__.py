@@ -11,10 +11,14 @@ from src.webScraping.scraper import (
     baixar_multiplos_arquivos,
     principal
 )
+from src.webScraping.downloads import GerenciadorDownloads
+from src.webScraping.descoberta import descobrir_arquivos
 
 __all__ = [
     'baixar_arquivo',
     'criar_zip',
     'baixar_multiplos_arquivos',
-    'principal'
+    'principal',
+    'GerenciadorDownloads',
+    'descobrir_arquivos'
 ]
\ No newline at end of file
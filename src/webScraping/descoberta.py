@@ -0,0 +1,117 @@
+"""
+Descoberta dos arquivos publicados nos diretórios de dados abertos da ANS.
+
+Em vez de montar as URLs dos arquivos às cegas (e pagar uma requisição com
+timeout por arquivo ainda não publicado), lê a listagem do diretório remoto
+e consulta o tamanho de cada arquivo com requisições HEAD em paralelo. Se o
+servidor não oferecer a listagem, verifica uma lista de nomes candidatos.
+"""
+
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, unquote
+
+import requests
+
+from src.webScraping.downloads import GerenciadorDownloads
+
+
+class _LeitorLinks(HTMLParser):
+    """Coleta os destinos dos links (<a href>) de uma página HTML"""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, atributos):
+        if tag == 'a':
+            href = dict(atributos).get('href')
+            if href:
+                self.links.append(href)
+
+
+def ler_listagem(html, url_diretorio):
+    """
+    Extrai os arquivos de uma página de listagem de diretório (Apache, nginx etc.)
+
+    Links para o diretório pai, subdiretórios, outros sites e ordenação da
+    listagem (?C=N;O=D) são ignorados.
+
+    Args:
+        html (str): Conteúdo da página de listagem
+        url_diretorio (str): URL do diretório listado
+
+    Returns:
+        list: Pares (nome, url) dos arquivos do diretório, sem repetições
+    """
+    if not url_diretorio.endswith('/'):
+        url_diretorio += '/'
+    leitor = _LeitorLinks()
+    leitor.feed(html)
+
+    arquivos = {}
+    for href in leitor.links:
+        url = urljoin(url_diretorio, href)
+        partes = urlsplit(url)
+        if partes.query or partes.fragment or not url.startswith(url_diretorio):
+            continue
+        nome = unquote(url[len(url_diretorio):])
+        if nome and '/' not in nome:
+            arquivos.setdefault(nome, url)
+    return list(arquivos.items())
+
+
+def descobrir_arquivos(url_diretorio, padrao=None, candidatos=None, downloads=None):
+    """
+    Lista os arquivos que existem de fato em um diretório remoto, com seus tamanhos
+
+    Lê a listagem do diretório; se ela não estiver disponível, consulta os
+    nomes candidatos. Em ambos os casos, os tamanhos vêm de requisições HEAD
+    feitas em paralelo, reaproveitando as conexões do gerenciador.
+
+    Args:
+        url_diretorio (str): URL do diretório (ex.: '.../demonstracoes_contabeis/2024/')
+        padrao (str, optional): Expressão regular que o nome do arquivo deve conter
+                                (ex.: r'\\.zip$'); se None, aceita todos
+        candidatos (list, optional): Nomes verificados quando não há listagem
+        downloads (GerenciadorDownloads, optional): Gerenciador cujas sessões e
+                                                    limites por host são usados
+
+    Returns:
+        list: Dicionários {'nome', 'url', 'tamanho'} ordenados pelo nome; tamanho
+              é None se o servidor não o informa
+    """
+    if not url_diretorio.endswith('/'):
+        url_diretorio += '/'
+    proprio = downloads is None
+    if proprio:
+        downloads = GerenciadorDownloads()
+
+    try:
+        arquivos = None
+        try:
+            resposta = downloads.sessao(url_diretorio).get(url_diretorio, timeout=downloads.timeout)
+            if resposta.status_code == 200 and 'html' in resposta.headers.get('Content-Type', ''):
+                arquivos = ler_listagem(resposta.text, url_diretorio) or None
+            else:
+                print(f"Listagem de {url_diretorio} indisponível (código {resposta.status_code})")
+        except requests.exceptions.RequestException as e:
+            print(f"Erro ao ler a listagem de {url_diretorio}: {str(e)}")
+
+        if arquivos is None:
+            # Sem listagem: verifica só os nomes esperados
+            arquivos = [(nome, urljoin(url_diretorio, nome)) for nome in (candidatos or [])]
+
+        if padrao:
+            expressao = re.compile(padrao, re.IGNORECASE)
+            arquivos = [(nome, url) for nome, url in arquivos if expressao.search(nome)]
+
+        tamanhos = downloads.tamanhos_remotos([url for _, url in arquivos])
+        encontrados = [
+            {'nome': nome, 'url': url, 'tamanho': tamanho if tamanho is not True else None}
+            for (nome, url), tamanho in zip(arquivos, tamanhos) if tamanho is not None
+        ]
+        return sorted(encontrados, key=lambda arquivo: arquivo['nome'])
+    finally:
+        if proprio:
+            downloads.fechar()
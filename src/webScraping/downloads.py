@@ -0,0 +1,651 @@
+"""
+Motor de downloads concorrentes usado pelo web scraping e pelo banco de dados.
+
+Os arquivos são baixados por um conjunto limitado de threads. Cada host tem
+uma única sessão HTTP (conexões keep-alive reaproveitadas entre arquivos) e
+um limite próprio de downloads simultâneos, para não sobrecarregar o servidor
+da ANS. O tempo total tende ao do maior arquivo, e não à soma de todos.
+
+Downloads interrompidos continuam de onde pararam (arquivo .part e
+requisições Range), e o arquivo final só é criado depois de conferido. Com
+um manifesto, arquivos que não mudaram no servidor não são baixados de novo.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+# Downloads simultâneos no total
+MAX_DOWNLOADS_SIMULTANEOS = 8
+
+# Downloads simultâneos em um mesmo host, quando não configurado em limites_por_host
+LIMITE_POR_HOST_PADRAO = 4
+
+# Segundos sem resposta do servidor antes de desistir do arquivo
+TIMEOUT_PADRAO = 30
+
+# Tamanho dos pedaços lidos da resposta e gravados no arquivo
+TAMANHO_PEDACO = 64 * 1024
+
+# Sufixo do arquivo em que o download é gravado até ser concluído e conferido
+SUFIXO_PARCIAL = '.part'
+
+# Tentativas seguidas sem receber nenhum byte novo antes de desistir do arquivo
+TENTATIVAS_DOWNLOAD = 3
+
+# Segundos de espera antes de retomar (multiplicado pelo número da tentativa)
+ESPERA_ENTRE_TENTATIVAS = 1.0
+
+# Nomes dos algoritmos nos cabeçalhos Digest/Repr-Digest e os do hashlib
+ALGORITMOS_CHECKSUM = {'sha-256': 'sha256', 'sha-512': 'sha512', 'sha': 'sha1', 'md5': 'md5'}
+
+
+def host_da_url(url):
+    """
+    Extrai o host (com porta, se houver) de uma URL
+
+    Args:
+        url (str): URL do arquivo
+
+    Returns:
+        str: Host em minúsculas (ex.: 'dadosabertos.ans.gov.br')
+    """
+    return urlsplit(url).netloc.lower()
+
+
+def caminho_parcial(nome_arquivo):
+    """Arquivo onde o download fica enquanto não termina (ex.: '1T2024.zip.part')"""
+    nome_arquivo = Path(nome_arquivo)
+    return nome_arquivo.with_name(nome_arquivo.name + SUFIXO_PARCIAL)
+
+
+def _caminho_validador(parcial):
+    return parcial.with_name(parcial.name + '.validador')
+
+
+def _descartar_parcial(parcial):
+    for caminho in (parcial, _caminho_validador(parcial)):
+        if caminho.exists():
+            caminho.unlink()
+
+
+def validador_da_resposta(resposta):
+    """
+    Identificador da versão do arquivo no servidor, usado no If-Range
+
+    Returns:
+        str ou None: ETag forte ou, na falta dela, Last-Modified
+    """
+    etag = resposta.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return resposta.headers.get('Last-Modified')
+
+
+def checksum_da_resposta(resposta, parcial=False):
+    """
+    Lê o checksum do arquivo enviado pelo servidor, quando houver
+
+    Aceita os cabeçalhos Repr-Digest (RFC 9530), Digest (RFC 3230) e, em
+    respostas completas, Content-MD5.
+
+    Args:
+        resposta (requests.Response): Resposta do servidor
+        parcial (bool): Se a resposta traz só um trecho (206)
+
+    Returns:
+        str ou None: Checksum no formato 'algoritmo:hex' (ex.: 'sha256:ab12...')
+    """
+    candidatos = []
+    for cabecalho in ('Repr-Digest', 'Digest'):
+        for item in (resposta.headers.get(cabecalho) or '').split(','):
+            algoritmo, _, valor = item.strip().partition('=')
+            candidatos.append((algoritmo, valor.strip(':')))
+    if not parcial and resposta.headers.get('Content-MD5'):
+        candidatos.append(('md5', resposta.headers['Content-MD5']))
+
+    for algoritmo, valor in candidatos:
+        algoritmo = ALGORITMOS_CHECKSUM.get(algoritmo.lower())
+        if algoritmo and valor:
+            try:
+                return f'{algoritmo}:{base64.b64decode(valor).hex()}'
+            except ValueError:
+                continue
+    return None
+
+
+def calcular_checksum(caminho, algoritmo):
+    """
+    Calcula o checksum de um arquivo lendo-o em pedaços
+
+    Args:
+        caminho (str ou Path): Arquivo
+        algoritmo (str): Nome aceito por hashlib (ex.: 'sha256', 'md5')
+
+    Returns:
+        str: Checksum em hexadecimal
+    """
+    resumo = hashlib.new(algoritmo)
+    with open(caminho, 'rb') as arquivo:
+        for pedaco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            resumo.update(pedaco)
+    return resumo.hexdigest()
+
+
+def _tamanho_total(resposta):
+    """Tamanho do arquivo completo informado pelo servidor (None se desconhecido)"""
+    if resposta.status_code in (206, 416):
+        _, _, total = (resposta.headers.get('Content-Range') or '').partition('/')
+        return int(total) if total.isdigit() else None
+    comprimento = resposta.headers.get('Content-Length')
+    return int(comprimento) if comprimento and comprimento.isdigit() else None
+
+
+def _pedacos(resposta):
+    """
+    Lê o corpo da resposta em pedaços
+
+    Com o urllib3 2, cada pedaço é entregue assim que chega (read1), de modo
+    que uma queda de conexão não descarta bytes já recebidos e ainda não
+    gravados; nas versões antigas, usa iter_content.
+    """
+    bruto = resposta.raw
+    if not (isinstance(bruto, urllib3.response.HTTPResponse) and hasattr(bruto, 'read1')):
+        yield from resposta.iter_content(chunk_size=TAMANHO_PEDACO)
+        return
+    try:
+        while True:
+            pedaco = bruto.read1(TAMANHO_PEDACO, decode_content=True)
+            if not pedaco:
+                break
+            yield pedaco
+    except urllib3.exceptions.ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+
+
+def _validadores(validador):
+    """Separa o validador salvo (ou recebido) em ETag e Last-Modified"""
+    if not validador:
+        return {'etag': None, 'last_modified': None}
+    if validador.startswith(('"', 'W/')):
+        return {'etag': validador, 'last_modified': None}
+    return {'etag': None, 'last_modified': validador}
+
+
+def _transferir(sessao, url, parcial, timeout, condicionais=None):
+    """
+    Faz uma tentativa de download, continuando do tamanho atual do .part
+
+    Args:
+        condicionais (dict, optional): Cabeçalhos If-None-Match/If-Modified-Since,
+                                       enviados só quando não há .part
+
+    Returns:
+        tuple: (situacao, detalhe), onde situacao é 'concluido' (detalhe traz o
+               checksum, o ETag e o Last-Modified informados pelo servidor),
+               'nao_modificado', 'incompleto' ou 'erro' (detalhe é o código HTTP)
+    """
+    inicio = parcial.stat().st_size if parcial.exists() else 0
+    # Sem compressão na transferência: os bytes gravados são os do arquivo,
+    # e as posições pedidas no Range correspondem às do .part
+    cabecalhos = {'Accept-Encoding': 'identity'}
+    if inicio:
+        cabecalhos['Range'] = f'bytes={inicio}-'
+        # Se o arquivo mudou no servidor, ele responde 200 com o arquivo novo inteiro
+        if _caminho_validador(parcial).exists():
+            cabecalhos['If-Range'] = _caminho_validador(parcial).read_text(encoding='utf-8')
+    elif condicionais:
+        cabecalhos.update(condicionais)
+
+    resposta = sessao.get(url, stream=True, timeout=timeout, headers=cabecalhos)
+    try:
+        if resposta.status_code == 304 and not inicio:
+            return 'nao_modificado', None
+
+        if resposta.status_code == 416 and inicio:
+            # O .part já pode estar completo (interrompido antes da troca de nome)
+            if _tamanho_total(resposta) == inicio:
+                validador = None
+                if _caminho_validador(parcial).exists():
+                    validador = _caminho_validador(parcial).read_text(encoding='utf-8')
+                return 'concluido', {'checksum': None, **_validadores(validador)}
+            _descartar_parcial(parcial)
+            return 'incompleto', None
+
+        if resposta.status_code == 206 and inicio:
+            intervalo = (resposta.headers.get('Content-Range') or '').split()
+            if len(intervalo) < 2 or not intervalo[1].startswith(f'{inicio}-'):
+                _descartar_parcial(parcial)
+                return 'incompleto', None
+            modo = 'ab'
+        elif resposta.status_code == 200:
+            inicio, modo = 0, 'wb'
+            validador = validador_da_resposta(resposta)
+            if validador:
+                _caminho_validador(parcial).write_text(validador, encoding='utf-8')
+            elif _caminho_validador(parcial).exists():
+                _caminho_validador(parcial).unlink()
+        else:
+            return 'erro', resposta.status_code
+
+        total = _tamanho_total(resposta)
+        with open(parcial, modo) as arquivo:
+            for pedaco in _pedacos(resposta):
+                arquivo.write(pedaco)
+
+        tamanho = parcial.stat().st_size
+        if total is not None and tamanho != total:
+            if tamanho > total:
+                _descartar_parcial(parcial)
+            return 'incompleto', None
+        return 'concluido', {
+            'checksum': checksum_da_resposta(resposta, parcial=resposta.status_code == 206),
+            'etag': resposta.headers.get('ETag'),
+            'last_modified': resposta.headers.get('Last-Modified'),
+        }
+    finally:
+        # Libera a conexão para o próximo arquivo do mesmo host
+        resposta.close()
+
+
+def cabecalhos_condicionais(entrada):
+    """
+    Cabeçalhos do GET condicional para um arquivo registrado no manifesto
+
+    Args:
+        entrada (dict ou None): Entrada de ManifestoDownloads.entrada_valida
+
+    Returns:
+        dict ou None: If-None-Match e/ou If-Modified-Since, ou None se não há como perguntar
+    """
+    if not entrada:
+        return None
+    cabecalhos = {}
+    if entrada.get('etag'):
+        cabecalhos['If-None-Match'] = entrada['etag']
+    if entrada.get('last_modified'):
+        cabecalhos['If-Modified-Since'] = entrada['last_modified']
+    return cabecalhos or None
+
+
+class ManifestoDownloads:
+    """
+    Registro local dos arquivos já baixados, gravado em JSON
+
+    Para cada URL guarda o arquivo de destino, o ETag e o Last-Modified
+    enviados pelo servidor, o tamanho e o SHA-256. Nas execuções seguintes,
+    se o arquivo local ainda é o registrado, o download vira um GET
+    condicional e um 304 do servidor dispensa a transferência.
+    """
+
+    def __init__(self, caminho):
+        """
+        Args:
+            caminho (str ou Path): Arquivo JSON do manifesto (criado no primeiro registro)
+        """
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as arquivo:
+                self._entradas = json.load(arquivo)
+        except FileNotFoundError:
+            self._entradas = {}
+        except ValueError as e:
+            print(f"Aviso: manifesto de downloads {self.caminho} inválido e será recriado: {str(e)}")
+            self._entradas = {}
+
+    def entrada(self, url):
+        """Entrada registrada para a URL (ou None)"""
+        with self._lock:
+            entrada = self._entradas.get(url)
+            return dict(entrada) if entrada else None
+
+    def entrada_valida(self, url, nome_arquivo):
+        """
+        Retorna a entrada da URL se o arquivo local ainda é o que foi baixado
+
+        O tamanho precisa ser o registrado; se a data de modificação mudou,
+        o conteúdo é conferido pelo SHA-256.
+
+        Args:
+            url (str): URL do arquivo
+            nome_arquivo (str ou Path): Caminho do arquivo local
+
+        Returns:
+            dict ou None: Entrada do manifesto, ou None se é preciso baixar de novo
+        """
+        entrada = self.entrada(url)
+        if not entrada or entrada['arquivo'] != str(nome_arquivo):
+            return None
+        try:
+            info = os.stat(nome_arquivo)
+        except FileNotFoundError:
+            return None
+        if info.st_size != entrada['tamanho']:
+            return None
+        if info.st_mtime_ns != entrada['mtime_ns']:
+            if calcular_checksum(nome_arquivo, 'sha256') != entrada['sha256']:
+                return None
+            entrada['mtime_ns'] = info.st_mtime_ns
+            with self._lock:
+                self._entradas[url] = entrada
+                self._salvar()
+        return entrada
+
+    def registrar(self, url, nome_arquivo, etag, last_modified, sha256):
+        """
+        Registra um download concluído e grava o manifesto
+
+        Args:
+            url (str): URL do arquivo
+            nome_arquivo (str ou Path): Caminho do arquivo local
+            etag (str ou None): ETag enviado pelo servidor
+            last_modified (str ou None): Last-Modified enviado pelo servidor
+            sha256 (str): SHA-256 do arquivo em hexadecimal
+        """
+        info = os.stat(nome_arquivo)
+        with self._lock:
+            self._entradas[url] = {
+                'arquivo': str(nome_arquivo),
+                'etag': etag,
+                'last_modified': last_modified,
+                'tamanho': info.st_size,
+                'mtime_ns': info.st_mtime_ns,
+                'sha256': sha256,
+            }
+            self._salvar()
+
+    def _salvar(self):
+        """Grava o manifesto de forma atômica (chamar com o lock)"""
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_name(f'{self.caminho.name}.{os.getpid()}.tmp')
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self._entradas, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temporario, self.caminho)
+
+
+def baixar_para_arquivo(sessao, url, nome_arquivo, timeout=TIMEOUT_PADRAO, checksum=None,
+                        tentativas=TENTATIVAS_DOWNLOAD, manifesto=None):
+    """
+    Baixa uma URL em streaming, retomando downloads interrompidos
+
+    Os bytes são gravados em '<nome>.part'. Se a conexão cair, a próxima
+    tentativa (nesta ou em outra execução) pede ao servidor só o que falta,
+    com uma requisição Range. O arquivo final só aparece, por uma troca de
+    nome atômica, depois de conferidos o tamanho e, quando disponível, o
+    checksum.
+
+    Args:
+        sessao (requests.Session ou módulo requests): Cliente HTTP usado no GET
+        url (str): URL do arquivo para download
+        nome_arquivo (str ou Path): Caminho onde o arquivo será salvo
+        timeout (float): Segundos sem resposta antes de desistir
+        checksum (str, optional): Checksum esperado, no formato 'algoritmo:hex';
+                                  se None, usa o informado pelo servidor, se houver
+        tentativas (int): Tentativas seguidas sem progresso antes de desistir
+        manifesto (ManifestoDownloads, optional): Registro dos downloads anteriores;
+                                                  se o arquivo local ainda é o
+                                                  registrado, o GET é condicional e
+                                                  um 304 dispensa a transferência
+
+    Returns:
+        Path ou bool: Caminho do arquivo se o download foi bem-sucedido, False caso contrário
+    """
+    nome_arquivo = Path(nome_arquivo)
+    parcial = caminho_parcial(nome_arquivo)
+    try:
+        condicionais = None
+        if manifesto is not None:
+            condicionais = cabecalhos_condicionais(manifesto.entrada_valida(url, nome_arquivo))
+        print(f"{'Verificando' if condicionais else 'Baixando'} {nome_arquivo}...")
+
+        # Garantir que o diretório exista
+        nome_arquivo.parent.mkdir(parents=True, exist_ok=True)
+
+        sem_progresso = 0
+        while True:
+            antes = parcial.stat().st_size if parcial.exists() else 0
+            try:
+                situacao, detalhe = _transferir(sessao, url, parcial, timeout, condicionais)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout) as e:
+                situacao, detalhe = 'incompleto', e
+
+            if situacao == 'erro':
+                print(f"Erro ao baixar {nome_arquivo}. Código do erro: {detalhe}")
+                return False
+            if situacao == 'nao_modificado':
+                print(f"{nome_arquivo} não mudou no servidor; download dispensado")
+                return nome_arquivo
+            if situacao == 'concluido':
+                break
+
+            depois = parcial.stat().st_size if parcial.exists() else 0
+            sem_progresso = 0 if depois > antes else sem_progresso + 1
+            if sem_progresso >= tentativas:
+                print(f"Erro durante o download de {nome_arquivo}: download interrompido "
+                      f"({depois} bytes mantidos em {parcial.name} para a próxima execução)")
+                return False
+            print(f"Download de {nome_arquivo} interrompido com {depois} bytes; retomando...")
+            time.sleep(ESPERA_ENTRE_TENTATIVAS * (sem_progresso + 1))
+
+        sha256 = None
+        esperado = checksum or detalhe['checksum']
+        if esperado:
+            algoritmo, _, valor = esperado.partition(':')
+            obtido = calcular_checksum(parcial, algoritmo)
+            if obtido != valor.lower():
+                print(f"Erro ao baixar {nome_arquivo}: checksum {algoritmo} não confere "
+                      f"(esperado {valor}, obtido {obtido})")
+                _descartar_parcial(parcial)
+                return False
+            if algoritmo == 'sha256':
+                sha256 = obtido
+
+        if manifesto is not None and sha256 is None:
+            sha256 = calcular_checksum(parcial, 'sha256')
+        os.replace(parcial, nome_arquivo)
+        _descartar_parcial(parcial)
+        if manifesto is not None:
+            manifesto.registrar(url, nome_arquivo, detalhe['etag'], detalhe['last_modified'], sha256)
+        print(f"Download de {nome_arquivo} concluído!")
+        return nome_arquivo
+    except Exception as e:
+        print(f"Erro durante o download de {nome_arquivo}: {str(e)}")
+        return False
+
+
+class GerenciadorDownloads:
+    """
+    Baixa vários arquivos ao mesmo tempo, com uma sessão e um limite por host
+
+    Uso:
+        with GerenciadorDownloads(limites_por_host={'www.gov.br': 2}) as downloads:
+            resultados = downloads.baixar_varios([(url, destino), ...])
+    """
+
+    def __init__(self, max_simultaneos=MAX_DOWNLOADS_SIMULTANEOS, limites_por_host=None,
+                 limite_por_host_padrao=LIMITE_POR_HOST_PADRAO, timeout=TIMEOUT_PADRAO, manifesto=None):
+        """
+        Args:
+            max_simultaneos (int): Downloads simultâneos no total
+            limites_por_host (dict, optional): Limite de downloads simultâneos por host
+            limite_por_host_padrao (int): Limite dos hosts ausentes em limites_por_host
+            timeout (float): Segundos sem resposta antes de desistir de um arquivo
+            manifesto (str, Path ou ManifestoDownloads, optional): Manifesto dos downloads
+                                                                   anteriores, para pular
+                                                                   arquivos que não mudaram
+        """
+        self.max_simultaneos = max(1, max_simultaneos)
+        self.limites_por_host = {host.lower(): max(1, limite)
+                                 for host, limite in (limites_por_host or {}).items()}
+        self.limite_por_host_padrao = max(1, limite_por_host_padrao)
+        self.timeout = timeout
+        if manifesto is not None and not isinstance(manifesto, ManifestoDownloads):
+            manifesto = ManifestoDownloads(manifesto)
+        self.manifesto = manifesto
+        self._sessoes = {}
+        self._semaforos = {}
+        self._lock = threading.Lock()
+
+    def limite_do_host(self, host):
+        """Downloads simultâneos permitidos no host"""
+        return self.limites_por_host.get(host, self.limite_por_host_padrao)
+
+    def sessao(self, url):
+        """
+        Retorna a sessão do host da URL, criando-a no primeiro uso
+
+        O pool de conexões da sessão tem o tamanho do limite do host, de modo
+        que cada download em andamento reaproveita uma conexão aberta.
+
+        Args:
+            url (str): URL a ser baixada
+
+        Returns:
+            requests.Session: Sessão compartilhada pelos downloads do host
+        """
+        host = host_da_url(url)
+        with self._lock:
+            sessao = self._sessoes.get(host)
+            if sessao is None:
+                limite = self.limite_do_host(host)
+                sessao = requests.Session()
+                adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=limite, pool_block=True)
+                sessao.mount('http://', adaptador)
+                sessao.mount('https://', adaptador)
+                self._sessoes[host] = sessao
+                self._semaforos[host] = threading.BoundedSemaphore(limite)
+            return sessao
+
+    def _semaforo(self, url):
+        self.sessao(url)
+        return self._semaforos[host_da_url(url)]
+
+    def baixar(self, url, destino):
+        """
+        Baixa um arquivo respeitando o limite do host
+
+        Args:
+            url (str): URL do arquivo
+            destino (str ou Path): Caminho onde o arquivo será salvo
+
+        Returns:
+            Path ou bool: Caminho do arquivo se o download foi bem-sucedido, False caso contrário
+        """
+        with self._semaforo(url):
+            return baixar_para_arquivo(self.sessao(url), url, destino, self.timeout,
+                                       manifesto=self.manifesto)
+
+    def baixar_varios(self, tarefas):
+        """
+        Baixa vários arquivos em paralelo
+
+        Args:
+            tarefas (list): Pares (url, destino)
+
+        Returns:
+            list: Resultado de cada tarefa (Path ou False), na mesma ordem das tarefas
+        """
+        return self._em_paralelo(lambda tarefa: self.baixar(*tarefa), tarefas)
+
+    def baixar_em_fluxo(self, tarefas):
+        """
+        Baixa vários arquivos em paralelo, entregando cada um assim que termina
+
+        Permite que a etapa seguinte (ex.: extração) comece no primeiro
+        arquivo enquanto os demais ainda estão sendo baixados.
+
+        Args:
+            tarefas (list): Pares (url, destino)
+
+        Yields:
+            tuple: (indice da tarefa, resultado), na ordem em que os downloads
+                   terminam; o resultado é False se o download falhou
+        """
+        tarefas = list(tarefas)
+        if not tarefas:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_simultaneos, len(tarefas)),
+                                thread_name_prefix='download') as executor:
+            futuros = {executor.submit(self.baixar, *tarefa): indice for indice, tarefa in enumerate(tarefas)}
+            for futuro in as_completed(futuros):
+                indice = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    # Um erro inesperado em um download não interrompe os demais
+                    print(f"Erro ao baixar {tarefas[indice][0]}: {str(e)}")
+                    resultado = False
+                yield indice, resultado
+
+    def tamanho_remoto(self, url):
+        """
+        Consulta o arquivo com uma requisição HEAD, sem baixá-lo
+
+        Args:
+            url (str): URL do arquivo
+
+        Returns:
+            int, bool ou None: Tamanho em bytes; True se o arquivo existe mas o
+                               servidor não informa o tamanho; None se não existe
+                               ou não foi possível consultar
+        """
+        with self._semaforo(url):
+            try:
+                resposta = self.sessao(url).head(url, timeout=self.timeout, allow_redirects=True,
+                                                 headers={'Accept-Encoding': 'identity'})
+            except requests.exceptions.RequestException as e:
+                print(f"Erro ao consultar {url}: {str(e)}")
+                return None
+        if resposta.status_code != 200:
+            return None
+        comprimento = resposta.headers.get('Content-Length')
+        return int(comprimento) if comprimento and comprimento.isdigit() else True
+
+    def tamanhos_remotos(self, urls):
+        """
+        Consulta vários arquivos em paralelo (HEAD)
+
+        Args:
+            urls (list): URLs dos arquivos
+
+        Returns:
+            list: Resultado de tamanho_remoto para cada URL, na mesma ordem
+        """
+        return self._em_paralelo(self.tamanho_remoto, urls)
+
+    def _em_paralelo(self, funcao, itens):
+        """Aplica a função aos itens no conjunto limitado de threads, mantendo a ordem"""
+        itens = list(itens)
+        if not itens:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_simultaneos, len(itens)),
+                                thread_name_prefix='download') as executor:
+            return list(executor.map(funcao, itens))
+
+    def fechar(self):
+        """Fecha as sessões e as conexões abertas"""
+        with self._lock:
+            for sessao in self._sessoes.values():
+                sessao.close()
+            self._sessoes.clear()
+            self._semaforos.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
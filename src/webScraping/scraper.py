@@ -7,41 +7,22 @@ import os
 import zipfile
 from pathlib import Path
 
-def baixar_arquivo(url, nome_arquivo):
+from src.webScraping.downloads import baixar_para_arquivo, GerenciadorDownloads, MAX_DOWNLOADS_SIMULTANEOS
+
+def baixar_arquivo(url, nome_arquivo, sessao=None):
     """
     Baixa um arquivo da URL especificada e salva com o nome especificado
     
     Args:
         url (str): URL do arquivo para download
         nome_arquivo (str ou Path): Caminho onde o arquivo será salvo
+        sessao (requests.Session, optional): Sessão para reaproveitar conexões;
+                                             se None, faz uma requisição avulsa
     
     Returns:
         Path ou bool: Caminho do arquivo se o download foi bem-sucedido, False caso contrário
     """
-    print(f"Baixando {nome_arquivo}...")
-    try:
-        resposta = requests.get(url, stream=True, timeout=30)
-        
-        # Verificação da requisição
-        if resposta.status_code == 200:
-            # Garantir que o diretório exista
-            if isinstance(nome_arquivo, str):
-                nome_arquivo = Path(nome_arquivo)
-            nome_arquivo.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Baixar arquivo em pedaços
-            with open(nome_arquivo, 'wb') as arquivo:
-                # Reúne os pedaços
-                for pedaco in resposta.iter_content(chunk_size=8192):
-                    arquivo.write(pedaco)
-            print(f"Download de {nome_arquivo} concluído!")
-            return nome_arquivo  # Retorna o Path para compatibilidade com o resto do código
-        else:
-            print(f"Erro ao baixar {nome_arquivo}. Código do erro: {resposta.status_code}")
-            return False
-    except Exception as e:
-        print(f"Erro durante o download de {nome_arquivo}: {str(e)}")
-        return False
+    return baixar_para_arquivo(sessao or requests, url, nome_arquivo)
     
 def criar_zip(lista_arquivos, nome_arquivo_zip):
     """
@@ -69,18 +50,25 @@ def criar_zip(lista_arquivos, nome_arquivo_zip):
         print(f"Erro ao criar ZIP: {e}")
         return False
     
-def baixar_multiplos_arquivos(urls, diretorio_destino, nomes_arquivos=None):
+def baixar_multiplos_arquivos(urls, diretorio_destino, nomes_arquivos=None,
+                              max_simultaneos=MAX_DOWNLOADS_SIMULTANEOS, limites_por_host=None,
+                              manifesto=None):
     """
-    Baixa múltiplos arquivos e retorna a lista de arquivos baixados
+    Baixa múltiplos arquivos em paralelo e retorna a lista de arquivos baixados
 
     Args:
         urls (list): Lista de URLs dos arquivos para download
         diretorio_destino (str ou Path): Diretório onde os arquivos serão salvos
         nome_arquivos (list, optional): Lista de nomes para os arquivos.
                                         Se None, usa os nomes originais das URLs.
+        max_simultaneos (int): Downloads simultâneos no total
+        limites_por_host (dict, optional): Downloads simultâneos por host
+                                           (ex.: {'www.gov.br': 2})
+        manifesto (str ou Path, optional): Manifesto dos downloads anteriores; arquivos
+                                           que não mudaram no servidor não são baixados
 
     Returns:
-        list: Lista de caminhos dos arquivos baixados com sucesso
+        list: Lista de caminhos dos arquivos baixados com sucesso, na ordem das URLs
     """
     # Converter para Path se for string
     if isinstance(diretorio_destino, str):
@@ -89,8 +77,7 @@ def baixar_multiplos_arquivos(urls, diretorio_destino, nomes_arquivos=None):
     # Criar diretório se não existir
     diretorio_destino.mkdir(parents=True, exist_ok=True)
 
-    arquivos_baixados = []
-
+    tarefas = []
     for i, url in enumerate(urls):
         # Determinar o nome do arquivo
         if nomes_arquivos and i < len(nomes_arquivos):
@@ -98,13 +85,12 @@ def baixar_multiplos_arquivos(urls, diretorio_destino, nomes_arquivos=None):
         else:
             nome_arquivo = url.split('/')[-1]
 
-        caminho_destino = diretorio_destino / nome_arquivo
+        tarefas.append((url, diretorio_destino / nome_arquivo))
 
-        arquivo_baixado = baixar_arquivo(url, caminho_destino)
-        if arquivo_baixado:
-            arquivos_baixados.append(caminho_destino)
+    with GerenciadorDownloads(max_simultaneos, limites_por_host, manifesto=manifesto) as downloads:
+        resultados = downloads.baixar_varios(tarefas)
 
-    return arquivos_baixados
+    return [destino for (_, destino), resultado in zip(tarefas, resultados) if resultado]
 
 def principal():
     """
@@ -127,8 +113,9 @@ def principal():
     print("=== TESTE 1: WEB SCRAPING ===")
     print("Baixando anexos da ANS...")
 
-    # Baixar os arquivos usando a nova função
-    arquivos_baixados = baixar_multiplos_arquivos(urls, diretorio_saida, nomes_arquivos)
+    # Baixar os arquivos (os que não mudaram desde a última execução não são baixados de novo)
+    arquivos_baixados = baixar_multiplos_arquivos(urls, diretorio_saida, nomes_arquivos,
+                                                  manifesto=diretorio_saida / 'manifesto_downloads.json')
 
     # Verificar se todos os arquivos foram baixados
     if len(arquivos_baixados) == len(urls):
@@ -8,6 +8,8 @@ const AdvancedSearch = {
       ordemAscendente: true,
       ufsDisponiveis: [],
       modalidadesDisponiveis: [],
+      contagensUF: null,
+      contagensModalidade: null,
     };
   },
   methods: {
@@ -44,6 +46,19 @@ const AdvancedSearch = {
         .sort();
       this.modalidadesDisponiveis = modalidades;
     },
+
+    atualizarFacetas(facetas) {
+      // Quantidade de resultados de cada opção para a busca atual
+      this.contagensUF = facetas ? facetas.UF : null;
+      this.contagensModalidade = facetas ? facetas.Modalidade : null;
+    },
+
+    rotuloOpcao(valor, contagens) {
+      if (!contagens) {
+        return valor;
+      }
+      return `${valor} (${contagens[valor] || 0})`;
+    },
   },
 
   watch: {
@@ -75,14 +90,14 @@ const AdvancedSearch = {
               <label class="form-label">UF</label>
               <select class="form-select" v-model="filtroUF">
                 <option value="">Todas</option>
-                <option v-for="uf in ufsDisponiveis" :key="uf" :value="uf">{{ uf }}</option>
+                <option v-for="uf in ufsDisponiveis" :key="uf" :value="uf">{{ rotuloOpcao(uf, contagensUF) }}</option>
               </select>
             </div>
             <div class="col-md-3">
               <label class="form-label">Modalidade</label>
               <select class="form-select" v-model="filtroModalidade">
                 <option value="">Todas</option>
-                <option v-for="modalidade in modalidadesDisponiveis" :key="modalidade" :value="modalidade">{{ modalidade }}</option>
+                <option v-for="modalidade in modalidadesDisponiveis" :key="modalidade" :value="modalidade">{{ rotuloOpcao(modalidade, contagensModalidade) }}</option>
               </select>
             </div>
             <div class="col-md-3">
@@ -6,14 +6,33 @@ import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
 import json
+import io
+import re
+import gzip
+import base64
 from pathlib import Path
 import os
 import sys
+import tempfile
+import shutil
+import threading
+import time
+import subprocess
+import signal
 
 # Adicionar o diretório raiz ao path para importar os módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.api.server import app, buscar_operadoras
+from src.api.server import app, buscar_operadoras, cache_resultados
+from src.api.dataset import DatasetOperadoras, SnapshotOperadoras
+from src.api.filtros import aplicar_filtros, selecionar_operadoras, selecionar_operadoras_similares, MAX_SUGESTOES
+from src.api.indices import IndiceTrigramas, IndicePrefixos
+from src.api.cache import CacheResultados, BuscasEmAndamento
+from src.api.producao import opcoes_padrao, recarregar_no_principal, monitorar_no_worker
+from src.api.metricas import metricas, RegistroMetricas
+from src.api.serializacao import FragmentosJSON
+from src.api.banco_sqlite import BancoOperadoras
+from src.api.estaticos import ArquivosEstaticos, comprimir_gzip
 
 class TestAPI(unittest.TestCase):
     """Classe de testes para o módulo de API"""
@@ -24,6 +43,13 @@ class TestAPI(unittest.TestCase):
         app.config['TESTING'] = True
         self.client = app.test_client()
         
+        # Criar diretório temporário para os testes
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        
+        # Respostas em cache de outros testes não podem vazar para este
+        cache_resultados.limpar()
+        
         # Criar um DataFrame de exemplo para simular os dados
         self.df_exemplo = pd.DataFrame({
             'Registro_ANS': ['123456', '789012'],
@@ -34,16 +60,22 @@ class TestAPI(unittest.TestCase):
             'UF': ['SP', 'RJ']
         })
     
-    @patch('pandas.read_csv')
-    @patch('os.path.exists')
-    def test_buscar_operadoras_sem_termo(self, mock_exists, mock_read_csv):
+    def _usar_csv_exemplo(self):
+        """Grava o DataFrame de exemplo em um CSV temporário e aponta o dataset para ele"""
+        caminho_csv = Path(self.temp_dir) / 'Relatorio_cadop.csv'
+        self.df_exemplo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        patcher = patch('src.api.server.dataset_operadoras', DatasetOperadoras(caminho_csv))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return caminho_csv
+    
+    def test_buscar_operadoras_sem_termo(self):
         """Testa a busca de operadoras sem termo de busca"""
-        # Configurar mocks
-        mock_exists.return_value = True
-        mock_read_csv.return_value = self.df_exemplo
+        self._usar_csv_exemplo()
         
         # Executar a função
-        resultado = buscar_operadoras()
+        with patch('pandas.read_csv', wraps=pd.read_csv) as mock_read_csv:
+            resultado = buscar_operadoras()
         
         # Verificações
         self.assertEqual(len(resultado), 2)
@@ -51,22 +83,290 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(resultado[1]['Registro_ANS'], '789012')
         mock_read_csv.assert_called_once()
     
-    @patch('pandas.read_csv')
-    @patch('os.path.exists')
-    def test_buscar_operadoras_com_termo(self, mock_exists, mock_read_csv):
+    def test_buscar_operadoras_com_termo(self):
         """Testa a busca de operadoras com termo de busca"""
-        # Configurar mocks
-        mock_exists.return_value = True
-        mock_read_csv.return_value = self.df_exemplo
+        self._usar_csv_exemplo()
         
         # Executar a função
-        resultado = buscar_operadoras('Plano A')
+        with patch('pandas.read_csv', wraps=pd.read_csv) as mock_read_csv:
+            resultado = buscar_operadoras('Plano A')
         
         # Verificações
         self.assertEqual(len(resultado), 1)
         self.assertEqual(resultado[0]['Nome_Fantasia'], 'Plano A')
         mock_read_csv.assert_called_once()
     
+    def test_buscar_operadoras_reutiliza_dataset_em_memoria(self):
+        """Testa que o CSV é lido uma única vez e recarregado apenas quando muda"""
+        caminho_csv = self._usar_csv_exemplo()
+        
+        with patch('pandas.read_csv', wraps=pd.read_csv) as mock_read_csv:
+            buscar_operadoras()
+            buscar_operadoras('Plano A')
+            buscar_operadoras(uf='SP')
+            self.assertEqual(mock_read_csv.call_count, 1)
+            
+            # Alterar o arquivo (novo conteúdo e nova data de modificação)
+            df_novo = pd.concat([self.df_exemplo, self.df_exemplo.head(1)])
+            df_novo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+            info = os.stat(caminho_csv)
+            os.utime(caminho_csv, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+            
+            resultado = buscar_operadoras()
+            self.assertEqual(mock_read_csv.call_count, 2)
+            self.assertEqual(len(resultado), 3)
+
+    def test_recarga_em_segundo_plano_troca_snapshot(self):
+        """Testa que, com o monitor ativo, as requisições usam o snapshot antigo até a troca"""
+        caminho_csv = Path(self.temp_dir) / 'Relatorio_cadop.csv'
+        self.df_exemplo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        dataset = DatasetOperadoras(caminho_csv)
+        antigo = dataset.obter()
+        # Intervalo longo: as verificações são chamadas diretamente pelo teste
+        dataset.iniciar_monitoramento(intervalo=3600)
+        self.addCleanup(dataset.parar_monitoramento)
+
+        df_novo = pd.concat([self.df_exemplo, self.df_exemplo.head(1)])
+        df_novo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        info = os.stat(caminho_csv)
+        os.utime(caminho_csv, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+
+        with patch('pandas.read_csv', wraps=pd.read_csv) as mock_read_csv:
+            # O caminho da requisição não lê o arquivo novo
+            self.assertIs(dataset.obter(), antigo)
+            self.assertEqual(dataset.versao_em_uso(), antigo.versao)
+
+            # A primeira verificação só registra a mudança; a segunda, com o
+            # arquivo estável, monta o snapshot novo e faz a troca
+            self.assertFalse(dataset.recarregar_se_mudou())
+            self.assertIs(dataset.obter(), antigo)
+            self.assertTrue(dataset.recarregar_se_mudou())
+            self.assertEqual(mock_read_csv.call_count, 1)
+
+        novo = dataset.obter()
+        self.assertIsNot(novo, antigo)
+        self.assertEqual(len(novo.df), 3)
+        self.assertEqual(len(antigo.df), 2)
+        self.assertFalse(dataset.recarregar_se_mudou())
+
+    def test_recarga_do_banco_sqlite_em_segundo_plano(self):
+        """Testa que as conexões passam para o banco regerado só depois da troca"""
+        caminho_csv = Path(self.temp_dir) / 'Relatorio_cadop.csv'
+        self.df_exemplo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        banco = BancoOperadoras(caminho_csv)
+        self.addCleanup(banco.fechar)
+        banco.iniciar_monitoramento(intervalo=3600)
+        self.addCleanup(banco.parar_monitoramento)
+        with banco.conexao() as antiga:
+            pass
+
+        df_novo = pd.concat([self.df_exemplo, self.df_exemplo.head(1)])
+        df_novo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        info = os.stat(caminho_csv)
+        os.utime(caminho_csv, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+
+        with banco.conexao() as atual:
+            self.assertIs(atual, antiga)
+        self.assertFalse(banco.recarregar_se_mudou())
+        self.assertTrue(banco.recarregar_se_mudou())
+        with banco.conexao() as nova:
+            pass
+        self.assertIsNot(nova, antiga)
+        self.assertNotEqual(nova.versao, antiga.versao)
+        self.assertEqual(banco.versao_em_uso(), nova.versao)
+
+    def test_conexoes_sqlite_reaproveitadas_entre_threads(self):
+        """Testa que cada thread nova reaproveita a conexão devolvida ao pool"""
+        caminho_csv = Path(self.temp_dir) / 'Relatorio_cadop.csv'
+        self.df_exemplo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        banco = BancoOperadoras(caminho_csv)
+        self.addCleanup(banco.fechar)
+        with banco.conexao() as primeira:
+            pass
+
+        usadas = []
+
+        def requisicao():
+            with banco.conexao() as atual:
+                usadas.append(atual)
+            banco.buscar('Operadora')
+            colunas, blocos = banco.exportar(tamanho_bloco=1)
+            next(blocos)
+            blocos.close()
+
+        for _ in range(3):
+            thread = threading.Thread(target=requisicao)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(usadas, [primeira] * 3)
+        with banco.conexao() as atual:
+            self.assertIs(atual, primeira)
+
+    def test_indice_trigramas(self):
+        """Testa a busca por substring usando o índice de trigramas"""
+        df = pd.DataFrame({
+            'Registro_ANS': ['123456', '789012', '345678'],
+            'Razao_Social': ['Unimed São Paulo', 'Operadora B', 'AB'],
+            'Nome_Fantasia': ['Plano A', 'Saúde Total', ''],
+            'CNPJ': ['12345678901234', '98765432109876', '11111111111111'],
+        })
+        indice = IndiceTrigramas(df)
+        
+        # Caixa e acentos são ignorados
+        self.assertEqual(indice.buscar('SAO PAULO').tolist(), [0])
+        self.assertEqual(indice.buscar('saude').tolist(), [1])
+        # Colunas numéricas também são indexadas
+        self.assertEqual(indice.buscar('98765').tolist(), [1])
+        # Termos curtos, inclusive em campos menores que um trigrama
+        self.assertEqual(indice.buscar('b').tolist(), [1, 2])
+        # Sem resultados e termo vazio
+        self.assertEqual(indice.buscar('inexistente').tolist(), [])
+        self.assertEqual(indice.buscar('').tolist(), [0, 1, 2])
+    
+    def test_selecionar_operadoras_equivale_a_ordenacao_completa(self):
+        """Testa que a seleção pelas ordens pré-calculadas equivale a ordenar tudo"""
+        ufs = ['SP', 'RJ', 'MG', 'BA']
+        modalidades = ['Cooperativa Médica', 'Medicina de Grupo', 'Autogestão']
+        df = pd.DataFrame({
+            'Registro_ANS': [str(300000 + (i * 7919) % 1000) for i in range(200)],
+            'Razao_Social': [f'Operadora {(i * 37) % 200:03d}' for i in range(200)],
+            'Nome_Fantasia': [f'Plano {(i * 53) % 200:03d}' for i in range(200)],
+            'CNPJ': [str(10**13 + i) for i in range(200)],
+            'Modalidade': [modalidades[i % 3] for i in range(200)],
+            'UF': [ufs[i % 4] for i in range(200)],
+        })
+        snapshot = SnapshotOperadoras(df, (0, 0))
+        
+        for ordenacao in ['razao_social', 'nome_fantasia', 'registro_ans']:
+            for ordem in ['asc', 'desc']:
+                for termo, uf, modalidade in [('', '', ''), ('', 'sp', ''), ('plano 1', '', ''),
+                                              ('operadora', 'RJ', 'grupo'), ('', 'MG', 'autogest')]:
+                    esperado = aplicar_filtros(df.copy(), termo, uf, modalidade, ordenacao, ordem).head(10)
+                    posicoes = selecionar_operadoras(snapshot, termo, uf, modalidade, ordenacao, ordem, 10)
+                    self.assertEqual(df.iloc[posicoes].index.tolist(), esperado.index.tolist(),
+                                     (ordenacao, ordem, termo, uf, modalidade))
+    
+    def test_snapshot_colunas_categoricas_e_bitmaps(self):
+        """Testa a representação compacta com códigos categóricos, bitmaps e chaves inteiras"""
+        df = pd.DataFrame({
+            'Registro_ANS': ['123456', '789012', '345678'],
+            'Razao_Social': ['Operadora A', 'Operadora B', 'Operadora C'],
+            'Nome_Fantasia': ['Plano A', 'Plano B', 'Plano C'],
+            'CNPJ': ['12.345.678/0001-90', '98765432109876', ''],
+            'Modalidade': ['Cooperativa Médica', 'Medicina de Grupo', 'Cooperativa Odontológica'],
+            'UF': ['SP', 'RJ', 'SP'],
+        })
+        snapshot = SnapshotOperadoras(df, (0, 0))
+        
+        self.assertEqual(str(snapshot.df['UF'].dtype), 'category')
+        self.assertEqual(str(snapshot.df['Modalidade'].dtype), 'category')
+        self.assertEqual(snapshot.chaves['Registro_ANS'].tolist(), [123456, 789012, 345678])
+        self.assertEqual(snapshot.chaves['CNPJ'].tolist(), [12345678000190, 98765432109876, -1])
+        
+        uf = snapshot.categorias['UF']
+        modalidade = snapshot.categorias['Modalidade']
+        self.assertEqual(uf.para_mascara(uf.bitmap_igual('sp')).tolist(), [True, False, True])
+        self.assertEqual(uf.para_mascara(uf.bitmap_igual('AM')).tolist(), [False, False, False])
+        self.assertEqual(modalidade.para_mascara(modalidade.bitmap_contendo('cooperativa')).tolist(),
+                         [True, False, True])
+        
+        bitmap = uf.bitmap_igual('SP') & modalidade.bitmap_contendo('odontologica')
+        self.assertEqual(uf.para_mascara(bitmap).tolist(), [False, False, True])
+        
+        posicoes = selecionar_operadoras(snapshot, uf='SP', modalidade='medica')
+        self.assertEqual(posicoes.tolist(), [0])
+    
+    def test_busca_aproximada_tolerante_a_erros(self):
+        """Testa a busca aproximada por nome com erros de digitação e sem acentos"""
+        df = pd.DataFrame({
+            'Registro_ANS': ['100001', '100002', '100003', '100004'],
+            'Razao_Social': ['UNIMED CAMPINAS COOPERATIVA DE TRABALHO MÉDICO', 'UNIMED SÃO PAULO',
+                             'AMIL ASSISTÊNCIA MÉDICA', 'BRADESCO SAÚDE S.A.'],
+            'Nome_Fantasia': ['', 'Unimed SP', 'Amil', 'Bradesco'],
+            'CNPJ': ['1', '2', '3', '4'],
+            'Modalidade': ['Cooperativa Médica', 'Cooperativa Médica', 'Medicina de Grupo', 'Seguradora'],
+            'UF': ['SP', 'SP', 'RJ', 'RJ'],
+        })
+        snapshot = SnapshotOperadoras(df, (0, 0))
+        
+        posicoes, similaridades = selecionar_operadoras_similares(snapshot, 'unimd campinas')
+        self.assertEqual(posicoes.tolist()[0], 0)
+        self.assertGreater(similaridades[0], 0.8)
+        
+        posicoes, _ = selecionar_operadoras_similares(snapshot, 'assistencia medica')
+        self.assertEqual(posicoes.tolist(), [2])
+        
+        posicoes, _ = selecionar_operadoras_similares(snapshot, 'unimed', uf='RJ')
+        self.assertEqual(posicoes.tolist(), [])
+        
+        posicoes, _ = selecionar_operadoras_similares(snapshot, 'xyzw qwer')
+        self.assertEqual(posicoes.tolist(), [])
+    
+    def test_rota_api_operadoras_modo_fuzzy(self):
+        """Testa o parâmetro modo=fuzzy da rota /api/operadoras"""
+        self._usar_csv_exemplo()
+        
+        response = self.client.get('/api/operadoras?q=Operadra%20A&modo=fuzzy')
+        data = json.loads(response.data)
+        self.assertEqual(data[0]['Razao_Social'], 'Operadora A')
+        self.assertIn('Similaridade', data[0])
+        self.assertNotIn('X-Proximo-Cursor', response.headers)
+        
+        # Sem o modo fuzzy o termo com erro não encontra nada
+        self.assertEqual(json.loads(self.client.get('/api/operadoras?q=Operadra%20A').data), [])
+    
+    def test_rota_api_operadoras_fuzzy_facetas_contam_todos_os_candidatos(self):
+        """Testa que as facetas da busca aproximada não se limitam à página retornada"""
+        self.df_exemplo = pd.DataFrame({
+            'Registro_ANS': [str(100000 + i) for i in range(6)],
+            'Razao_Social': ['Unimed Campinas', 'Unimed Campinas Cooperativa', 'Unimed Campinas Sul',
+                             'Unimed Campinas Norte', 'Bradesco Saude', 'Unimed Campinas Leste'],
+            'Nome_Fantasia': [''] * 6,
+            'CNPJ': [str(10**13 + i) for i in range(6)],
+            'Modalidade': ['Cooperativa Médica'] * 3 + ['Medicina de Grupo'] * 3,
+            'UF': ['SP', 'SP', 'RJ', 'MG', 'SP', 'SP']
+        })
+        self._usar_csv_exemplo()
+        
+        data = json.loads(self.client.get('/api/operadoras?q=unimd%20campinas&modo=fuzzy&facetas=1&limite=2').data)
+        self.assertEqual(len(data['resultados']), 2)
+        self.assertEqual(data['facetas']['UF'], {'MG': 1, 'RJ': 1, 'SP': 3})
+        self.assertEqual(data['facetas']['Modalidade'], {'Cooperativa Médica': 3, 'Medicina de Grupo': 2})
+        
+        # Cada faceta continua ignorando só o próprio filtro
+        data = json.loads(self.client.get('/api/operadoras?q=unimd%20campinas&modo=fuzzy&facetas=1&limite=1&uf=SP').data)
+        self.assertEqual(data['facetas']['UF'], {'MG': 1, 'RJ': 1, 'SP': 3})
+        self.assertEqual(data['facetas']['Modalidade'], {'Cooperativa Médica': 2, 'Medicina de Grupo': 1})
+        self.assertNotIn('facetas_aproximadas', data)
+    
+    def test_rota_api_operadoras_fuzzy_facetas_alem_do_limite_de_candidatos(self):
+        """Testa facetas exatas com mais linhas parecidas que IndiceSimilaridade.MAX_CANDIDATOS"""
+        total = 3000
+        self.df_exemplo = pd.DataFrame({
+            'Registro_ANS': [str(100000 + i) for i in range(total)],
+            'Razao_Social': [f'Unimed Cooperativa {i}' for i in range(total)],
+            'Nome_Fantasia': [''] * total,
+            'CNPJ': [str(10**13 + i) for i in range(total)],
+            'Modalidade': ['Cooperativa Médica'] * total,
+            'UF': ['AC' if i % 30 == 0 else 'SP' for i in range(total)]
+        })
+        self._usar_csv_exemplo()
+        
+        url = '/api/operadoras?q=unimed%20cooperativa&modo=fuzzy&facetas=1&limite=5&uf=AC'
+        data = json.loads(self.client.get(url).data)
+        self.assertEqual(len(data['resultados']), 5)
+        self.assertTrue(all(op['UF'] == 'AC' for op in data['resultados']))
+        self.assertEqual(data['facetas']['UF'], {'AC': 100, 'SP': 2900})
+        self.assertEqual(data['facetas']['Modalidade'], {'Cooperativa Médica': 100})
+        self.assertNotIn('facetas_aproximadas', data)
+        
+        # Soma interrompida pelo volume máximo: as contagens são sinalizadas
+        cache_resultados.limpar()
+        with patch('src.api.indices.IndiceSimilaridade.MAX_POSTINGS', 1):
+            data = json.loads(self.client.get(url).data)
+        self.assertTrue(data['facetas_aproximadas'])
+    
     @patch('os.path.exists')
     def test_buscar_operadoras_arquivo_inexistente(self, mock_exists):
         """Testa a busca quando o arquivo não existe"""
@@ -82,30 +382,580 @@ class TestAPI(unittest.TestCase):
     
     def test_rota_api_operadoras(self):
         """Testa a rota /api/operadoras"""
-        # Configurar mock para a função buscar_operadoras
-        with patch('src.api.server.buscar_operadoras') as mock_buscar:
-            # Configurar retorno do mock
-            mock_buscar.return_value = [
-                {
-                    'Registro_ANS': '123456',
-                    'Razao_Social': 'Operadora A',
-                    'Nome_Fantasia': 'Plano A',
-                    'CNPJ': '12345678901234',
-                    'Modalidade': 'Cooperativa',
-                    'UF': 'SP'
-                }
-            ]
+        self._usar_csv_exemplo()
+        
+        # Fazer requisição para a API
+        response = self.client.get('/api/operadoras?q=Plano&limite=10')
+        
+        # Verificações
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]['Registro_ANS'], '123456')
+        self.assertNotIn('X-Proximo-Cursor', response.headers)
+    
+    def test_rota_api_operadoras_paginacao_por_cursor(self):
+        """Testa a paginação com cursores, inclusive após recarga do dataset"""
+        self.df_exemplo = pd.DataFrame({
+            'Registro_ANS': [str(400000 + i) for i in range(23)],
+            'Razao_Social': [f'Operadora {(i * 7) % 23:02d}' for i in range(23)],
+            'Nome_Fantasia': [f'Plano {i:02d}' for i in range(23)],
+            'CNPJ': [str(10**13 + i) for i in range(23)],
+            'Modalidade': ['Cooperativa Médica'] * 23,
+            'UF': ['SP' if i % 3 else 'RJ' for i in range(23)],
+        })
+        caminho_csv = self._usar_csv_exemplo()
+        
+        for consulta in ['uf=SP&ordem=desc', 'q=operadora&ordenacao=registro_ans', 'ordenacao=nome_fantasia']:
+            completo = json.loads(self.client.get(f'/api/operadoras?{consulta}&limite=100').data)
             
-            # Fazer requisição para a API
-            response = self.client.get('/api/operadoras?q=Plano&limite=10')
+            paginas = []
+            response = self.client.get(f'/api/operadoras?{consulta}&limite=4')
+            while True:
+                paginas.extend(json.loads(response.data))
+                cursor = response.headers.get('X-Proximo-Cursor')
+                if not cursor:
+                    break
+                response = self.client.get(f'/api/operadoras?{consulta}&limite=4&cursor={cursor}')
             
-            # Verificações
+            self.assertEqual([op['Registro_ANS'] for op in paginas],
+                             [op['Registro_ANS'] for op in completo], consulta)
+        
+        # Cursor gerado antes de o arquivo mudar continua a partir da última chave vista
+        response = self.client.get('/api/operadoras?limite=5')
+        cursor = response.headers['X-Proximo-Cursor']
+        self.df_exemplo.iloc[::-1].to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        info = os.stat(caminho_csv)
+        os.utime(caminho_csv, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+        data = json.loads(self.client.get(f'/api/operadoras?limite=5&cursor={cursor}').data)
+        self.assertEqual([op['Razao_Social'] for op in data],
+                         [f'Operadora {i:02d}' for i in range(5, 10)])
+        
+        # Cursor malformado
+        response = self.client.get('/api/operadoras?cursor=invalido')
+        self.assertEqual(response.status_code, 400)
+        
+        # Campos com o tipo errado também são recusados com 400
+        valido = {'v': 'x', 'o': 'razao_social', 'd': 'asc', 'p': 3, 'k': 'Operadora 03'}
+        for campo, valor in (('o', 1), ('d', None), ('p', True), ('p', -1), ('p', '3'), ('v', [])):
+            texto = json.dumps({**valido, campo: valor}).encode('utf-8')
+            cursor = base64.urlsafe_b64encode(texto).decode('ascii').rstrip('=')
+            response = self.client.get(f'/api/operadoras?cursor={cursor}')
+            self.assertEqual(response.status_code, 400, (campo, valor))
+    
+    def test_rota_api_operadoras_cache(self):
+        """Testa o cache de respostas de /api/operadoras"""
+        caminho_csv = self._usar_csv_exemplo()
+        
+        response = self.client.get('/api/operadoras?q=plano&uf=sp')
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        esperado = response.data
+        
+        # Mesma busca com parâmetros equivalentes vem do cache, sem recalcular
+        with patch('src.api.server.buscar_pagina') as mock_buscar:
+            response = self.client.get('/api/operadoras?q=PLANO%20&uf=SP&ordenacao=xyz')
+            self.assertEqual(response.headers['X-Cache'], 'HIT')
+            self.assertEqual(response.data, esperado)
+            mock_buscar.assert_not_called()
+        
+        # Mudança no arquivo invalida o cache
+        info = os.stat(caminho_csv)
+        os.utime(caminho_csv, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+        response = self.client.get('/api/operadoras?q=plano&uf=sp')
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        
+        estatisticas = json.loads(self.client.get('/api').data)['cache']
+        self.assertEqual(estatisticas['acertos'], 1)
+        self.assertEqual(estatisticas['falhas'], 2)
+    
+    def test_rota_api_operadoras_cache_espacos_nas_pontas(self):
+        """Testa que o cache e a busca tratam igualmente os espaços nas pontas dos parâmetros"""
+        self._usar_csv_exemplo()
+        
+        # A busca em si distingue ' SP' de 'SP'; a rota remove os espaços antes
+        self.assertEqual(buscar_operadoras(uf=' SP'), [])
+        self.assertEqual(len(buscar_operadoras(uf='SP')), 1)
+        
+        for primeira, segunda in (('uf=%20SP', 'uf=SP'), ('q=operadora%20a', 'q=%20operadora%20a%20')):
+            cache_resultados.limpar()
+            response = self.client.get(f'/api/operadoras?{primeira}')
+            self.assertEqual(response.headers['X-Cache'], 'MISS')
+            self.assertEqual(len(json.loads(response.data)), 1)
+            response = self.client.get(f'/api/operadoras?{segunda}')
+            self.assertEqual(response.headers['X-Cache'], 'HIT')
+            self.assertEqual(len(json.loads(response.data)), 1)
+    
+    def test_cache_resultados_lru_com_limite_de_memoria(self):
+        """Testa o descarte LRU pelo orçamento de memória"""
+        cache = CacheResultados(limite_bytes=100)
+        cache.guardar('v1', 'a', 'A', 40)
+        cache.guardar('v1', 'b', 'B', 40)
+        self.assertEqual(cache.obter('v1', 'a'), 'A')  # 'a' passa a ser o mais recente
+        cache.guardar('v1', 'c', 'C', 40)              # descarta 'b'
+        
+        self.assertIsNone(cache.obter('v1', 'b'))
+        self.assertEqual(cache.obter('v1', 'c'), 'C')
+        self.assertEqual(cache.estatisticas()['remocoes'], 1)
+        self.assertEqual(cache.estatisticas()['bytes_usados'], 80)
+        
+        # Valor maior que o orçamento não é guardado
+        cache.guardar('v1', 'd', 'D', 500)
+        self.assertIsNone(cache.obter('v1', 'd'))
+        
+        # Nova versão do dataset esvazia o cache
+        self.assertIsNone(cache.obter('v2', 'a'))
+        self.assertEqual(cache.estatisticas()['entradas'], 0)
+        
+        # Valor calculado com a versão anterior (requisição iniciada antes da
+        # troca) não apaga as entradas da versão nova
+        cache.guardar('v2', 'a', 'A2', 10)
+        cache.guardar('v1', 'b', 'B1', 10)
+        self.assertEqual(cache.obter('v2', 'a'), 'A2')
+        self.assertIsNone(cache.obter('v2', 'b'))
+        self.assertEqual(cache.estatisticas()['entradas'], 1)
+    
+    def test_buscas_identicas_simultaneas_calculadas_uma_vez(self):
+        """Testa que requisições idênticas simultâneas compartilham uma única busca"""
+        self._usar_csv_exemplo()
+        from src.api import server
+        liberar = threading.Event()
+        buscar_original = server.buscar_pagina
+
+        def buscar_lento(*args, **kwargs):
+            liberar.wait(5)
+            return buscar_original(*args, **kwargs)
+
+        respostas = []
+
+        def requisitar():
+            with app.test_client() as cliente:
+                respostas.append(cliente.get('/api/operadoras?q=plano'))
+
+        with patch('src.api.server.buscar_pagina', side_effect=buscar_lento) as mock_buscar:
+            threads = [threading.Thread(target=requisitar) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            # Dá tempo para todas as requisições chegarem antes de liberar a primeira
+            time.sleep(0.2)
+            liberar.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(mock_buscar.call_count, 1)
+        self.assertEqual(sorted(r.headers['X-Cache'] for r in respostas), ['MISS'] + ['SHARED'] * 4)
+        self.assertEqual(len({r.data for r in respostas}), 1)
+        self.assertEqual(server.buscas_em_andamento.quantidade(), 0)
+
+    def test_buscas_em_andamento_repassa_erro(self):
+        """Testa que o erro da busca chega a quem espera por ela e a chave é liberada"""
+        buscas = BuscasEmAndamento()
+        iniciou, liberar = threading.Event(), threading.Event()
+        erros = []
+
+        def falhar():
+            iniciou.set()
+            liberar.wait(5)
+            raise ValueError('falhou')
+
+        def executar(funcao):
+            try:
+                buscas.executar(('v1', 'a'), funcao)
+            except ValueError as e:
+                erros.append(str(e))
+
+        lider = threading.Thread(target=executar, args=(falhar,))
+        lider.start()
+        iniciou.wait(5)
+        seguidora = threading.Thread(target=executar, args=(lambda: 'nunca chamada',))
+        seguidora.start()
+        time.sleep(0.1)
+        liberar.set()
+        lider.join()
+        seguidora.join()
+
+        self.assertEqual(erros, ['falhou', 'falhou'])
+        self.assertEqual(buscas.executar(('v1', 'a'), lambda: 'ok'), ('ok', False))
+
+    def test_rota_api_exportar_operadoras(self):
+        """Testa a exportação em streaming nos formatos NDJSON e CSV"""
+        self._usar_csv_exemplo()
+        
+        # O NDJSON reaproveita o JSON pré-serializado de cada linha, sem novo json.dumps
+        with patch('src.api.serializacao.json.dumps', wraps=json.dumps) as mock_dumps:
+            self.client.get('/api/operadoras?limite=10')
+            response = self.client.get('/api/operadoras/exportar?formato=ndjson&ordem=desc')
             self.assertEqual(response.status_code, 200)
-            data = json.loads(response.data)
-            self.assertEqual(len(data), 1)
-            self.assertEqual(data[0]['Registro_ANS'], '123456')
-            mock_buscar.assert_called_once_with('Plano', 10)
+            self.assertTrue(response.is_streamed)
+            corpo = response.data
+            self.assertEqual(mock_dumps.call_count, 2)
+        self.assertTrue(response.content_type.startswith('application/x-ndjson'))
+        linhas = [json.loads(linha) for linha in corpo.decode('utf-8').splitlines()]
+        self.assertEqual([op['Registro_ANS'] for op in linhas], ['789012', '123456'])
+        
+        response = self.client.get('/api/operadoras/exportar?formato=csv&uf=RJ')
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+        df = pd.read_csv(io.BytesIO(response.data), sep=';', dtype=str)
+        self.assertEqual(list(df.columns), list(self.df_exemplo.columns))
+        self.assertEqual(df['Razao_Social'].tolist(), ['Operadora B'])
+        
+        response = self.client.get('/api/operadoras/exportar?formato=xml')
+        self.assertEqual(response.status_code, 400)
     
+    def test_rota_api_operadoras_lote(self):
+        """Testa a busca exata em lote por Registro ANS e CNPJ"""
+        self._usar_csv_exemplo()
+        
+        response = self.client.post('/api/operadoras/lote', json={
+            'chaves': ['789012', '12.345.678/9012-34', 999999, 'abc']
+        })
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['encontrados'], 2)
+        self.assertEqual(data['nao_encontrados'], 2)
+        self.assertEqual([r['encontrado'] for r in data['resultados']], [True, True, False, False])
+        self.assertEqual(data['resultados'][0]['operadora']['Razao_Social'], 'Operadora B')
+        self.assertEqual(data['resultados'][1]['operadora']['Razao_Social'], 'Operadora A')
+        self.assertIsNone(data['resultados'][2]['operadora'])
+        
+        # Com tipo explícito, o CNPJ não é procurado como Registro ANS
+        data = json.loads(self.client.post('/api/operadoras/lote', json={
+            'chaves': ['12345678901234'], 'tipo': 'registro_ans'
+        }).data)
+        self.assertFalse(data['resultados'][0]['encontrado'])
+        
+        # Números com parte fracionária e valores que não são texto nem número não
+        # viram chaves; números inteiros escritos como float são aceitos
+        data = json.loads(self.client.post('/api/operadoras/lote', json={
+            'chaves': [12345.6, [1], {'registro': 123456}, True, 123456.0, 12345678901234.0]
+        }).data)
+        self.assertEqual([r['encontrado'] for r in data['resultados']],
+                         [False, False, False, False, True, True])
+        self.assertEqual(data['resultados'][4]['operadora']['Razao_Social'], 'Operadora A')
+        
+        self.assertEqual(self.client.post('/api/operadoras/lote', json={'x': 1}).status_code, 400)
+        self.assertEqual(self.client.post('/api/operadoras/lote',
+                                          json={'chaves': [], 'tipo': 'nome'}).status_code, 400)
+    
+    def test_rota_api_opcoes_filtro_condicional(self):
+        """Testa ETag/Last-Modified e respostas 304 em /api/opcoes-filtro"""
+        self._usar_csv_exemplo()
+        
+        response = self.client.get('/api/opcoes-filtro')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data),
+                         {'ufs': ['RJ', 'SP'], 'modalidades': ['Cooperativa', 'Medicina de Grupo']})
+        etag = response.headers['ETag']
+        self.assertIsNotNone(response.headers.get('Last-Modified'))
+        
+        with patch('src.api.dataset.extrair_opcoes_unicas') as mock_extrair:
+            response = self.client.get('/api/opcoes-filtro', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, b'')
+            
+            response = self.client.get('/api/opcoes-filtro', headers={'If-None-Match': '"outra-versao"'})
+            self.assertEqual(response.status_code, 200)
+            mock_extrair.assert_not_called()
+    
+    def test_arquivos_estaticos_comprimidos_e_versionados(self):
+        """Testa o envio dos arquivos estáticos com gzip, ETag e cache longo"""
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        referencias = re.findall(r'src="(/js/advanced_search\.js\?v=\w+)"', response.get_data(as_text=True))
+        self.assertEqual(len(referencias), 1)
+        
+        response = self.client.get(referencias[0], headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn(b'AdvancedSearch', gzip.decompress(response.data))
+        
+        response = self.client.get(referencias[0], headers={'Accept-Encoding': 'gzip',
+                                                            'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+    
+    def test_arquivos_estaticos_binarios_nao_passam_pelo_gzip(self):
+        """Testa que só os arquivos de texto são comprimidos na carga do catálogo"""
+        diretorio = Path(self.temp_dir) / 'static'
+        diretorio.mkdir()
+        (diretorio / 'app.js').write_text('console.log(1);\n' * 100)
+        (diretorio / 'logo.png').write_bytes(b'\x00' * 4096)
+        
+        with patch('src.api.estaticos.comprimir_gzip', wraps=comprimir_gzip) as mock_gzip:
+            estaticos = ArquivosEstaticos(diretorio)
+        mock_gzip.assert_called_once()
+        self.assertIsNotNone(estaticos.obter('app.js').conteudo_gzip)
+        self.assertIsNone(estaticos.obter('logo.png').conteudo_gzip)
+    
+    def test_rota_api_operadoras_json_grande_comprimido(self):
+        """Testa a compressão gzip das respostas JSON grandes"""
+        self.df_exemplo = pd.concat([self.df_exemplo] * 50, ignore_index=True)
+        self._usar_csv_exemplo()
+        
+        response = self.client.get('/api/operadoras?limite=100', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.data))), 100)
+        
+        response = self.client.get('/api/operadoras?limite=100')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+        self.assertEqual(len(json.loads(response.data)), 100)
+        
+        # A compressão é feita uma vez por resultado; os acertos no cache reaproveitam
+        cache_resultados.limpar()
+        with patch('src.api.server.comprimir_gzip', wraps=comprimir_gzip) as mock_gzip:
+            for _ in range(3):
+                response = self.client.get('/api/operadoras?limite=50', headers={'Accept-Encoding': 'gzip'})
+                self.assertEqual(len(json.loads(gzip.decompress(response.data))), 50)
+            self.assertEqual(response.headers['X-Cache'], 'HIT')
+            self.assertIn('Accept-Encoding', response.headers['Vary'])
+        mock_gzip.assert_called_once()
+    
+    def test_fragmentos_json_pre_serializados(self):
+        """Testa a montagem das respostas a partir do JSON guardado de cada linha"""
+        df = self.df_exemplo.copy()
+        df.loc[0, 'Razao_Social'] = 'Operadora São João'
+        fragmentos = FragmentosJSON(df)
+        
+        corpo = fragmentos.montar_lista(pd.Index([1, 0]).to_numpy())
+        esperado = df.iloc[[1, 0]].to_dict('records')
+        self.assertEqual(json.loads(corpo), esperado)
+        self.assertIn('São João'.encode('utf-8'), corpo)
+        self.assertEqual(fragmentos.quantidade_pronta(), 2)
+        
+        # Linhas já convertidas não voltam a passar pelo DataFrame
+        with patch.object(fragmentos, 'df', None):
+            self.assertEqual(fragmentos.montar_lista([0]), b'[' + fragmentos.obter([0])[0] + b']\n')
+        
+        corpo = fragmentos.montar_lista([0], 'Similaridade', [0.75])
+        self.assertEqual(json.loads(corpo)[0]['Similaridade'], 0.75)
+        self.assertEqual(fragmentos.montar_lista([]), b'[]\n')
+    
+    def test_indice_prefixos_autocompletar(self):
+        """Testa a busca por prefixo com caixa e acentos ignorados"""
+        indice = IndicePrefixos({
+            'Razao_Social': ['unimed sao paulo', 'unimed campinas', 'amil', ''],
+            'Registro_ANS': ['123456', '123999', '555555', '777777'],
+        })
+        
+        self.assertEqual(indice.buscar('UNIMED'), [('Razao_Social', 1), ('Razao_Social', 0)])
+        self.assertEqual(indice.buscar('Unimed São'), [('Razao_Social', 0)])
+        self.assertEqual(indice.buscar('123', limite=1), [('Registro_ANS', 0)])
+        self.assertEqual(indice.buscar('med'), [])
+        self.assertEqual(indice.buscar('  '), [])
+    
+    def test_rota_api_autocompletar(self):
+        """Testa a rota de sugestões do autocompletar"""
+        self._usar_csv_exemplo()
+        
+        response = self.client.get('/api/operadoras/autocompletar?q=plano')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([s['sugestao'] for s in data], ['Plano A', 'Plano B'])
+        self.assertEqual(data[0]['campo'], 'Nome_Fantasia')
+        self.assertEqual(data[0]['Razao_Social'], 'Operadora A')
+        self.assertIn('max-age=60', response.headers['Cache-Control'])
+        
+        data = json.loads(self.client.get('/api/operadoras/autocompletar?q=7890').data)
+        self.assertEqual(data, [{'sugestao': '789012', 'campo': 'Registro_ANS',
+                                 'Registro_ANS': '789012', 'Razao_Social': 'Operadora B'}])
+        
+        data = json.loads(self.client.get('/api/operadoras/autocompletar?q=operadora&limite=1').data)
+        self.assertEqual(len(data), 1)
+        
+        # Limite inválido é recusado; acima do máximo, é reduzido a MAX_SUGESTOES
+        for limite in ('abc', '', '2.5', '0', '-3'):
+            response = self.client.get(f'/api/operadoras/autocompletar?q=operadora&limite={limite}')
+            self.assertEqual(response.status_code, 400, limite)
+            self.assertIn('erro', json.loads(response.data))
+        with patch('src.api.server.sugerir_operadoras', return_value=[]) as mock_sugerir:
+            self.client.get('/api/operadoras/autocompletar?q=operadora&limite=100000')
+        self.assertEqual(mock_sugerir.call_args.args[2], MAX_SUGESTOES)
+    
+    def test_rota_api_operadoras_com_facetas(self):
+        """Testa as contagens por UF e Modalidade da busca atual"""
+        self.df_exemplo = pd.DataFrame({
+            'Registro_ANS': ['1', '2', '3', '4'],
+            'Razao_Social': ['Saude A', 'Saude B', 'Saude C', 'Odonto D'],
+            'Nome_Fantasia': ['', '', '', ''],
+            'CNPJ': ['11', '22', '33', '44'],
+            'Modalidade': ['Cooperativa Médica', 'Medicina de Grupo', 'Cooperativa Médica', 'Odontologia de Grupo'],
+            'UF': ['SP', 'SP', 'RJ', 'SP']
+        })
+        self._usar_csv_exemplo()
+        
+        response = self.client.get('/api/operadoras?q=saude&uf=SP&facetas=1&limite=1')
+        data = json.loads(response.data)
+        self.assertEqual(len(data['resultados']), 1)
+        # Cada faceta ignora o próprio filtro: a UF mostra também o RJ
+        self.assertEqual(data['facetas']['UF'], {'RJ': 1, 'SP': 2})
+        self.assertEqual(data['facetas']['Modalidade'], {'Cooperativa Médica': 1, 'Medicina de Grupo': 1})
+        
+        data = json.loads(self.client.get('/api/operadoras?modalidade=cooperativa&facetas=true').data)
+        self.assertEqual(data['facetas']['UF'], {'RJ': 1, 'SP': 1})
+        self.assertEqual(data['facetas']['Modalidade'],
+                         {'Cooperativa Médica': 2, 'Medicina de Grupo': 1, 'Odontologia de Grupo': 1})
+        
+        # Sem o parâmetro, a resposta continua sendo a lista
+        self.assertIsInstance(json.loads(self.client.get('/api/operadoras?q=saude').data), list)
+    
+    def test_backend_sqlite_equivalente_ao_de_memoria(self):
+        """Testa se o backend SQLite retorna as mesmas páginas que o backend em memória"""
+        ufs = ['SP', 'RJ', 'MG', 'sp']
+        modalidades = ['Cooperativa Médica', 'Medicina de Grupo', 'Odontologia de Grupo']
+        self.df_exemplo = pd.DataFrame({
+            'Registro_ANS': [str(300000 + (i * 37) % 60) for i in range(60)],
+            'Razao_Social': [f'Operadora {"São " if i % 3 else ""}{i % 7} {i % 5}' for i in range(60)],
+            'Nome_Fantasia': [f'Plano 50%_{i % 4}' if i % 2 else '' for i in range(60)],
+            'CNPJ': [str(10**13 + i) for i in range(60)],
+            'Modalidade': [modalidades[i % 3] for i in range(60)],
+            'UF': [ufs[i % 4] for i in range(60)]
+        })
+        self._usar_csv_exemplo()
+        caminho_csv = Path(self.temp_dir) / 'Relatorio_cadop.csv'
+        patcher = patch('src.api.server.banco_operadoras', BancoOperadoras(caminho_csv))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(app.config.__setitem__, 'BACKEND_BUSCA', app.config['BACKEND_BUSCA'])
+        
+        consultas = [
+            '', 'q=sao', 'q=SÃO 3', 'q=50%', 'q=_1', 'q=3&uf=sp', 'uf=SP&modalidade=grupo',
+            'modalidade=odonto&ordenacao=registro_ans&ordem=desc', 'ordenacao=nome_fantasia&ordem=desc',
+            'ordenacao=uf&limite=7', 'q=plano&facetas=1', 'q=xyz',
+        ]
+        for consulta in consultas:
+            respostas = {}
+            for backend in ('memoria', 'sqlite'):
+                app.config['BACKEND_BUSCA'] = backend
+                cache_resultados.limpar()
+                paginas, url = [], f'/api/operadoras?limite=9&{consulta}'
+                while url and len(paginas) < 10:
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    paginas.append(json.loads(response.data))
+                    cursor = response.headers.get('X-Proximo-Cursor')
+                    url = f'/api/operadoras?limite=9&{consulta}&cursor={cursor}' if cursor else None
+                respostas[backend] = paginas
+            self.assertEqual(respostas['sqlite'], respostas['memoria'], consulta)
+        
+        # Exportação, lote e autocompletar também são servidos pelo banco
+        chaves = ['300000', 300036, '10.000.000.000.005', '999', 10**30, 'abc', 300001.0]
+        for backend in ('memoria', 'sqlite'):
+            app.config['BACKEND_BUSCA'] = backend
+            respostas[backend] = {
+                'ndjson': [json.loads(linha) for linha in self.client.get(
+                    '/api/operadoras/exportar?q=sao&ordenacao=registro_ans&ordem=desc').data.splitlines()],
+                'csv': self.client.get('/api/operadoras/exportar?formato=csv&uf=sp').data,
+                'lote': json.loads(self.client.post('/api/operadoras/lote', json={'chaves': chaves}).data),
+                'cnpj': json.loads(self.client.post('/api/operadoras/lote',
+                                                    json={'chaves': chaves, 'tipo': 'cnpj'}).data),
+                'sugestoes': [json.loads(self.client.get(f'/api/operadoras/autocompletar?q={prefixo}&limite=5').data)
+                              for prefixo in ('oper', 'SÃO', 'plano', '3000', 'x', '')],
+            }
+        self.assertEqual(respostas['sqlite'], respostas['memoria'])
+        self.assertEqual(len(respostas['sqlite']['ndjson']), 40)
+        self.assertEqual(respostas['sqlite']['lote']['encontrados'], 4)
+        self.assertEqual(len(respostas['sqlite']['sugestoes'][0]), 5)
+
+        self.assertTrue(caminho_csv.with_suffix('.sqlite3').exists())
+        response = self.client.get('/api/opcoes-filtro')
+        data = json.loads(response.data)
+        self.assertEqual(data['ufs'], ['MG', 'RJ', 'SP', 'sp'])
+        self.assertIsNotNone(response.last_modified)
+        response = self.client.get('/api/opcoes-filtro', headers={'If-Modified-Since': response.headers['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+    
+    def test_rota_api_metricas_formato_prometheus(self):
+        """Testa a exposição das métricas de latência por etapa e contadores"""
+        self._usar_csv_exemplo()
+        metricas.limpar()
+        
+        self.client.get('/api/operadoras?q=plano&uf=SP')
+        self.client.get('/api/operadoras?q=plano&uf=SP')
+        
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        texto = response.get_data(as_text=True)
+        
+        for etapa in ['carga', 'filtro_texto', 'filtro_categorias', 'ordenacao', 'serializacao']:
+            self.assertIn(f'operadoras_etapa_segundos_count{{etapa="{etapa}"}} 1', texto)
+        self.assertIn('# TYPE operadoras_requisicao_segundos histogram', texto)
+        self.assertIn('operadoras_requisicao_segundos_bucket{rota="/api/operadoras",le="+Inf"} 2', texto)
+        self.assertIn('operadoras_requisicoes_total{rota="/api/operadoras",status="200"} 2', texto)
+        self.assertIn('operadoras_cache_total{resultado="acerto"} 1', texto)
+        self.assertIn('operadoras_linhas_retornadas_total 1', texto)
+        self.assertIn('operadoras_dataset_linhas 2', texto)
+    
+    def test_metricas_somadas_entre_workers(self):
+        """Testa que a coleta soma as métricas gravadas por todos os workers"""
+        diretorio = Path(self.temp_dir) / 'metricas'
+        (diretorio).mkdir()
+        (diretorio / 'metricas-1.json').write_text('{}')  # arquivo de uma execução anterior
+        worker_atual, worker_encerrado = RegistroMetricas(), RegistroMetricas()
+        worker_atual.compartilhar(diretorio)
+        worker_encerrado.compartilhar(diretorio)
+        
+        worker_atual.incrementar('api_requisicoes_total', rota='/api')
+        worker_atual.observar('api_segundos', 0.002, rota='/api')
+        worker_atual.registrar_medidor('api_linhas', lambda: 10)
+        worker_encerrado.incrementar('api_requisicoes_total', 2, rota='/api')
+        worker_encerrado.observar('api_segundos', 0.2, rota='/api')
+        worker_encerrado.registrar_medidor('api_linhas', lambda: 20)
+        
+        # Um pid que já terminou: os contadores continuam somados, o medidor não
+        processo = subprocess.Popen([sys.executable, '-c', 'pass'])
+        processo.wait()
+        with patch('src.api.metricas.os.getpid', return_value=processo.pid):
+            worker_encerrado.parar_gravacao()
+        
+        texto = worker_atual.formato_prometheus()
+        self.assertIn('api_requisicoes_total{rota="/api"} 3', texto)
+        self.assertIn('api_segundos_bucket{rota="/api",le="0.0025"} 1', texto)
+        self.assertIn('api_segundos_count{rota="/api"} 2', texto)
+        self.assertIn(f'api_linhas{{pid="{os.getpid()}"}} 10', texto)
+        self.assertNotIn(f'pid="{processo.pid}"', texto)
+        self.assertEqual(sorted(p.name for p in diretorio.iterdir()),
+                         sorted([f'metricas-{os.getpid()}.json', f'metricas-{processo.pid}.json']))
+    
+    def test_opcoes_servidor_producao(self):
+        """Testa a configuração do modo de produção (pré-carga antes do fork)"""
+        opcoes = opcoes_padrao(workers=3, porta=8080)
+        self.assertEqual(opcoes['workers'], 3)
+        self.assertEqual(opcoes['bind'], '0.0.0.0:8080')
+        self.assertTrue(opcoes['preload_app'])
+        self.assertGreater(opcoes['keepalive'], 0)
+        self.assertGreaterEqual(opcoes_padrao()['workers'], 1)
+
+    def test_recarga_no_processo_principal_recria_workers(self):
+        """Testa que, em memória, o processo principal carrega a nova versão e recria os workers"""
+        caminho_csv = Path(self.temp_dir) / 'Relatorio_cadop.csv'
+        self.df_exemplo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        dataset = DatasetOperadoras(caminho_csv)
+        antigo = dataset.obter()
+
+        df_novo = pd.concat([self.df_exemplo, self.df_exemplo.head(1)])
+        df_novo.to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        info = os.stat(caminho_csv)
+        os.utime(caminho_csv, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+
+        with patch('src.api.producao.dataset_operadoras', dataset), \
+             patch('src.api.producao.gc.freeze'), \
+             patch('src.api.producao.os.kill') as mock_kill:
+            self.assertFalse(recarregar_no_principal())  # assinatura ainda não se repetiu
+            self.assertTrue(recarregar_no_principal())
+            self.assertFalse(recarregar_no_principal())
+
+        mock_kill.assert_called_once_with(os.getpid(), signal.SIGHUP)
+        self.assertIsNot(dataset.atual(), antigo)
+        self.assertEqual(len(dataset.atual().df), 3)
+
+        # Nos workers, a versão herdada vale até o processo principal recriá-los
+        with patch('src.api.producao.dataset_operadoras', dataset), \
+             patch('src.api.producao.metricas.iniciar_gravacao'):
+            monitorar_no_worker(None, None)
+        df_novo.head(1).to_csv(caminho_csv, sep=';', index=False, encoding='utf-8')
+        self.assertEqual(len(dataset.obter().df), 3)
+
     def test_rota_api_status(self):
         """Testa a rota /api"""
         # Fazer requisição para a API
@@ -9,11 +9,16 @@ import os
 import sys
 import tempfile
 import shutil
+import threading
+import zipfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
 # Adicionar o diretório raiz ao path para importar os módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.bancoDeDados.database import preparar_scripts_sql, extrair_arquivos_zip, obter_script_sql
+from src.bancoDeDados.database import (preparar_scripts_sql, extrair_arquivos_zip, obter_script_sql,
+                                       extrair_arquivo_zip, processar_em_fluxo, analisar_arquivo_csv)
+from src.webScraping.downloads import GerenciadorDownloads
 
 class TestBancoDados(unittest.TestCase):
     """Classe de testes para o módulo de banco de dados"""
@@ -108,5 +113,120 @@ class TestBancoDados(unittest.TestCase):
         mock_zipfile.assert_called()
         mock_zip_instance.extractall.assert_called()
 
+    def _criar_zip(self, nome, membros):
+        """Cria um ZIP com os CSVs informados ({nome: conteúdo}) e retorna os bytes"""
+        caminho = Path(self.temp_dir) / nome
+        with zipfile.ZipFile(caminho, 'w') as arquivo_zip:
+            for membro, conteudo in membros.items():
+                arquivo_zip.writestr(membro, conteudo)
+        return caminho.read_bytes()
+    
+    def test_extrair_arquivo_zip_nao_repete_membros_extraidos(self):
+        """Testa que uma nova extração do mesmo ZIP não regrava os arquivos"""
+        self._criar_zip('1T2024.zip', {'1T2024.csv': 'DATA;VALOR\n2024-01-01;10\n'})
+        arquivo_zip = Path(self.temp_dir) / '1T2024.zip'
+        destino = Path(self.temp_dir) / 'extraidos'
+        
+        extraidos = list(extrair_arquivo_zip(arquivo_zip, destino))
+        self.assertEqual(extraidos, [destino / '1T2024.csv'])
+        modificado_em = extraidos[0].stat().st_mtime_ns
+        
+        with patch.object(zipfile.ZipFile, 'extract') as mock_extract:
+            self.assertEqual(list(extrair_arquivo_zip(arquivo_zip, destino)), extraidos)
+            mock_extract.assert_not_called()
+        self.assertEqual(extraidos[0].stat().st_mtime_ns, modificado_em)
+    
+    def test_processar_em_fluxo_sobrepoe_etapas(self):
+        """Testa que um ZIP é extraído e analisado enquanto outro ainda está sendo baixado"""
+        arquivos = {
+            '/2024/1T2024.zip': self._criar_zip('a.zip', {'1T2024.csv': 'REG_ANS;VL_SALDO_FINAL\n1;10\n'}),
+            '/2024/2T2024.zip': self._criar_zip('b.zip', {'2T2024.csv': 'REG_ANS;VL_SALDO_FINAL\n2;20\n'}),
+        }
+        primeiro_analisado = threading.Event()
+        eventos = []
+        
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/2024/2T2024.zip':
+                    # O segundo arquivo só é enviado depois que o primeiro foi analisado
+                    primeiro_analisado.wait(5)
+                    eventos.append('envio 2T2024.zip')
+                corpo = arquivos[self.path]
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+            
+            def log_message(self, *args):
+                pass
+        
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        base = f'http://127.0.0.1:{servidor.server_port}'
+        
+        def analisar(arquivo):
+            eventos.append(f'analise {Path(arquivo).name}')
+            primeiro_analisado.set()
+            return analisar_arquivo_csv(arquivo)
+        
+        diretorio = Path(self.temp_dir) / 'dados'
+        tarefas = [(base + caminho, diretorio / caminho.split('/')[-1]) for caminho in arquivos]
+        with patch('src.bancoDeDados.database.analisar_arquivo_csv', side_effect=analisar):
+            with GerenciadorDownloads() as downloads:
+                fluxo = processar_em_fluxo(downloads, tarefas, diretorio / 'extraidos', manter_zips=False)
+        
+        self.assertEqual(eventos, ['analise 1T2024.csv', 'envio 2T2024.zip', 'analise 2T2024.csv'])
+        self.assertEqual(fluxo['arquivos'], [destino for _, destino in tarefas])
+        self.assertEqual(sorted(p.name for p in fluxo['extraidos']), ['1T2024.csv', '2T2024.csv'])
+        self.assertEqual(fluxo['estrutura'][str(diretorio / 'extraidos' / '1T2024.csv')]['colunas'],
+                         ['REG_ANS', 'VL_SALDO_FINAL'])
+        # Com manter_zips=False, os ZIPs são apagados depois de extraídos
+        self.assertFalse(any(destino.exists() for _, destino in tarefas))
+    
+    def test_processar_em_fluxo_continua_apos_zip_corrompido(self):
+        """Testa que um ZIP corrompido no meio não impede a extração dos demais"""
+        corrompido = self._criar_zip('b.zip', {'2T2024.csv': 'REG_ANS;VL_SALDO_FINAL\n2;20\n'})
+        # O diretório do ZIP continua válido, mas o conteúdo não confere com o CRC
+        corrompido = corrompido.replace(b'2;20', b'2;99')
+        arquivos = {
+            '/2024/1T2024.zip': self._criar_zip('a.zip', {'1T2024.csv': 'REG_ANS;VL_SALDO_FINAL\n1;10\n'}),
+            '/2024/2T2024.zip': corrompido,
+            '/2024/3T2024.zip': b'pagina de erro, nao um ZIP',
+            '/2024/4T2024.zip': self._criar_zip('d.zip', {'4T2024.csv': 'REG_ANS;VL_SALDO_FINAL\n4;40\n'}),
+        }
+        
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                corpo = arquivos[self.path]
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+            
+            def log_message(self, *args):
+                pass
+        
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        base = f'http://127.0.0.1:{servidor.server_port}'
+        
+        diretorio = Path(self.temp_dir) / 'dados'
+        tarefas = [(base + caminho, diretorio / caminho.split('/')[-1]) for caminho in arquivos]
+        with GerenciadorDownloads(max_simultaneos=1) as downloads:
+            fluxo = processar_em_fluxo(downloads, tarefas, diretorio / 'extraidos')
+        
+        self.assertEqual(fluxo['arquivos'], [tarefas[0][1], False, False, tarefas[3][1]])
+        self.assertEqual(sorted(p.name for p in fluxo['extraidos']), ['1T2024.csv', '4T2024.csv'])
+        self.assertEqual(sorted(arquivo.name for arquivo, _ in fluxo['erros']), ['2T2024.zip', '3T2024.zip'])
+        # Os arquivos com erro são apagados, para serem baixados de novo na próxima execução
+        self.assertEqual([destino.exists() for _, destino in tarefas], [True, False, False, True])
+        self.assertFalse((diretorio / 'extraidos' / '2T2024.csv').exists())
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -9,11 +9,20 @@ import os
 import sys
 import tempfile
 import shutil
+import requests
+import threading
+import time
+import base64
+import hashlib
+import functools
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler, SimpleHTTPRequestHandler
 
 # Adicionar o diretório raiz ao path para importar os módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.webScraping.scraper import baixar_arquivo, criar_zip, baixar_multiplos_arquivos
+from src.webScraping.downloads import GerenciadorDownloads, ManifestoDownloads, baixar_para_arquivo, caminho_parcial
+from src.webScraping.descoberta import descobrir_arquivos, ler_listagem
 
 class TestWebScraping(unittest.TestCase):
     """Classe de testes para o módulo de web scraping"""
@@ -34,6 +43,7 @@ class TestWebScraping(unittest.TestCase):
         # Configurar o mock
         mock_response = MagicMock()
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.iter_content.return_value = [b"conteudo do arquivo"]
         mock_get.return_value = mock_response
         
@@ -46,7 +56,8 @@ class TestWebScraping(unittest.TestCase):
         
         # Verificações
         self.assertEqual(resultado, caminho_destino)
-        mock_get.assert_called_once_with(url, stream=True)
+        mock_get.assert_called_once_with(url, stream=True, timeout=30,
+                                         headers={'Accept-Encoding': 'identity'})
         self.assertTrue(caminho_destino.exists())
     
     @patch('requests.get')
@@ -55,6 +66,7 @@ class TestWebScraping(unittest.TestCase):
         # Configurar o mock
         mock_response = MagicMock()
         mock_response.status_code = 404
+        mock_response.headers = {}
         mock_get.return_value = mock_response
         
         # Arquivo para baixar
@@ -66,7 +78,8 @@ class TestWebScraping(unittest.TestCase):
         
         # Verificações
         self.assertFalse(resultado)
-        mock_get.assert_called_once_with(url, stream=True)
+        mock_get.assert_called_once_with(url, stream=True, timeout=30,
+                                         headers={'Accept-Encoding': 'identity'})
         self.assertFalse(caminho_destino.exists())
     
     def test_criar_zip(self):
@@ -98,11 +111,11 @@ class TestWebScraping(unittest.TestCase):
             self.assertIn(arquivo1.name, zip_ref.namelist())
             self.assertIn(arquivo2.name, zip_ref.namelist())
     
-    @patch('src.webScraping.scraper.baixar_arquivo')
+    @patch('src.webScraping.downloads.baixar_para_arquivo')
     def test_baixar_multiplos_arquivos(self, mock_baixar_arquivo):
         """Testa o download de múltiplos arquivos"""
         # Configurar o mock
-        def side_effect(url, nome_arquivo):
+        def side_effect(sessao, url, nome_arquivo, timeout, manifesto=None):
             return nome_arquivo
         
         mock_baixar_arquivo.side_effect = side_effect
@@ -120,5 +133,263 @@ class TestWebScraping(unittest.TestCase):
         for i, url in enumerate(urls):
             self.assertEqual(resultado[i], diretorio_destino / url.split('/')[-1])
 
+    def _iniciar_servidor_lento(self, atraso):
+        """Sobe um servidor HTTP local que demora `atraso` segundos por arquivo"""
+        estado = {'ativos': 0, 'maximo': 0, 'conexoes': set()}
+        lock = threading.Lock()
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with lock:
+                    estado['ativos'] += 1
+                    estado['maximo'] = max(estado['maximo'], estado['ativos'])
+                    estado['conexoes'].add(self.client_address)
+                time.sleep(atraso)
+                corpo = self.path.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+                with lock:
+                    estado['ativos'] -= 1
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        return f'http://127.0.0.1:{servidor.server_port}', estado
+
+    def test_baixar_multiplos_arquivos_em_paralelo(self):
+        """Testa que os downloads ocorrem em paralelo e o tempo total não é a soma"""
+        base, estado = self._iniciar_servidor_lento(0.3)
+        urls = [f'{base}/arquivo{i}.zip' for i in range(4)]
+
+        inicio = time.perf_counter()
+        resultado = baixar_multiplos_arquivos(urls, self.temp_dir)
+        duracao = time.perf_counter() - inicio
+
+        self.assertEqual(resultado, [Path(self.temp_dir) / f'arquivo{i}.zip' for i in range(4)])
+        self.assertEqual(resultado[2].read_bytes(), b'/arquivo2.zip')
+        self.assertLess(duracao, 1.0)
+        self.assertEqual(estado['maximo'], 4)
+
+    def test_gerenciador_downloads_limite_e_sessao_por_host(self):
+        """Testa o limite de downloads simultâneos por host e o reaproveitamento de conexões"""
+        base, estado = self._iniciar_servidor_lento(0.1)
+        host = base.split('//')[1]
+        tarefas = [(f'{base}/arquivo{i}.csv', Path(self.temp_dir) / f'arquivo{i}.csv') for i in range(6)]
+
+        with GerenciadorDownloads(max_simultaneos=6, limites_por_host={host: 2}) as downloads:
+            self.assertIs(downloads.sessao(tarefas[0][0]), downloads.sessao(tarefas[1][0]))
+            resultados = downloads.baixar_varios(tarefas)
+
+        self.assertEqual(resultados, [destino for _, destino in tarefas])
+        self.assertEqual(estado['maximo'], 2)
+        # As 6 requisições usaram no máximo 2 conexões (keep-alive)
+        self.assertLessEqual(len(estado['conexoes']), 2)
+
+    def _iniciar_servidor_instavel(self, conteudo, cortes, digest=None):
+        """
+        Sobe um servidor HTTP local com suporte a Range que derruba a conexão
+        depois de enviar cortes[0], cortes[1], ... bytes nas primeiras respostas
+        """
+        etag = '"v1"'
+        digest = digest or hashlib.sha256(conteudo).digest()
+        estado = {'faixas': [], 'enviados': 0, 'cortes': list(cortes), 'nao_modificados': 0}
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.headers.get('If-None-Match') == etag:
+                    estado['nao_modificados'] += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                faixa = self.headers.get('Range')
+                if faixa and self.headers.get('If-Range', etag) != etag:
+                    faixa = None
+                estado['faixas'].append(faixa)
+                inicio = int(faixa.split('=')[1].rstrip('-')) if faixa else 0
+                if inicio >= len(conteudo) and faixa:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{len(conteudo)}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                corpo = conteudo[inicio:]
+                self.send_response(206 if faixa else 200)
+                if faixa:
+                    self.send_header('Content-Range', f'bytes {inicio}-{len(conteudo) - 1}/{len(conteudo)}')
+                self.send_header('ETag', etag)
+                self.send_header('Repr-Digest', f'sha-256=:{base64.b64encode(digest).decode()}:')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                if estado['cortes']:
+                    corpo = corpo[:estado['cortes'].pop(0)]
+                    self.close_connection = True
+                self.wfile.write(corpo)
+                self.wfile.flush()
+                estado['enviados'] += len(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        return f'http://127.0.0.1:{servidor.server_port}/1T2024.zip', estado
+
+    @patch('src.webScraping.downloads.ESPERA_ENTRE_TENTATIVAS', 0)
+    def test_baixar_arquivo_retoma_conexao_interrompida(self):
+        """Testa que o download continua de onde parou, sem repetir bytes já recebidos"""
+        conteudo = os.urandom(300000)
+        url, estado = self._iniciar_servidor_instavel(conteudo, [100000, 50000])
+        destino = Path(self.temp_dir) / '1T2024.zip'
+
+        resultado = baixar_arquivo(url, destino)
+
+        self.assertEqual(resultado, destino)
+        self.assertEqual(destino.read_bytes(), conteudo)
+        self.assertEqual(estado['faixas'], [None, 'bytes=100000-', 'bytes=150000-'])
+        self.assertEqual(estado['enviados'], len(conteudo))
+        self.assertFalse(caminho_parcial(destino).exists())
+
+    @patch('src.webScraping.downloads.ESPERA_ENTRE_TENTATIVAS', 0)
+    def test_baixar_arquivo_retoma_em_outra_execucao(self):
+        """Testa que um .part deixado por uma execução anterior é aproveitado"""
+        conteudo = os.urandom(200000)
+        url, estado = self._iniciar_servidor_instavel(conteudo, [80000, 0])
+        destino = Path(self.temp_dir) / '1T2024.zip'
+
+        # A primeira execução desiste (a retomada também cai sem enviar nada):
+        # o arquivo final não existe e o .part fica para a próxima
+        self.assertFalse(baixar_para_arquivo(requests, url, destino, tentativas=1))
+        self.assertFalse(destino.exists())
+        self.assertEqual(caminho_parcial(destino).stat().st_size, 80000)
+
+        self.assertEqual(baixar_arquivo(url, destino), destino)
+        self.assertEqual(destino.read_bytes(), conteudo)
+        self.assertEqual(estado['enviados'], len(conteudo))
+
+    def test_baixar_arquivo_checksum_invalido(self):
+        """Testa que um arquivo com checksum diferente do informado pelo servidor é descartado"""
+        url, _ = self._iniciar_servidor_instavel(b'conteudo corrompido', [], digest=b'0' * 32)
+        destino = Path(self.temp_dir) / '1T2024.zip'
+
+        self.assertFalse(baixar_arquivo(url, destino))
+        self.assertFalse(destino.exists())
+        self.assertFalse(caminho_parcial(destino).exists())
+
+    def test_manifesto_dispensa_arquivos_que_nao_mudaram(self):
+        """Testa que, com o manifesto, um arquivo inalterado não é transferido de novo"""
+        conteudo = os.urandom(50000)
+        url, estado = self._iniciar_servidor_instavel(conteudo, [])
+        destino = Path(self.temp_dir) / '1T2024.zip'
+        manifesto = Path(self.temp_dir) / 'manifesto_downloads.json'
+
+        with GerenciadorDownloads(manifesto=manifesto) as downloads:
+            self.assertEqual(downloads.baixar(url, destino), destino)
+        entrada = ManifestoDownloads(manifesto).entrada(url)
+        self.assertEqual(entrada['etag'], '"v1"')
+        self.assertEqual(entrada['tamanho'], len(conteudo))
+        self.assertEqual(entrada['sha256'], hashlib.sha256(conteudo).hexdigest())
+
+        # Nova execução: GET condicional, resposta 304 e nenhum byte transferido
+        modificado_em = destino.stat().st_mtime_ns
+        with GerenciadorDownloads(manifesto=manifesto) as downloads:
+            self.assertEqual(downloads.baixar(url, destino), destino)
+        self.assertEqual(estado['nao_modificados'], 1)
+        self.assertEqual(estado['enviados'], len(conteudo))
+        self.assertEqual(destino.stat().st_mtime_ns, modificado_em)
+
+        # Arquivo local alterado (mesmo tamanho): baixado de novo, sem GET condicional
+        destino.write_bytes(bytes(len(conteudo)))
+        with GerenciadorDownloads(manifesto=manifesto) as downloads:
+            self.assertEqual(downloads.baixar(url, destino), destino)
+        self.assertEqual(estado['nao_modificados'], 1)
+        self.assertEqual(destino.read_bytes(), conteudo)
+
+    def _iniciar_servidor_diretorio(self, arquivos, listagem=True):
+        """
+        Sobe um servidor HTTP local no lugar do FTP/PDA da ANS, servindo os
+        arquivos informados em /demonstracoes_contabeis/2024/
+        """
+        raiz = Path(self.temp_dir) / 'servidor'
+        diretorio = raiz / 'demonstracoes_contabeis' / '2024'
+        diretorio.mkdir(parents=True)
+        for nome, tamanho in arquivos.items():
+            (diretorio / nome).write_bytes(b'x' * tamanho)
+        requisicoes = []
+
+        class Manipulador(SimpleHTTPRequestHandler):
+            def send_head(self):
+                requisicoes.append((self.command, self.path))
+                return super().send_head()
+
+            def list_directory(self, caminho):
+                if not listagem:
+                    self.send_error(403)
+                    return None
+                return super().list_directory(caminho)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Manipulador, directory=str(raiz)))
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        return f'http://127.0.0.1:{servidor.server_port}/demonstracoes_contabeis/2024/', requisicoes
+
+    def test_ler_listagem_de_diretorio(self):
+        """Testa a leitura de uma listagem no formato do Apache"""
+        html = """<h1>Index of /FTP/PDA/demonstracoes_contabeis/2024</h1>
+            <a href="?C=N;O=D">Name</a> <a href="/FTP/PDA/demonstracoes_contabeis/">Parent Directory</a>
+            <a href="1T2024.zip">1T2024.zip</a> 2024-05-30 10:37 21M
+            <a href="2T2024%20retificado.zip">2T2024 retificado.zip</a> 2024-08-30 10:37 22M
+            <a href="antigos/">antigos/</a> <a href="https://outro.site/3T2024.zip">3T2024.zip</a>"""
+        url = 'https://dadosabertos.ans.gov.br/FTP/PDA/demonstracoes_contabeis/2024/'
+
+        self.assertEqual(ler_listagem(html, url), [
+            ('1T2024.zip', url + '1T2024.zip'),
+            ('2T2024 retificado.zip', url + '2T2024%20retificado.zip'),
+        ])
+
+    def test_descobrir_arquivos_pela_listagem(self):
+        """Testa que a descoberta usa a listagem e encontra nomes fora do padrão 1T..4T"""
+        url, requisicoes = self._iniciar_servidor_diretorio(
+            {'1T2024.zip': 100, '2T2024_v2.zip': 250, 'LEIAME.txt': 10})
+
+        arquivos = descobrir_arquivos(url, padrao=r'\.zip$', candidatos=['1T2024.zip', '3T2024.zip'])
+
+        self.assertEqual(arquivos, [
+            {'nome': '1T2024.zip', 'url': url + '1T2024.zip', 'tamanho': 100},
+            {'nome': '2T2024_v2.zip', 'url': url + '2T2024_v2.zip', 'tamanho': 250},
+        ])
+        # Uma leitura da listagem e um HEAD por arquivo encontrado; nada é baixado
+        self.assertEqual(sorted(metodo for metodo, _ in requisicoes), ['GET', 'HEAD', 'HEAD'])
+
+    def test_descobrir_arquivos_sem_listagem(self):
+        """Testa a verificação dos nomes candidatos quando a listagem não está disponível"""
+        url, _ = self._iniciar_servidor_diretorio({'1T2024.zip': 100, '2T2024.zip': 200}, listagem=False)
+
+        with GerenciadorDownloads() as downloads:
+            arquivos = descobrir_arquivos(url, candidatos=[f'{t}T2024.zip' for t in range(1, 5)],
+                                          downloads=downloads)
+
+        self.assertEqual([(arquivo['nome'], arquivo['tamanho']) for arquivo in arquivos],
+                         [('1T2024.zip', 100), ('2T2024.zip', 200)])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file